@@ -0,0 +1,226 @@
+"""
+Admission Control
+Opt-in (ADMISSION_ENABLED) load shedding for the CPU-bound routes. Each
+route class (/predict, /skill-gap/analyze, /learner/profile) gets a gate that
+caps in-flight computations; requests beyond the cap wait in a priority
+queue instead of piling up behind the thread pool.
+
+A client may send its remaining budget in X-Request-Deadline-Ms and a
+priority in X-Request-Priority (high / normal / low). The expected queue wait
+is estimated from an EWMA of recent service times; a request that would
+miss its deadline — or finds the queue full of equal or higher priority
+work — is rejected at once with 503 and a Retry-After, before any compute is
+spent on it. A full queue sheds its lowest-priority waiter to make room for a
+more important arrival, and a waiter whose deadline passes in the queue is
+dropped.
+
+While a gate is saturated, cheap answers are preferred over new work: a
+request identical to one already computing joins it, and an identical
+request answered within ADMISSION_STALE_SECONDS is served that answer.
+"""
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from app.core.cache import ByteLRU, estimate_json_bytes
+from app.core.config import settings
+from app.core.metrics import (ADMISSION_IN_FLIGHT, ADMISSION_QUEUED, ADMISSION_WAIT_SECONDS,
+                              ADMISSION_ESTIMATED_WAIT, ADMISSION_SHED, ADMISSION_CACHED)
+
+DEADLINE_HEADER = 'x-request-deadline-ms'
+PRIORITY_HEADER = 'x-request-priority'
+PRIORITIES = {'high': 0, 'normal': 1, 'low': 2}
+
+_EWMA_ALPHA = 0.2
+_INITIAL_SERVICE = 0.05     # seconds per request assumed until one has been measured
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing; answered as 503 with Retry-After (see `overloaded_handler`)."""
+
+    def __init__(self, route: str, reason: str, retry_after: float):
+        super().__init__(f"{route} is overloaded ({reason}); retry in {retry_after:.1f}s")
+        self.route = route
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Gate:
+    """At most `limit` concurrent computations; the rest wait by (priority, arrival)."""
+
+    def __init__(self, route: str, limit: int, max_queue: int):
+        self.route = route
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.in_flight = 0
+        self.service_ewma: Optional[float] = None
+        self._waiters: List[tuple] = []     # heap of (priority, seq, future)
+        self._seq = itertools.count()
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= self.limit
+
+    def estimated_wait(self, priority: int) -> float:
+        """Seconds until a new request of `priority` would start, from the EWMA service time."""
+        if self.in_flight < self.limit and not self._waiters:
+            return 0.0
+        ahead = sum(1 for p, _, f in self._waiters if p <= priority and not f.done())
+        service = self.service_ewma if self.service_ewma is not None else _INITIAL_SERVICE
+        return (ahead + 1) * service / self.limit
+
+    def _publish(self):
+        ADMISSION_IN_FLIGHT.set(self.in_flight, route=self.route)
+        ADMISSION_QUEUED.set(len(self._waiters), route=self.route)
+        ADMISSION_ESTIMATED_WAIT.set(self.estimated_wait(PRIORITIES['normal']), route=self.route)
+
+    def _reject(self, reason: str, wait: float) -> Overloaded:
+        ADMISSION_SHED.inc(route=self.route, reason=reason)
+        return Overloaded(self.route, reason, max(1.0, wait))
+
+    def _forget(self, future: asyncio.Future):
+        self._waiters = [w for w in self._waiters if w[2] is not future]
+        heapq.heapify(self._waiters)
+
+    async def acquire(self, priority: int, deadline: Optional[float]):
+        now = time.monotonic()
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            ADMISSION_WAIT_SECONDS.observe(0.0, route=self.route)
+            self._publish()
+            return
+
+        wait = self.estimated_wait(priority)
+        if deadline is not None and now + wait > deadline:
+            raise self._reject('deadline', wait)
+        if len(self._waiters) >= self.max_queue:
+            # Make room by shedding the least important (then newest) waiter, if it ranks below us
+            victim = max(self._waiters, key=lambda w: (w[0], w[1]), default=None)
+            if victim is None or victim[0] <= priority:
+                raise self._reject('queue_full', wait)
+            self._forget(victim[2])
+            victim[2].set_exception(self._reject('displaced', wait))
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._publish()
+        try:
+            timeout = None if deadline is None else max(0.0, deadline - now)
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if not (future.done() and not future.cancelled() and future.exception() is None):
+                future.cancel()
+                self._forget(future)
+                self._publish()
+                raise self._reject('expired', self.estimated_wait(priority)) from None
+        except BaseException:
+            # Cancelled (client gone): hand back a slot we were just given, else leave the queue
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release(None)
+            else:
+                future.cancel()
+                self._forget(future)
+                self._publish()
+            raise
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - now, route=self.route)
+
+    def release(self, service_time: Optional[float]):
+        if service_time is not None:
+            self.service_ewma = service_time if self.service_ewma is None else \
+                _EWMA_ALPHA * service_time + (1 - _EWMA_ALPHA) * self.service_ewma
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(True)     # the slot passes straight to the next waiter
+                self._publish()
+                return
+        self.in_flight -= 1
+        self._publish()
+
+
+# ── Route classes ─────────────────────────────────────────────────────────────
+def _limits() -> Dict[str, int]:
+    cpus = os.cpu_count() or 1
+    configured = {
+        'predict':   settings.ADMISSION_PREDICT_CONCURRENCY,
+        'skill_gap': settings.ADMISSION_SKILL_GAP_CONCURRENCY,
+        'profile':   settings.ADMISSION_PROFILE_CONCURRENCY,
+    }
+    return {route: limit or cpus for route, limit in configured.items()}
+
+
+_gates: Dict[str, Gate] = {}
+
+
+def gate(route: str) -> Gate:
+    g = _gates.get(route)
+    if g is None:
+        g = _gates[route] = Gate(route, _limits()[route], settings.ADMISSION_MAX_QUEUE)
+    return g
+
+
+def _recent_size(entry: tuple) -> int:
+    # Estimated, not encoded: put() runs on the event loop for every admitted answer
+    return estimate_json_bytes(entry[1])
+
+
+# Recent answers per (route, request key), served instead of queueing while saturated
+_recent = ByteLRU('admission_recent', int(settings.ADMISSION_RECENT_MB * 1024 * 1024), _recent_size)
+
+
+def request_deadline(request: Request) -> Optional[float]:
+    """Absolute monotonic deadline from X-Request-Deadline-Ms (or ADMISSION_DEFAULT_DEADLINE_MS)."""
+    raw = request.headers.get(DEADLINE_HEADER)
+    try:
+        budget_ms = float(raw) if raw is not None else settings.ADMISSION_DEFAULT_DEADLINE_MS
+    except ValueError:
+        budget_ms = settings.ADMISSION_DEFAULT_DEADLINE_MS
+    if raw is None and budget_ms <= 0:
+        return None
+    return time.monotonic() + max(0.0, budget_ms) / 1000
+
+
+def request_priority(request: Request) -> int:
+    return PRIORITIES.get(request.headers.get(PRIORITY_HEADER, '').strip().lower(), PRIORITIES['normal'])
+
+
+async def run(request: Request, route: str, key: Hashable, compute: Callable[[], Awaitable],
+              flight=None):
+    """
+    Await `compute()` under the route's gate. `flight` (an AsyncSingleFlight
+    keyed by `key`) lets identical in-flight requests be joined without a slot.
+    """
+    if not settings.ADMISSION_ENABLED:
+        return await compute()
+    g = gate(route)
+    if g.saturated:
+        recent = _recent.get((route, key))
+        if recent is not None and time.monotonic() - recent[0] <= settings.ADMISSION_STALE_SECONDS:
+            ADMISSION_CACHED.inc(route=route, source='recent')
+            return recent[1]
+        if flight is not None and flight.running(key):
+            ADMISSION_CACHED.inc(route=route, source='in_flight')
+            return await compute()
+
+    await g.acquire(request_priority(request), request_deadline(request))
+    started = time.monotonic()
+    try:
+        result = await compute()
+    except BaseException:
+        g.release(None)
+        raise
+    g.release(time.monotonic() - started)
+    _recent.put((route, key), (time.monotonic(), result))
+    return result
+
+
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(status_code=503, content={"detail": str(exc), "reason": exc.reason},
+                        headers={"Retry-After": str(math.ceil(exc.retry_after))})
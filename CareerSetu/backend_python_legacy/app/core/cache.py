@@ -0,0 +1,115 @@
+"""
+Byte-bounded LRU Cache
+Thread-safe in-process cache that evicts least-recently-used entries once the
+estimated size of its values exceeds a byte budget. Hits, misses, evictions
+and resident size are exported on /metrics under the cache's name.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.metrics import record_cache, CACHE_BYTES, CACHE_ENTRIES, CACHE_EVICTIONS
+
+# Rough per-entry bookkeeping cost (key tuple, OrderedDict node, size record)
+_ENTRY_OVERHEAD = 200
+_SCALAR_BYTES = 8
+_ITEM_BYTES = 16    # assumed size of a value below the estimate's depth limit
+_SCALARS = (int, float, bool)
+
+
+def estimate_json_bytes(obj, depth: int = 2) -> int:
+    """
+    Approximate JSON size of a response payload in bounded time: lists are
+    sized from their first element, and nesting beyond `depth` counts a flat
+    _ITEM_BYTES per value. For caches of route results that must not pay
+    for encoding them a second time.
+    """
+    if obj is None or type(obj) in _SCALARS:
+        return _SCALAR_BYTES
+    if isinstance(obj, (str, bytes)):
+        return len(obj) + 2
+    if isinstance(obj, BaseModel):
+        obj = obj.__dict__
+    if isinstance(obj, dict):
+        if depth <= 0:
+            return 2 + len(obj) * _ITEM_BYTES
+        return 2 + sum((len(k) if isinstance(k, str) else _SCALAR_BYTES) + 4 + estimate_json_bytes(v, depth - 1)
+                       for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        if not obj:
+            return 2
+        if depth <= 0:
+            return 2 + len(obj) * _ITEM_BYTES
+        return 2 + len(obj) * (estimate_json_bytes(obj[0], depth - 1) + 1)
+    if isinstance(obj, np.ndarray):
+        return 2 + obj.size * (_SCALAR_BYTES + 1)
+    return _SCALAR_BYTES
+
+
+class ByteLRU:
+    def __init__(self, name: str, max_bytes: int, sizeof: Callable[[object], int]):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()   # key → (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+        record_cache(self.name, entry is not None)
+        return default if entry is None else entry[0]
+
+    def put(self, key: Hashable, value):
+        size = self._sizeof(value) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        evicted = 0
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, dropped) = self._data.popitem(last=False)
+                self._bytes -= dropped
+                evicted += 1
+            nbytes, entries = self._bytes, len(self._data)
+        self._publish(nbytes, entries, evicted)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+        """Cached value for `key`, computing and storing it on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+        self._publish(0, 0, 0)
+
+    def _publish(self, nbytes: int, entries: int, evicted: int):
+        if not settings.METRICS_ENABLED:
+            return
+        CACHE_BYTES.set(nbytes, cache=self.name)
+        CACHE_ENTRIES.set(entries, cache=self.name)
+        if evicted:
+            CACHE_EVICTIONS.inc(evicted, cache=self.name)
@@ -6,6 +6,60 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    AUTH_TOKEN_CACHE_MB: float = 4.0      # verified-token claims kept to skip repeat signature checks
+    AUTH_PROFILE_CLAIMS: bool = False     # embed the recommender profile (version + hash) in issued tokens
+    AUTH_PROFILE_MEMO_SECONDS: float = 300.0  # max age of /recommend answers served from the token memo
+    AUTH_PROFILE_MEMO_MB: float = 8.0
+
+    # Observability — /metrics, stage spans and sampled cProfile dumps
+    METRICS_ENABLED: bool = True
+    PROFILE_SAMPLE_RATE: float = 0.0      # fraction of requests whose thread-pool work runs under cProfile
+    PROFILE_SLOW_MS: float = 500.0        # requests slower than this are logged / dumped
+    PROFILE_DIR: str = "profiles"
+    LOOP_MONITOR_ENABLED: bool = False    # measure event-loop lag and log callbacks that block it
+    LOOP_MONITOR_INTERVAL_MS: float = 20.0
+    LOOP_BLOCK_THRESHOLD_MS: float = 100.0
+    FAST_JSON_RESPONSES: bool = False     # encode route payloads with orjson (app.core.fastjson)
+
+    # Admission control for CPU-bound routes (/predict, /skill-gap/analyze, /learner/profile)
+    ADMISSION_ENABLED: bool = False
+    ADMISSION_PREDICT_CONCURRENCY: int = 0      # in-flight computations per route class (0 = CPU count)
+    ADMISSION_SKILL_GAP_CONCURRENCY: int = 0
+    ADMISSION_PROFILE_CONCURRENCY: int = 0
+    ADMISSION_MAX_QUEUE: int = 64               # waiting requests per route class
+    ADMISSION_DEFAULT_DEADLINE_MS: float = 0.0  # budget when no X-Request-Deadline-Ms is sent (0 = none)
+    ADMISSION_STALE_SECONDS: float = 30.0       # max age of a recent answer served while saturated
+    ADMISSION_RECENT_MB: float = 8.0
+
+    # Skill-gap Random Forest training
+    SKILL_GAP_N_ESTIMATORS: int = 150
+    SKILL_GAP_N_JOBS: int = -1            # joblib workers for fitting (-1 = all cores)
+    SKILL_GAP_SAMPLES_PER_ROLE: int = 4   # synthetic learners per role, cycling 100/75/50/25 %
+    SKILL_GAP_SEED: int = 42
+    SKILL_GAP_ENGINE: str = "role"        # "role" (per-role forest) or "pairwise" ([role, learner] forest)
+
+    # Background training jobs (/train, /skill-gap/rebuild)
+    JOBS_MAX_WORKERS: int = 1             # training processes
+    JOBS_HISTORY: int = 100               # finished jobs kept for /jobs/{id}
+
+    # Recommender dense (LSA) retrieval channel
+    RECOMMENDER_LSA_DIM: int = 128           # TruncatedSVD components (capped at courses / 4)
+    RECOMMENDER_DENSE_WEIGHT: float = 0.0    # default blend weight of LSA vs TF-IDF cosine (0 = off)
+
+    RECOMMENDER_QUERY_CACHE_MB: float = 16.0  # LRU of tokenised query parts (skills / interest / role)
+
+    # Catalogue source for courses / job roles / NSQF levels / job market
+    CATALOGUE_BACKEND: str = "csv"        # "csv", "parquet" or "mongo"
+    CATALOGUE_DIR: str = ""               # csv / parquet directory (default: backend/data)
+    CATALOGUE_MONGO_PREFIX: str = "catalogue_"   # collections: catalogue_courses, catalogue_job_roles, ...
+    CATALOGUE_MONGO_BATCH_SIZE: int = 1000
+    CATALOGUE_REFRESH: str = "auto"       # mongo: "change_stream", "poll" or "auto" (stream, else poll)
+    CATALOGUE_POLL_SECONDS: float = 60.0
+
+    # Job-market observation ingestion (running regression sums per skill)
+    MARKET_REFERENCE_YEAR: int = 2020     # x = year - this, keeps Σx² small
+    MARKET_OBSERVATIONS_DIR: str = ""     # parquet parts + snapshot (default: backend/data/market_observations)
+    MARKET_SNAPSHOT_EVERY: int = 20       # parts between snapshots
 
     class Config:
         env_file = ".env"
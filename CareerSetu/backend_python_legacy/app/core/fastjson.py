@@ -0,0 +1,99 @@
+"""
+Fast JSON Responses
+Opt-in (FAST_JSON_RESPONSES) replacement for FastAPI's default encoding path,
+which walks every returned dict through `jsonable_encoder` before
+`json.dumps`. Routes return `fast_response(payload)`: with the flag on, the
+payload is encoded in one pass by orjson — NumPy arrays and scalars natively,
+Pydantic models through their compiled serialiser — and sent as-is; with it
+off the payload is returned unchanged and FastAPI encodes it as before.
+
+Objects may also carry pre-encoded JSON: anything defining
+`__json_fragment__()` (returning bytes, or None to be encoded normally) is
+spliced into the output verbatim (as an `orjson.Fragment`). The recommender
+uses this for per-course fragments built at model load. Without orjson the
+stdlib encoder is used, with the same NumPy / Pydantic handling but no
+fragments.
+
+Differences from JSONResponse, on both paths: NaN / Infinity encode as null
+instead of raising, and non-string dict keys are converted to strings.
+"""
+import json
+import math
+from typing import Any, Optional
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:     # optional dependency: fall back to the stdlib encoder
+    orjson = None
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_SUBCLASS
+
+
+def _builtin(obj):
+    """Plain-Python equivalent of types orjson cannot (or, for subclasses, will not) encode."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode='json', by_alias=True)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    # OPT_PASSTHROUGH_SUBCLASS hands dict/list/str/int subclasses to `default`
+    for base in (dict, list, str, bool, int, float):
+        if isinstance(obj, base):
+            return base(obj)
+    if isinstance(obj, (tuple, set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _fragment_of(obj) -> Optional[bytes]:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump_json(by_alias=True).encode()
+    encode = getattr(obj, '__json_fragment__', None)
+    return encode() if encode is not None else None
+
+
+def _default(obj):
+    raw = _fragment_of(obj)
+    return orjson.Fragment(raw) if raw is not None else _builtin(obj)
+
+
+def _plain(obj):
+    """`obj` as plain JSON types for the stdlib encoder, non-finite floats as None (as orjson does)."""
+    if isinstance(obj, float):      # includes np.float64
+        return obj if math.isfinite(obj) else None
+    if obj is None or isinstance(obj, (str, int)):
+        return obj
+    if isinstance(obj, dict):
+        return {(k if k is None or isinstance(k, (str, int, float)) else str(_builtin(k))): _plain(v)
+                for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    return _plain(_builtin(obj))
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON for `content`."""
+    if orjson is None:
+        return json.dumps(_plain(content), ensure_ascii=False, allow_nan=False,
+                          separators=(',', ':')).encode('utf-8')
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_response(content: Any, status_code: int = 200):
+    """`content` as a FastJSONResponse when FAST_JSON_RESPONSES is on, else unchanged."""
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(content, status_code=status_code)
+    return content
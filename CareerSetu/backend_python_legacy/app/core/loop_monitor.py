@@ -0,0 +1,149 @@
+"""
+Event-loop Lag Monitor
+Opt-in diagnostics (LOOP_MONITOR_ENABLED). A ticker task sleeps for
+LOOP_MONITOR_INTERVAL_MS and records how late it wakes up as loop lag. A
+watchdog thread notices when the ticker has been starved for longer than
+LOOP_BLOCK_THRESHOLD_MS and samples the loop thread's stack while the
+offending callback still holds it, so each stall is attributed to the route
+and function that caused it — exported as careersetu_event_loop_stalls_total
+and logged with the sampled stack.
+"""
+import os
+import sys
+import asyncio
+import logging
+import threading
+import time
+import sysconfig
+import traceback
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import LOOP_LAG_SECONDS, LOOP_STALLS
+
+logger = logging.getLogger("careersetu.loop")
+
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Frames from the interpreter and installed packages are never the culprit we report
+_LIBRARY_DIRS = tuple({sysconfig.get_paths()[k] for k in ("stdlib", "platstdlib", "purelib", "platlib")})
+_STACK_DEPTH = 12      # frames kept in the logged stack
+
+
+def _route_of(frame) -> str:
+    """Route template (or raw path) of the ASGI scope found on the stack."""
+    while frame is not None:
+        if "scope" in frame.f_code.co_varnames:
+            scope = frame.f_locals.get("scope")
+            if isinstance(scope, dict) and scope.get("type") in ("http", "websocket"):
+                route = getattr(scope.get("route"), "path", None)
+                return route or scope.get("path", "unmatched")
+        frame = frame.f_back
+    return "none"
+
+
+def _function_of(stack: traceback.StackSummary) -> str:
+    """Innermost frame outside the stdlib and installed packages, as `module:function`."""
+    for entry in reversed(stack):
+        path = entry.filename
+        if path.startswith(_LIBRARY_DIRS) or path.startswith("<") or path == __file__:
+            continue
+        if path.startswith(_ROOT_DIR):
+            module = os.path.splitext(os.path.relpath(path, _ROOT_DIR))[0].replace(os.sep, ".")
+        else:
+            module = os.path.splitext(os.path.basename(path))[0]
+        return f"{module}:{entry.name}"
+    return stack[-1].name if stack else "unknown"
+
+
+class LoopMonitor:
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self._beat = time.perf_counter()
+        self._sample: Optional[Tuple[float, str, str, str]] = None   # (beat, route, function, stack)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop_thread_id: Optional[int] = None
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    # ── Loop side ─────────────────────────────────────────────────────────────
+    async def _tick(self):
+        interval = self.interval
+        while True:
+            beat = self._beat = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.perf_counter() - beat - interval)
+            LOOP_LAG_SECONDS.observe(lag)
+            if lag >= self.threshold:
+                self._report(beat, lag)
+
+    def _report(self, beat: float, lag: float):
+        with self._lock:
+            sample, self._sample = self._sample, None
+        if sample is not None and sample[0] == beat:
+            _, route, function, stack = sample
+        else:
+            # Stall ended before the watchdog's next poll
+            route, function, stack = "unknown", "unknown", ""
+        LOOP_STALLS.inc(route=route, function=function)
+        logger.warning("event loop blocked for %.1fms by %s (route %s)\n%s",
+                       lag * 1000, function, route, stack)
+
+    # ── Watchdog thread ───────────────────────────────────────────────────────
+    def _watch(self):
+        poll = min(self.interval, self.threshold) / 2
+        sampled = None
+        while not self._stopping.wait(poll):
+            beat = self._beat
+            if beat == sampled or time.perf_counter() - beat < self.interval + self.threshold:
+                continue
+            # One sample per stall, taken while the loop thread is still stuck
+            sampled = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            sample = (beat, _route_of(frame), _function_of(stack),
+                      "".join(traceback.format_list(stack[-_STACK_DEPTH:])))
+            del frame
+            with self._lock:
+                self._sample = sample
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+async def start():
+    """Start monitoring the running loop when LOOP_MONITOR_ENABLED is set."""
+    global _monitor
+    if not settings.LOOP_MONITOR_ENABLED or _monitor is not None:
+        return
+    _monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+                           settings.LOOP_BLOCK_THRESHOLD_MS / 1000)
+    _monitor.start()
+
+
+async def stop():
+    global _monitor
+    if _monitor is not None:
+        await _monitor.stop()
+        _monitor = None
@@ -0,0 +1,311 @@
+"""
+Request Metrics & Tracing
+Per-stage latency histograms, cache hit counters and model-version gauges,
+rendered in Prometheus text format on /metrics. Spans are cheap enough
+(two perf_counter calls and a bisect) to leave on in production.
+
+Sampled profiling covers a request's CPU-bound work, which runs on worker
+threads: routes hand it to `run_in_threadpool` here (a drop-in for
+Starlette's), and a sampled request's calls run under a cProfile local to the
+worker thread. The event-loop thread is never profiled — it interleaves every
+concurrent request, so its samples could not be attributed to one of them.
+"""
+import os
+import time
+import random
+import bisect
+import pstats
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool as _starlette_run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger("careersetu.metrics")
+
+_DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self):
+        lines = super().render()
+        for key, v in sorted(self._values.items()):
+            lines.append(f"{self.name}{_fmt_labels(self.label_names, key)} {v:g}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=_DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # key → [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = super().render()
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.label_names, key)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+REQUEST_SECONDS = Histogram("careersetu_request_duration_seconds",
+                            "End-to-end HTTP request latency.", ("method", "route", "status"))
+STAGE_SECONDS   = Histogram("careersetu_stage_duration_seconds",
+                            "Latency of individual hot-path stages inside a request.", ("stage",))
+CACHE_REQUESTS  = Counter("careersetu_cache_requests_total",
+                          "Cache lookups by cache name and result (hit/miss).", ("cache", "result"))
+CACHE_BYTES     = Gauge("careersetu_cache_bytes",
+                        "Estimated resident size of in-process caches.", ("cache",))
+CACHE_ENTRIES   = Gauge("careersetu_cache_entries",
+                        "Entries held by in-process caches.", ("cache",))
+CACHE_EVICTIONS = Counter("careersetu_cache_evictions_total",
+                          "Entries evicted from in-process caches to stay within their byte budget.", ("cache",))
+MODEL_INFO      = Gauge("careersetu_model_info",
+                        "Currently loaded model artifact version (value is always 1).", ("model", "version"))
+JOB_SECONDS     = Histogram("careersetu_training_job_duration_seconds",
+                            "Background training jobs from submission to the new model being served.",
+                            ("kind", "status"), buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600))
+SINGLEFLIGHT_SHARED = Counter("careersetu_singleflight_shared_total",
+                              "Callers served by another caller's in-flight computation.", ("flight",))
+LOOP_LAG_SECONDS = Histogram("careersetu_event_loop_lag_seconds",
+                             "How late the loop monitor's ticker woke up (LOOP_MONITOR_ENABLED).")
+LOOP_STALLS     = Counter("careersetu_event_loop_stalls_total",
+                          "Callbacks that held the event loop past LOOP_BLOCK_THRESHOLD_MS.", ("route", "function"))
+ADMISSION_IN_FLIGHT = Gauge("careersetu_admission_in_flight",
+                            "Requests computing under each admission gate.", ("route",))
+ADMISSION_QUEUED = Gauge("careersetu_admission_queued",
+                         "Requests waiting for an admission slot.", ("route",))
+ADMISSION_ESTIMATED_WAIT = Gauge("careersetu_admission_estimated_wait_seconds",
+                                 "Expected queue wait for a normal-priority arrival (EWMA service time).",
+                                 ("route",))
+ADMISSION_WAIT_SECONDS = Histogram("careersetu_admission_wait_seconds",
+                                   "Time admitted requests spent queued for a slot.", ("route",))
+ADMISSION_SHED  = Counter("careersetu_admission_shed_total",
+                          "Requests answered 503 by admission control.", ("route", "reason"))
+ADMISSION_CACHED = Counter("careersetu_admission_cached_total",
+                           "Requests served a recent or in-flight answer while the gate was saturated.",
+                           ("route", "source"))
+PROFILES_TAKEN  = Counter("careersetu_profiles_captured_total",
+                          "cProfile dumps written for slow sampled requests.", ("route",))
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ── Spans ─────────────────────────────────────────────────────────────────────
+# Stages recorded during the current request, kept for slow-request logging.
+_trace: ContextVar[Optional[list]] = ContextVar("careersetu_trace", default=None)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a hot-path stage, e.g. `with span("recommender.vectorize"): ...`."""
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((stage, elapsed))
+
+
+# Worker-thread profiles of the current request, when it was sampled for profiling.
+_profiles: ContextVar[Optional[list]] = ContextVar("careersetu_profiles", default=None)
+
+
+def _profiled(func: Callable, profiles: list) -> Callable:
+    def run(*args, **kwargs):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:      # Python ≥ 3.12 allows one active profiler per process
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            profiles.append(profiler)
+    return run
+
+
+async def run_in_threadpool(func: Callable, *args, **kwargs):
+    """Starlette's `run_in_threadpool`; profiled on the worker thread when the request is sampled."""
+    profiles = _profiles.get()
+    if profiles is not None:
+        func = _profiled(func, profiles)
+    return await _starlette_run_in_threadpool(func, *args, **kwargs)
+
+
+def record_cache(cache: str, hit: bool):
+    if settings.METRICS_ENABLED:
+        CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+_model_versions: Dict[str, str] = {}
+
+
+def set_model_version(model: str, version: str):
+    """Publish the artifact version a model was loaded from."""
+    with MODEL_INFO._lock:
+        previous = _model_versions.get(model)
+        if previous == version:
+            return
+        if previous is not None:
+            MODEL_INFO._values.pop(MODEL_INFO._key({"model": model, "version": previous}), None)
+        _model_versions[model] = version
+        MODEL_INFO._values[MODEL_INFO._key({"model": model, "version": version})] = 1.0
+
+
+# ── ASGI middleware ───────────────────────────────────────────────────────────
+_profiler_lock = threading.Lock()
+
+
+class MetricsMiddleware:
+    """
+    Records request latency per route template and, when sampling is enabled,
+    profiles the thread-pool work of a fraction of requests (see
+    `run_in_threadpool`), keeping the dump for any that exceed PROFILE_SLOW_MS.
+    Only one request is profiled at a time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        profiles = None
+        if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+            if _profiler_lock.acquire(blocking=False):
+                profiles = []
+        profiles_token = _profiles.set(profiles)
+
+        token = _trace.set([])
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            elapsed = time.perf_counter() - t0
+            trace = _trace.get()
+            _trace.reset(token)
+            _profiles.reset(profiles_token)
+            if profiles is not None:
+                _profiler_lock.release()
+
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route_path,
+                                    status=str(status["code"]))
+
+            if elapsed * 1000 >= settings.PROFILE_SLOW_MS:
+                stages = ", ".join(f"{name}={dt * 1000:.1f}ms" for name, dt in trace)
+                logger.warning("slow request %s %s took %.1fms [%s]",
+                               scope["method"], route_path, elapsed * 1000, stages)
+                if profiles:
+                    self._dump(profiles, route_path)
+
+    @staticmethod
+    def _dump(profiles: List[cProfile.Profile], route_path: str):
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        safe = route_path.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+        path = os.path.join(settings.PROFILE_DIR, f"{int(time.time() * 1000)}-{safe}.prof")
+        stats = pstats.Stats(profiles[0])
+        for profiler in profiles[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+        PROFILES_TAKEN.inc(route=route_path)
+        logger.warning("cProfile dump written to %s", path)
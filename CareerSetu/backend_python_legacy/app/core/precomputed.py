@@ -0,0 +1,137 @@
+"""
+Precomputed Responses
+For GET endpoints whose body depends only on a data version (a catalogue
+table, the ingested market observations). The JSON is serialised — and
+gzip-compressed once it is large enough to benefit — the first time a version
+is seen, then served as stored bytes until the version changes.
+
+Responses carry a weak ETag (shared by the identity and gzip encodings) and
+Last-Modified. A matching If-None-Match, or an If-Modified-Since no older
+than the data when no If-None-Match is sent, gets a bodiless 304, so polling
+clients cost a version check and nothing else.
+"""
+import gzip
+import json
+import time
+import hashlib
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Hashable, Optional
+
+from fastapi import Request, Response
+
+from app.core.metrics import record_cache
+
+# Bodies smaller than this are sent uncompressed (gzip framing would not pay off)
+_GZIP_MIN_BYTES = 1024
+_GZIP_LEVEL = 6
+# Clients may store the body but must revalidate it on every use
+_CACHE_CONTROL = 'no-cache'
+
+
+class Representation:
+    __slots__ = ('version', 'body', 'gzipped', 'etag', 'last_modified', 'modified_ts')
+
+    def __init__(self, version: Hashable, body: bytes, modified_ts: float):
+        self.version = version
+        self.body = body
+        self.gzipped = gzip.compress(body, _GZIP_LEVEL, mtime=0) if len(body) >= _GZIP_MIN_BYTES else None
+        self.etag = 'W/"%s"' % hashlib.sha1(body).hexdigest()[:20]
+        # HTTP dates have whole-second resolution
+        self.modified_ts = float(int(modified_ts))
+        self.last_modified = formatdate(self.modified_ts, usegmt=True)
+
+
+class PrecomputedJSON:
+    """
+    `build()` → JSON-able payload, `version()` → hashable data version, and
+    optionally `modified()` → epoch seconds the data last changed (None falls
+    back to the time this process first built the version).
+    """
+
+    def __init__(self, name: str, build: Callable[[], object], version: Callable[[], Hashable],
+                 modified: Optional[Callable[[], Optional[float]]] = None):
+        self.name = name
+        self._build = build
+        self._version = version
+        self._modified = modified
+        self._current: Optional[Representation] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> Representation:
+        """The representation for the data version now in effect (rebuilt when it changed)."""
+        version = self._version()
+        rep = self._current
+        if rep is not None and rep.version == version:
+            record_cache(f'payload_{self.name}', True)
+            return rep
+        with self._lock:
+            rep = self._current
+            if rep is not None and rep.version == version:
+                record_cache(f'payload_{self.name}', True)
+                return rep
+            record_cache(f'payload_{self.name}', False)
+            # Same encoding as FastAPI's JSONResponse
+            body = json.dumps(self._build(), ensure_ascii=False, allow_nan=False,
+                              separators=(',', ':')).encode('utf-8')
+            modified = self._modified() if self._modified is not None else None
+            rep = self._current = Representation(version, body, modified or time.time())
+            return rep
+
+    def invalidate(self):
+        with self._lock:
+            self._current = None
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == '*':
+        return True
+    # Weak comparison: W/"x" and "x" are the same validator
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, modified_ts: float) -> bool:
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return False
+    return modified_ts <= since
+
+
+def _accepts_gzip(header: str) -> bool:
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() in ('gzip', '*'):
+            q = params.strip()
+            return not (q.startswith('q=') and q[2:].strip() in ('0', '0.0', '0.00', '0.000'))
+    return False
+
+
+def respond(request: Request, rep: Representation) -> Response:
+    """200 with the stored bytes (gzip when accepted), or 304 when the client's copy is current."""
+    headers = {
+        'ETag':          rep.etag,
+        'Last-Modified': rep.last_modified,
+        'Cache-Control': _CACHE_CONTROL,
+        'Vary':          'Accept-Encoding',
+    }
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, rep.etag)
+    else:
+        if_modified_since = request.headers.get('if-modified-since')
+        fresh = if_modified_since is not None and _not_modified_since(if_modified_since, rep.modified_ts)
+    if fresh:
+        return Response(status_code=304, headers=headers)
+
+    if rep.gzipped is not None and _accepts_gzip(request.headers.get('accept-encoding', '')):
+        headers['Content-Encoding'] = 'gzip'
+        return Response(rep.gzipped, media_type='application/json', headers=headers)
+    return Response(rep.body, media_type='application/json', headers=headers)
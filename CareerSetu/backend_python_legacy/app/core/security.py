@@ -1,7 +1,12 @@
+import sys
+import time
+import hashlib
+import threading
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Union
+from typing import Dict, Optional, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from app.core.cache import ByteLRU
 from app.core.config import settings
 
 # Password hashing
@@ -14,7 +19,8 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 # JWT
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, profile: Optional[dict] = None):
+    """Signed JWT for `data`; `profile` (see snapshots.profile_claims) is embedded as the `prf` claim."""
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -22,5 +28,49 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
+    if profile is not None:
+        to_encode["prf"] = profile
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
+
+
+# ── Verified-token cache ──────────────────────────────────────────────────────
+# Tokens this process has already verified skip the signature check until their
+# own exp. Entries are keyed by SHA-256 digest so raw tokens are never retained.
+def _claims_size(claims: dict) -> int:
+    return sys.getsizeof(claims) + sum(len(str(k)) + len(str(v)) for k, v in claims.items())
+
+
+_verified_tokens = ByteLRU("verified_tokens", int(settings.AUTH_TOKEN_CACHE_MB * 1024 * 1024), _claims_size)
+
+# Revoked digest → exp; entries are dropped once the token would have expired anyway
+_revoked: Dict[bytes, float] = {}
+_revoked_lock = threading.Lock()
+
+
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def decode_access_token(token: str) -> dict:
+    """Verified claims of `token`. Raises JWTError if it is malformed, expired or revoked."""
+    key = _digest(token)
+    if _revoked and key in _revoked:
+        raise JWTError("Token has been revoked")
+    claims = _verified_tokens.get(key)
+    if claims is not None and claims["exp"] > time.time():
+        return dict(claims)
+    claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    if isinstance(claims.get("exp"), (int, float)):
+        _verified_tokens.put(key, claims)
+    return dict(claims)
+
+
+def revoke_token(token: str, expires_at: float):
+    """Reject `token` in this process from now until `expires_at` (epoch seconds)."""
+    now = time.time()
+    with _revoked_lock:
+        for key in [k for k, exp in _revoked.items() if exp <= now]:
+            del _revoked[key]
+        if expires_at > now:
+            _revoked[_digest(token)] = expires_at
@@ -0,0 +1,165 @@
+"""
+Single-flight Coalescing
+Concurrent callers asking for the same key share one in-flight computation
+instead of each repeating it: `SingleFlight` for model loads and retrains in
+worker threads, `AsyncSingleFlight` for identical requests on the event loop.
+Artifacts are written with `atomic_write` while holding a cross-process
+`file_lock`, so a herd of processes trains once and readers never see a
+half-written file.
+"""
+import os
+import json
+import asyncio
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Hashable
+
+try:
+    import fcntl
+except ImportError:        # Windows: no flock, fall back to the in-process lock only
+    fcntl = None
+
+from app.core.metrics import SINGLEFLIGHT_SHARED
+
+
+def _read_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# What open() would give a new file; mkstemp always creates 0600
+_FILE_MODE = 0o666 & ~_read_umask()
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread-level coalescing: one caller per key runs `fn`, the rest wait for its result."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], object]):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            SINGLEFLIGHT_SHARED.inc(flight=self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Event-loop coalescing: identical concurrent requests await one shared task."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+
+    def running(self, key: Hashable) -> bool:
+        return key in self._tasks
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable]):
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda _t, key=key: self._tasks.pop(key, None))
+        else:
+            SINGLEFLIGHT_SHARED.inc(flight=self.name)
+        # A disconnecting client must not cancel the work the others are waiting on
+        return await asyncio.shield(task)
+
+
+def request_key(*parts) -> str:
+    """Canonical digest of JSON-able request parts (dict key order does not matter)."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+# ── Artifact files ────────────────────────────────────────────────────────────
+_local_locks: Dict[str, threading.Lock] = {}
+_local_locks_guard = threading.Lock()
+_held = threading.local()     # lock paths the current thread already holds
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False):
+    """
+    Advisory lock on `<path>.lock`, held across processes (flock) and threads.
+    Writers take it exclusive; readers of multi-file artifacts take it shared
+    so they never load a mix of old and new files. Re-entrant per thread.
+    """
+    lock_path = os.path.abspath(path) + '.lock'
+    held = _held.__dict__.setdefault('paths', set())
+    if lock_path in held:
+        yield
+        return
+    with _local_locks_guard:
+        local = _local_locks.setdefault(lock_path, threading.Lock())
+    # flock locks belong to the open file, so threads of one process serialise here first
+    with local:
+        held.add(lock_path)
+        try:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+            with open(lock_path, 'a') as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        finally:
+            held.discard(lock_path)
+
+
+def default_file_mode(fd: int):
+    """Give a mkstemp file the permissions open() would have (0o666 less the umask)."""
+    if hasattr(os, 'fchmod'):
+        os.fchmod(fd, _FILE_MODE)
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'wb'):
+    """Write to a temp file beside `path`, then rename it over `path` in one step."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        default_file_mode(fd)
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
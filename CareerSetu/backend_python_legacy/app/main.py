@@ -1,8 +1,30 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import learner_routes, auth, recommend, skill_gap, nsqf_progression, job_market
+from fastapi.responses import PlainTextResponse
+from app.core import metrics, loop_monitor, admission
+from app.routers import learner_routes, auth, recommend, skill_gap, nsqf_progression, job_market, admin, jobs as jobs_router
+from starlette.concurrency import run_in_threadpool
+from app.services import catalogue, market_stats, jobs
 
-app = FastAPI(title="Career Setu AI Engine", version="2.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Mongo-backed catalogues load their snapshot and start refreshing here
+    await catalogue.start()
+    # Ingested market observations: load the snapshot, replay newer parquet parts
+    await run_in_threadpool(market_stats.recover)
+    await loop_monitor.start()
+    try:
+        yield
+    finally:
+        await loop_monitor.stop()
+        jobs.shutdown()
+        await run_in_threadpool(market_stats.snapshot)
+        await catalogue.stop()
+
+
+app = FastAPI(title="Career Setu AI Engine", version="2.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -11,6 +33,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_exception_handler(admission.Overloaded, admission.overloaded_handler)
 
 app.include_router(learner_routes.router, prefix="/api/v1/learner", tags=["learner"])
 app.include_router(auth.router,           prefix="/api/v1/auth",    tags=["auth"])
@@ -18,7 +42,14 @@ app.include_router(recommend.router,      prefix="/api/v1",         tags=["recom
 app.include_router(skill_gap.router,      prefix="/api/v1/skill-gap", tags=["skill-gap"])
 app.include_router(nsqf_progression.router, prefix="/api/v1/nsqf",  tags=["nsqf"])
 app.include_router(job_market.router,     prefix="/api/v1/market",  tags=["market"])
+app.include_router(admin.router,          prefix="/api/v1/admin",   tags=["admin"])
+app.include_router(jobs_router.router,    prefix="/api/v1/jobs",    tags=["jobs"])
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Career Setu AI Engine", "version": "2.0"}
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: stage latencies, cache hit rates, model versions."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
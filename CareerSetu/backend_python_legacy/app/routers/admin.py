@@ -0,0 +1,90 @@
+"""
+Admin — bulk exports for downstream consumers.
+Streams recommendations for the whole learner base as NDJSON.
+"""
+import json
+import asyncio
+from typing import AsyncIterator
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.core.metrics import run_in_threadpool
+from app.core.database import users_collection
+from app.routers.auth import get_current_admin
+from app.services.recommender import query_from_profile, recommend_batch, model_version
+
+router = APIRouter()
+
+# Only the fields query_from_profile reads
+_PROFILE_FIELDS = {
+    "username": 1, "technical_skills": 1, "career_aspirations": 1,
+    "nsqf_level": 1, "preferred_duration_months": 1,
+}
+
+
+def _score_batch(docs: list, top_n: int) -> list:
+    """Score one batch of user documents; returns NDJSON lines in cursor order."""
+    lines, queries, slots = [], [], []
+    for doc in docs:
+        try:
+            queries.append(query_from_profile(doc))
+            slots.append(len(lines))
+            lines.append(None)
+        except (TypeError, ValueError) as e:
+            lines.append(json.dumps({"username": doc.get("username"), "error": f"invalid profile: {e}"}))
+
+    scored = [d for d, line in zip(docs, lines) if line is None]
+    for slot, doc, recs in zip(slots, scored, recommend_batch(queries, top_n=top_n)):
+        lines[slot] = json.dumps({"username": doc.get("username"), "recommendations": recs}, default=str)
+    return lines
+
+
+async def _export_stream(batch_size: int, top_n: int, flush_bytes: int) -> AsyncIterator[bytes]:
+    """
+    Pull users from Mongo in batches and yield NDJSON chunks.
+    The next batch is fetched while the current one is scored in a worker
+    thread, so at most two batches are held in memory. Each yield waits for
+    the ASGI server to accept the chunk, which throttles the cursor to the
+    client's read speed.
+    """
+    cursor = users_collection.find({}, _PROFILE_FIELDS).batch_size(batch_size)
+    pending = asyncio.ensure_future(cursor.to_list(length=batch_size))
+    try:
+        while True:
+            docs = await pending
+            if not docs:
+                break
+            pending = asyncio.ensure_future(cursor.to_list(length=batch_size))
+
+            lines = await run_in_threadpool(_score_batch, docs, top_n)
+            buffer, size = [], 0
+            for line in lines:
+                encoded = line.encode() + b"\n"
+                buffer.append(encoded)
+                size += len(encoded)
+                if size >= flush_bytes:
+                    yield b"".join(buffer)
+                    buffer, size = [], 0
+            if buffer:
+                yield b"".join(buffer)
+    finally:
+        if not pending.done():
+            pending.cancel()
+        await cursor.close()
+
+
+@router.get("/recommendations/export")
+async def export_recommendations(
+    batch_size: int = Query(default=256, ge=1, le=5000),
+    top_n: int = Query(default=5, ge=1, le=10),
+    flush_kb: int = Query(default=64, ge=1, le=4096, description="Flush to the client every N KiB"),
+    admin: dict = Depends(get_current_admin),
+):
+    """
+    Stream top_n recommendations for every learner as newline-delimited JSON:
+    one `{"username": ..., "recommendations": [...]}` object per line.
+    """
+    return StreamingResponse(
+        _export_stream(batch_size, top_n, flush_kb * 1024),
+        media_type="application/x-ndjson",
+        headers={"X-Model-Version": model_version()},
+    )
@@ -2,36 +2,62 @@ from datetime import timedelta
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from jose import JWTError
 from app.schemas.user import UserCreate, UserLogin, Token, TokenData, UserInDB
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.security import get_password_hash, verify_password, create_access_token, decode_access_token, revoke_token
 from app.core.config import settings
 from app.core.database import users_collection
+from app.core.metrics import span, run_in_threadpool
+from app.services.snapshots import profile_claims
 from bson import ObjectId
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+async def get_token_claims(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
+    """Verified JWT claims without a database lookup (signature check cached per token)."""
     try:
-        from jose import jwt, JWTError
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
+        with span('auth.jwt_decode'):
+            claims = decode_access_token(token)
     except JWTError:
-        raise credentials_exception
-        
-    user = await users_collection.find_one({"username": token_data.username})
+        raise _credentials_exception()
+    if claims.get("sub") is None:
+        raise _credentials_exception()
+    return claims
+
+async def load_user(username: str) -> dict:
+    with span('auth.mongo_lookup'):
+        user = await users_collection.find_one({"username": username})
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
+async def get_current_user(claims: Annotated[dict, Depends(get_token_claims)]):
+    token_data = TokenData(username=claims["sub"])
+    return await load_user(token_data.username)
+
+def _issue_token(user: dict) -> str:
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    profile = profile_claims(user) if settings.AUTH_PROFILE_CLAIMS else None
+    return create_access_token(
+        data={"sub": user["username"]}, expires_delta=access_token_expires, profile=profile
+    )
+
+async def get_current_admin(current_user: Annotated[dict, Depends(get_current_user)]):
+    if current_user.get("role") != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized as an admin",
+        )
+    return current_user
+
 @router.post("/signup", response_model=Token)
 async def signup(user: UserCreate):
     # Check if user exists
@@ -39,34 +65,39 @@ async def signup(user: UserCreate):
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    hashed_password = get_password_hash(user.password)
+    with span('auth.password_hash'):
+        hashed_password = await run_in_threadpool(get_password_hash, user.password)
     user_dict = user.dict()
     user_dict["hashed_password"] = hashed_password
     del user_dict["password"]
     
     await users_collection.insert_one(user_dict)
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
+    access_token = _issue_token(user_dict)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
-    user = await users_collection.find_one({"username": form_data.username})
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    with span('auth.mongo_lookup'):
+        user = await users_collection.find_one({"username": form_data.username})
+    with span('auth.password_verify'):
+        verified = bool(user) and await run_in_threadpool(verify_password, form_data.password, user["hashed_password"])
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user["username"]}, expires_delta=access_token_expires
-    )
+    access_token = _issue_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
+@router.post("/logout")
+async def logout(token: Annotated[str, Depends(oauth2_scheme)],
+                 claims: Annotated[dict, Depends(get_token_claims)]):
+    """Revoke the presented token in this process until it expires."""
+    revoke_token(token, claims["exp"])
+    return {"message": "Token revoked"}
+
 @router.get("/me")
 async def read_users_me(current_user: Annotated[dict, Depends(get_current_user)]):
     # Convert ObjectId to string for JSON serialization if needed, or simply return safe fields
@@ -2,98 +2,106 @@
 Job Market Integration
 Aligns recommendations with real-time demand using Linear Regression.
 """
-import os
 import pandas as pd
-import numpy as np
-from sklearn.linear_model import LinearRegression
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from app.core.metrics import span, run_in_threadpool
+from app.core.fastjson import fast_response
+from app.core.precomputed import PrecomputedJSON, respond
+from app.routers.auth import get_current_admin
+from app.services import market_stats
 
 router = APIRouter()
 
-# ── Paths ─────────────────────────────────────────────────────────────────────
-_DIR         = os.path.dirname(os.path.abspath(__file__))
-_DATA_DIR    = os.path.join(_DIR, '..', '..', '..', 'backend', 'data')
-_MARKET_CSV  = os.path.join(_DATA_DIR, 'job_market.csv')
-
-def _load_market_data():
-    if not os.path.exists(_MARKET_CSV):
-        raise FileNotFoundError(f"Missing {_MARKET_CSV}")
-    return pd.read_csv(_MARKET_CSV)
-
 class MarketRequest(BaseModel):
     skill: str
     target_year: int
 
+def _forecast(req: MarketRequest):
+    """Forecast `req.target_year` from the skill's running regression statistics."""
+    with span('job_market.data_load'):
+        stats = market_stats.skill_stats(req.skill)
+
+    if stats is None:
+        return {
+            "skill": req.skill,
+            "target_year": req.target_year,
+            "status": "No historical data available",
+            "demand_score": 0,
+            "salary_estimate": 0,
+            "sector_growth_pct": "0%"
+        }
+
+    with span('job_market.regression'):
+        # Closed-form least squares on the accumulated sums (same lines LinearRegression fits)
+        demand, salary = stats.predict(req.target_year)
+        pred_demand = int(demand)
+        pred_salary = int(salary)
+
+    # Sector growth %
+    # Compute growth vs previous year prediction or last known year
+    last_known_demand = stats.last_demand
+
+    if last_known_demand > 0:
+        growth_pct = ((pred_demand - last_known_demand) / last_known_demand) * 100
+    else:
+        growth_pct = 0.0
+
+    return {
+        "skill": req.skill,
+        "target_year": req.target_year,
+        "demand_score": pred_demand,
+        "salary_estimate": pred_salary,
+        "sector_growth_pct": f"{growth_pct:.1f}%",
+        "model_type": "Linear Regression"
+    }
+
 @router.post("/predict")
 async def predict_demand(req: MarketRequest):
     """
     Predict Demand Score, Salary Estimate, and Sector Growth % based on past trends.
-    Uses Linear Regression trained on job_market.csv.
+    Uses Linear Regression over job_market.csv plus ingested observations.
     """
     try:
-        df = _load_market_data()
-        
-        # Filter data for specific skill
-        skill_df = df[df['skill'].str.lower() == req.skill.lower().strip()]
-        
-        if skill_df.empty:
-            return {
-                "skill": req.skill,
-                "target_year": req.target_year,
-                "status": "No historical data available",
-                "demand_score": 0,
-                "salary_estimate": 0,
-                "sector_growth_pct": "0%"
-            }
-            
-        # Ensure data is sorted by year
-        skill_df = skill_df.sort_values(by="year")
-        
-        X = skill_df[['year']].values
-        y_demand = skill_df['demand_count'].values
-        y_salary = skill_df['avg_salary'].values
-        
-        # Train Demand Linear Regression
-        model_demand = LinearRegression()
-        model_demand.fit(X, y_demand)
-        
-        # Train Salary Linear Regression
-        model_salary = LinearRegression()
-        model_salary.fit(X, y_salary)
-        
-        # Predictions
-        future_X = [[req.target_year]]
-        pred_demand = int(model_demand.predict(future_X)[0])
-        pred_salary = int(model_salary.predict(future_X)[0])
-        
-        # Sector growth %
-        # Compute growth vs previous year prediction or last known year
-        last_known_year = int(skill_df.iloc[-1]['year'])
-        last_known_demand = float(skill_df.iloc[-1]['demand_count'])
-        
-        if last_known_demand > 0:
-            growth_pct = ((pred_demand - last_known_demand) / last_known_demand) * 100
-        else:
-            growth_pct = 0.0
-            
-        return {
-            "skill": req.skill,
-            "target_year": req.target_year,
-            "demand_score": pred_demand,
-            "salary_estimate": pred_salary,
-            "sector_growth_pct": f"{growth_pct:.1f}%",
-            "model_type": "Linear Regression"
-        }
+        return fast_response(await run_in_threadpool(_forecast, req))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _tracked_skills():
+    """Unique skills in the job market table and ingested observations."""
+    return {"tracked_skills": market_stats.tracked_skills()}
+
+# Serialised once per market data version; polls revalidate with ETag / Last-Modified
+_skills_payload = PrecomputedJSON('market_skills', _tracked_skills, market_stats.version, market_stats.modified)
+
 @router.get("/skills")
-async def list_market_skills():
+async def list_market_skills(request: Request):
     """Returns unique skills tracked in the job market dataset."""
     try:
-        df = _load_market_data()
-        return {"tracked_skills": df['skill'].unique().tolist()}
+        return respond(request, await run_in_threadpool(_skills_payload.current))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class Observation(BaseModel):
+    year: int = Field(ge=1900, le=2200)
+    skill: str = Field(min_length=1)
+    demand_count: float = Field(ge=0)
+    avg_salary: float = Field(ge=0)
+
+class ObservationBatch(BaseModel):
+    observations: List[Observation] = Field(min_length=1, max_length=50_000)
+
+@router.post("/observations")
+async def ingest_observations(batch: ObservationBatch, admin: dict = Depends(get_current_admin)):
+    """
+    Append job-market observations in bulk (admin only). Each row updates the
+    skill's regression sums in constant time and is persisted to an
+    append-only Parquet part; forecasts reflect it immediately.
+    """
+    try:
+        df = pd.DataFrame([o.model_dump() for o in batch.observations])
+        return await run_in_threadpool(market_stats.ingest, df)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,20 @@
+"""FastAPI router for background training job status."""
+from fastapi import APIRouter, HTTPException
+from app.services import jobs
+
+router = APIRouter()
+
+
+@router.get("")
+async def list_jobs():
+    """Recent training jobs, newest first."""
+    return {"jobs": [job.to_dict() for job in jobs.recent()]}
+
+
+@router.get("/{job_id}")
+async def job_status(job_id: str):
+    """Status, progress (0–1 with the current stage), duration and result of one job."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
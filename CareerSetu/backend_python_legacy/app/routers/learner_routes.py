@@ -1,15 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from app.core.metrics import run_in_threadpool
 from app.schemas.learner import LearnerProfileRequest, LearnerPathwayResponse
 from app.services.profiling import profiling_service
 from app.routers.auth import get_current_user
+from app.core import admission
+from app.core.fastjson import fast_response
+from app.core.singleflight import request_key
 
 router = APIRouter()
 
 @router.post("/profile", response_model=LearnerPathwayResponse)
-async def generate_learner_pathway(profile: LearnerProfileRequest, current_user: dict = Depends(get_current_user)):
+async def generate_learner_pathway(profile: LearnerProfileRequest, request: Request,
+                                   current_user: dict = Depends(get_current_user)):
     try:
-        # Here we invoke the service logic
-        response = profiling_service.analyze_learner(profile)
-        return response
+        # Here we invoke the service logic (admission-controlled, see app.core.admission)
+        response = await admission.run(request, 'profile', request_key(profile.model_dump()),
+                                       lambda: run_in_threadpool(profiling_service.analyze_learner, profile))
+        return fast_response(response)
+    except admission.Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
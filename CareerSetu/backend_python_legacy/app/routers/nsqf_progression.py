@@ -2,29 +2,20 @@
 NSQF Progression Engine
 Maps learner to correct NSQF level and suggests vertical progression.
 """
-import os
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from app.core.metrics import span, run_in_threadpool
+from app.core.fastjson import fast_response
+from app.services import catalogue
 
 router = APIRouter()
 
-# ── Paths ─────────────────────────────────────────────────────────────────────
-_DIR         = os.path.dirname(os.path.abspath(__file__))
-_DATA_DIR    = os.path.join(_DIR, '..', '..', '..', 'backend', 'data')
-_NSQF_CSV    = os.path.join(_DATA_DIR, 'nsqf_levels.csv')
-_JOB_CSV     = os.path.join(_DATA_DIR, 'job_roles.csv')
-
 def _load_data():
-    if not os.path.exists(_NSQF_CSV):
-        raise FileNotFoundError(f"Missing {_NSQF_CSV}")
-    if not os.path.exists(_JOB_CSV):
-        raise FileNotFoundError(f"Missing {_JOB_CSV}")
-    
-    nsqf_df = pd.read_csv(_NSQF_CSV)
-    job_df  = pd.read_csv(_JOB_CSV)
-    return nsqf_df, job_df
+    return catalogue.nsqf_levels().frame(), catalogue.job_roles().frame()
 
 def _calculate_skill_score(learner_skills: List[str], required_text: str) -> float:
     req_list = [s.strip().lower() for s in required_text.split() if s.strip()]
@@ -43,6 +34,62 @@ class ProgressRequest(BaseModel):
     current_level: int
     learner_skills: List[str]
 
+def _evaluate_progression(req: ProgressRequest):
+    """Rule-based progression check (pandas filtering; runs in a worker thread)."""
+    with span('nsqf.data_load'):
+        nsqf_df, job_df = _load_data()
+
+    # Current Level validation
+    current_row = nsqf_df[nsqf_df['nsqf_level'] == req.current_level]
+    if current_row.empty:
+        raise ValueError(f"NSQF Level {req.current_level} not found.")
+
+    next_level = current_row.iloc[0]['next_level']
+
+    # Check next level requirements
+    next_row = nsqf_df[nsqf_df['nsqf_level'] == next_level]
+    if next_row.empty:
+        return {
+            "current_level": req.current_level,
+            "status": "Max Level Reached",
+            "message": "You have reached the highest defined NSQF level."
+        }
+
+    required_skills_next = next_row.iloc[0]['required_skills']
+
+    # Calculate skill score
+    with span('nsqf.skill_score'):
+        skill_score = _calculate_skill_score(req.learner_skills, required_skills_next)
+
+    if skill_score >= 80.0:
+        recommendation = f"You exhibit {skill_score:.0f}% mastery of the next level skills. We recommend officially advancing to NSQF Level {int(next_level)}."
+        action = "Promote to Next Level"
+        target_level = int(next_level)
+    else:
+        missing_pct = 100.0 - skill_score
+        recommendation = f"You need {missing_pct:.0f}% more skill alignment to reach Level {int(next_level)}. Enroll in an upskilling course focusing on: {required_skills_next}."
+        action = "Recommend Upskilling Course"
+        target_level = req.current_level
+
+    # Lateral mobility (roles at current level)
+    lateral_df = job_df[job_df['nsqf_level'] == req.current_level]
+    lateral_options = lateral_df['job_role'].tolist()[:5]
+
+    return {
+        "current_nsqf_level": req.current_level,
+        "next_nsqf_level": int(next_level) if pd.notna(next_level) else None,
+        "next_level_skills": required_skills_next,
+        "skill_score_pct": round(skill_score, 1),
+        "progression_algorithm_result": action,
+        "recommendation": recommendation,
+        "lateral_mobility_options": lateral_options,
+        "certification_stacking_pathway": [
+            f"Level {req.current_level} Foundation",
+            f"Level {int(next_level)} Specialized Training",
+            f"Level {int(next_level)+1 if pd.notna(next_level) else 'Advanced'} Expert Certification"
+        ]
+    }
+
 @router.post("/progress")
 async def check_progression(req: ProgressRequest):
     """
@@ -50,56 +97,107 @@ async def check_progression(req: ProgressRequest):
     Uses Rule-Based + Skill Scoring Model.
     """
     try:
+        return fast_response(await run_in_threadpool(_evaluate_progression, req))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ── Cohort evaluation ─────────────────────────────────────────────────────────
+class ProgressBatchRequest(BaseModel):
+    learners: List[ProgressRequest] = Field(min_length=1, max_length=20_000)
+
+def _batch_skill_scores(skill_lists: List[List[str]], required_text: str) -> np.ndarray:
+    """
+    _calculate_skill_score for many learners against one requirement text.
+    Each distinct learner skill is matched against the requirement tokens once;
+    a sparse learner × skill incidence matrix then spreads the matches to
+    every learner in a single product.
+    """
+    req_list = [s.strip().lower() for s in required_text.split() if s.strip()]
+    if not req_list:
+        return np.full(len(skill_lists), 100.0)
+    req_unique = list(dict.fromkeys(req_list))
+
+    vocab: Dict[str, int] = {}
+    indices, indptr = [], [0]
+    for skills in skill_lists:
+        for skill in skills:
+            indices.append(vocab.setdefault(skill.lower(), len(vocab)))
+        indptr.append(len(indices))
+    incidence = sparse.csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr),
+                                  shape=(len(skill_lists), max(len(vocab), 1)))
+
+    # term × requirement: same substring test in both directions as the single-learner path
+    matches = np.zeros((max(len(vocab), 1), len(req_unique)), dtype=np.int32)
+    for term, i in vocab.items():
+        matches[i] = [req in term or term in req for req in req_unique]
+
+    matched = np.asarray((incidence @ matches) > 0).sum(axis=1)
+    return matched / len(req_list) * 100.0
+
+def _evaluate_batch(req: ProgressBatchRequest):
+    """Score a cohort grouped by current level; per-learner results plus per-level promotion stats."""
+    with span('nsqf.data_load'):
         nsqf_df, job_df = _load_data()
-        
-        # Current Level validation
-        current_row = nsqf_df[nsqf_df['nsqf_level'] == req.current_level]
-        if current_row.empty:
-            raise ValueError(f"NSQF Level {req.current_level} not found.")
-        
-        next_level = current_row.iloc[0]['next_level']
-        
-        # Check next level requirements
-        next_row = nsqf_df[nsqf_df['nsqf_level'] == next_level]
-        if next_row.empty:
-            return {
-                "current_level": req.current_level,
-                "status": "Max Level Reached",
-                "message": "You have reached the highest defined NSQF level."
-            }
-            
-        required_skills_next = next_row.iloc[0]['required_skills']
-        
-        # Calculate skill score
-        skill_score = _calculate_skill_score(req.learner_skills, required_skills_next)
-        
-        if skill_score >= 80.0:
-            recommendation = f"You exhibit {skill_score:.0f}% mastery of the next level skills. We recommend officially advancing to NSQF Level {int(next_level)}."
-            action = "Promote to Next Level"
-            target_level = int(next_level)
-        else:
-            missing_pct = 100.0 - skill_score
-            recommendation = f"You need {missing_pct:.0f}% more skill alignment to reach Level {int(next_level)}. Enroll in an upskilling course focusing on: {required_skills_next}."
-            action = "Recommend Upskilling Course"
-            target_level = req.current_level
-            
-        # Lateral mobility (roles at current level)
-        lateral_df = job_df[job_df['nsqf_level'] == req.current_level]
-        lateral_options = lateral_df['job_role'].tolist()[:5]
-        
-        return {
-            "current_nsqf_level": req.current_level,
-            "next_nsqf_level": int(next_level) if pd.notna(next_level) else None,
-            "next_level_skills": required_skills_next,
-            "skill_score_pct": round(skill_score, 1),
-            "progression_algorithm_result": action,
-            "recommendation": recommendation,
-            "lateral_mobility_options": lateral_options,
-            "certification_stacking_pathway": [
-                f"Level {req.current_level} Foundation",
-                f"Level {int(next_level)} Specialized Training",
-                f"Level {int(next_level)+1 if pd.notna(next_level) else 'Advanced'} Expert Certification"
-            ]
-        }
+    # First row wins, like the single-learner lookup
+    levels = {}
+    for row in nsqf_df.itertuples():
+        levels.setdefault(int(row.nsqf_level), row)
+
+    groups: Dict[int, List[int]] = {}
+    for i, learner in enumerate(req.learners):
+        groups.setdefault(learner.current_level, []).append(i)
+
+    results: List[Optional[dict]] = [None] * len(req.learners)
+    level_stats = []
+    with span('nsqf.batch_score'):
+        for level, members in sorted(groups.items()):
+            current = levels.get(level)
+            if current is None:
+                for i in members:
+                    results[i] = {"current_nsqf_level": level, "error": f"NSQF Level {level} not found."}
+                continue
+            next_level = current.next_level
+            nxt = levels.get(int(next_level)) if pd.notna(next_level) else None
+            if nxt is None:
+                for i in members:
+                    results[i] = {"current_nsqf_level": level, "status": "Max Level Reached"}
+                level_stats.append({"current_nsqf_level": level, "next_nsqf_level": None,
+                                    "learners": len(members), "status": "Max Level Reached"})
+                continue
+
+            scores = _batch_skill_scores([req.learners[i].learner_skills for i in members],
+                                         nxt.required_skills)
+            promote = scores >= 80.0
+            for i, score, up in zip(members, scores.tolist(), promote.tolist()):
+                results[i] = {
+                    "current_nsqf_level": level,
+                    "next_nsqf_level": int(next_level),
+                    "skill_score_pct": round(score, 1),
+                    "progression_algorithm_result": "Promote to Next Level" if up else "Recommend Upskilling Course",
+                }
+            level_stats.append({
+                "current_nsqf_level": level,
+                "next_nsqf_level": int(next_level),
+                "next_level_skills": nxt.required_skills,
+                "learners": len(members),
+                "promoted": int(promote.sum()),
+                "promotion_rate_pct": round(float(promote.mean()) * 100, 1),
+                "mean_skill_score_pct": round(float(scores.mean()), 1),
+                "lateral_mobility_options": job_df.loc[job_df['nsqf_level'] == level, 'job_role'].tolist()[:5],
+            })
+
+    return {"results": results, "levels": level_stats, "total": len(results)}
+
+@router.post("/progress/batch")
+async def check_progression_batch(req: ProgressBatchRequest):
+    """
+    Evaluate a whole cohort (e.g. end-of-term promotions) in one call.
+    Learners are grouped by current level and each group is scored against
+    the next level's requirements in one vectorised pass. Results keep the
+    input order; `levels` summarises promotions per current level.
+    """
+    try:
+        return fast_response(await run_in_threadpool(_evaluate_batch, req))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
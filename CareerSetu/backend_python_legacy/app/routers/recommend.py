@@ -1,12 +1,23 @@
 """FastAPI router for AI course recommendations."""
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
-from app.services.recommender import get_recommendations, train_and_save
-from app.routers.auth import get_current_user
+from app.services.recommender import get_recommendations, query_from_profile, model_version
+from app.services import jobs
+from app.services.snapshots import (profile_hash, cached_recommendations, save_snapshot,
+                                    profile_version, memoised, remember)
+from app.routers.auth import get_token_claims, load_user
+from app.core.config import settings
+from app.core import admission
+from app.core.metrics import record_cache, run_in_threadpool
+from app.core.fastjson import fast_response
+from app.core.singleflight import AsyncSingleFlight, request_key
 
 router = APIRouter()
 
+# Identical concurrent /predict bodies share one computation
+_predict_flight = AsyncSingleFlight('recommend.predict')
+
 
 class PredictRequest(BaseModel):
     skills: str = ""
@@ -15,6 +26,9 @@ class PredictRequest(BaseModel):
     preferred_duration_months: int = Field(default=0, ge=0, description="Max preferred course duration in months (0 = ignore)")
     job_role: str = Field(default="", description="User's target job role for boosting")
     top_n: int = Field(default=5, ge=1, le=10)
+    dense_weight: Optional[float] = Field(default=None, ge=0, le=1,
+                                          description="Blend weight of the LSA channel (default: RECOMMENDER_DENSE_WEIGHT)")
+    explain: bool = Field(default=False, description="Attach a per-result score breakdown")
 
 
 class TrainRequest(BaseModel):
@@ -22,7 +36,7 @@ class TrainRequest(BaseModel):
 
 
 @router.post("/predict")
-async def predict(req: PredictRequest):
+async def predict(req: PredictRequest, request: Request):
     """
     Generate top-5 course recommendations using TF-IDF cosine similarity + boosting.
 
@@ -33,18 +47,29 @@ async def predict(req: PredictRequest):
     - preferred_duration_months : max duration acceptable (courses within limit boosted +15%)
     - job_role : target job role keyword (substring match in course job_role boosted +25%)
     - top_n    : number of results (1–10, default 5)
+    - dense_weight : share of the LSA (semantic) score blended into the TF-IDF cosine, 0–1
+    - explain  : add an `explanation` to each result — base cosine, boosts that fired
+                 (with matched skills) and the top contributing TF-IDF terms
+
+    Under ADMISSION_ENABLED, X-Request-Deadline-Ms / X-Request-Priority headers
+    steer admission; an overloaded gate answers 503 with Retry-After.
     """
     try:
         top_n = min(max(req.top_n, 1), 10)
-        recommendations = get_recommendations(
+        params = dict(
             skills=req.skills,
             interest=req.interest,
             nsqf_level=req.nsqf_level,
             preferred_duration_months=req.preferred_duration_months,
             job_role=req.job_role,
             top_n=top_n,
+            dense_weight=req.dense_weight,
+            explain=req.explain,
         )
-        return {
+        key = request_key(params)
+        recommendations = await admission.run(request, 'predict', key, lambda: _predict_flight.do(
+            key, lambda: run_in_threadpool(get_recommendations, **params)), flight=_predict_flight)
+        return fast_response({
             "recommendations": recommendations,
             "total": len(recommendations),
             "query": {
@@ -53,52 +78,75 @@ async def predict(req: PredictRequest):
                 "nsqf_level": req.nsqf_level,
                 "preferred_duration_months": req.preferred_duration_months,
                 "job_role": req.job_role,
+                "dense_weight": req.dense_weight,
             },
-        }
+        })
+    except admission.Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/recommend")
-async def recommend_from_profile(current_user: dict = Depends(get_current_user)):
+async def recommend_from_profile(claims: dict = Depends(get_token_claims)):
     """
     Generate personalised course recommendations using the user's stored profile.
     Reads: technical_skills, career_aspirations (target_role, preferred_industry),
            nsqf_level, and preferred_duration_months from the user document in MongoDB.
+    Served from the snapshot on the user document while neither those fields
+    nor the model have changed; otherwise recomputed and written back async.
+    Tokens carrying profile claims (AUTH_PROFILE_CLAIMS) are answered from an
+    in-process memo when one exists for that profile version.
     """
+    version = model_version()
+    dense_weight = settings.RECOMMENDER_DENSE_WEIGHT
+    prf = claims.get("prf")
+    if isinstance(prf, dict):
+        recommendations = memoised(claims["sub"], prf.get("v"), prf.get("h"), dense_weight, version)
+        if recommendations is not None:
+            return fast_response({"recommendations": recommendations, "total": len(recommendations)})
+
+    current_user = await load_user(claims["sub"])
     try:
         # Extract fields from the user's stored profile
-        skills_list = current_user.get("technical_skills", [])
-        skills = " ".join(skills_list) if isinstance(skills_list, list) else str(skills_list)
-
-        career = current_user.get("career_aspirations", {})
-        interest = career.get("preferred_industry", "") or career.get("target_role", "")
-        job_role = career.get("target_role", "")
-
-        nsqf_level = int(current_user.get("nsqf_level", 0))
-        preferred_duration_months = int(current_user.get("preferred_duration_months", 0))
-
-        recommendations = get_recommendations(
-            skills=skills,
-            interest=interest,
-            nsqf_level=nsqf_level,
-            preferred_duration_months=preferred_duration_months,
-            job_role=job_role,
-            top_n=5,
-        )
-        return {
+        query = query_from_profile(current_user)
+        q_hash = profile_hash(query)
+        # A non-zero configured blend weight changes results, so it joins the snapshot key
+        p_hash = profile_hash({**query, 'dense_weight': dense_weight}) if dense_weight else q_hash
+
+        recommendations = cached_recommendations(current_user, p_hash, version, top_n=5)
+        record_cache('recommendation_snapshot', recommendations is not None)
+        if recommendations is None:
+            recommendations = await run_in_threadpool(get_recommendations, **query, top_n=5)
+            save_snapshot(current_user, p_hash, version, 5, recommendations)
+        if settings.AUTH_PROFILE_CLAIMS:
+            remember(claims["sub"], profile_version(current_user), q_hash, dense_weight, version, recommendations)
+        return fast_response({
             "recommendations": recommendations,
             "total": len(recommendations),
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/train")
-async def train_model():
-    """Re-train and refresh the TF-IDF model from courses.csv."""
+@router.post("/train", status_code=202)
+async def train_model(response: Response,
+                      wait: bool = Query(default=False, description="Block until training finishes")):
+    """
+    Re-train and refresh the TF-IDF model from courses.csv in the background
+    job pool. Returns a job id at once (poll /api/v1/jobs/{job_id}); a retrain
+    already in progress is joined rather than repeated. `wait=true` keeps the
+    old synchronous response.
+    """
     try:
-        count = train_and_save()
-        return {"message": f"Model trained on {count} courses.", "courses_indexed": count}
+        job, created = jobs.submit('recommender')
+        if not wait:
+            return jobs.accepted(job, created)
+        await jobs.wait(job)
+        if job.status == 'failed':
+            raise RuntimeError(job.error)
+        count = job.result['courses_indexed']
+        response.status_code = 200
+        return {"message": f"Model trained on {count} courses.", "courses_indexed": count, "job": job.to_dict()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -4,127 +4,441 @@ Identifies missing skills, readiness %, and training recommendations.
 """
 import os
 import re
+import time
 import pickle
+import hashlib
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import MultiLabelBinarizer
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
+from typing import Callable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import span, record_cache, set_model_version, run_in_threadpool
+from app.core import admission
+from app.core.fastjson import fast_response
+from app.core.precomputed import PrecomputedJSON, respond
+from app.core.singleflight import SingleFlight, AsyncSingleFlight, atomic_write, file_lock, request_key
+from app.services import catalogue, jobs
+from app.services.compiled_forest import load_compiled, save_compiled
 
 router = APIRouter()
 
 # ── Paths ─────────────────────────────────────────────────────────────────────
 _DIR         = os.path.dirname(os.path.abspath(__file__))
-_DATA_DIR    = os.path.join(_DIR, '..', '..', '..', 'backend', 'data')
-_JOB_CSV     = os.path.join(_DATA_DIR, 'job_roles.csv')
-_COURSES_CSV = os.path.join(_DATA_DIR, 'courses.csv')
-
 # pickle cache inside this same folder
 _CACHE_DIR   = os.path.join(_DIR, '..', 'models')
 _RF_PATH     = os.path.join(_CACHE_DIR, 'skill_gap_rf.pkl')
 _MLB_PATH    = os.path.join(_CACHE_DIR, 'skill_gap_mlb.pkl')
 _ROLES_PATH  = os.path.join(_CACHE_DIR, 'skill_gap_roles.pkl')
+_PAIR_PATH   = os.path.join(_CACHE_DIR, 'skill_gap_pair_rf.pkl')
+# Inference-only compiled forests (app.services.compiled_forest), written beside the pickles
+_RF_BIN_PATH   = os.path.join(_CACHE_DIR, 'skill_gap_rf.npz')
+_PAIR_BIN_PATH = os.path.join(_CACHE_DIR, 'skill_gap_pair_rf.npz')
+# Guards the artifact set: exclusive while (re)training, shared while loading
+_LOCK_PATH   = os.path.join(_CACHE_DIR, 'skill_gap')
 
-# ── Internals ─────────────────────────────────────────────────────────────────
-def _normalise(text: str) -> List[str]:
-    """Lowercase + tokenise a skill string."""
-    return [t.strip().lower() for t in str(text).split(',') if t.strip()]
+ENGINES = ('role', 'pairwise')
 
+# Loaded (rf, mlb, job_df), reused until the pickles on disk change; rf is the compiled forest
+_model_cache = {}
+# Concurrent first requests share one train / load instead of racing
+_flight = SingleFlight('skill_gap')
 
+# ── Internals ─────────────────────────────────────────────────────────────────
 def _load_job_roles() -> pd.DataFrame:
-    path = os.path.abspath(_JOB_CSV)
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"job_roles.csv not found at {path}")
-    df = pd.read_csv(path)
-    df.fillna('', inplace=True)
-    df['skills_list'] = df['required_skills'].apply(_normalise)
-    return df
+    return catalogue.job_roles().frame()
 
 
 def _load_courses() -> pd.DataFrame:
-    path = os.path.abspath(_COURSES_CSV)
-    if not os.path.exists(path):
+    try:
+        return catalogue.courses().frame()
+    except FileNotFoundError:
         return pd.DataFrame()
-    df = pd.read_csv(path)
-    df.fillna('', inplace=True)
-    df['skills_list'] = df['skills_covered'].apply(_normalise)
-    return df
 
 
-def _train_model(job_df: pd.DataFrame):
+# Synthetic learner variants: (label, number of role skills kept given n required)
+_VARIANTS = (
+    (1, lambda n: n),                          # fully skilled
+    (1, lambda n: n - np.maximum(1, n // 4)),  # 75 % skills present
+    (0, lambda n: n - np.maximum(1, n // 2)),  # 50 % skills present
+    (0, lambda n: np.maximum(1, n // 4)),      # 25 % or fewer skills
+)
+
+
+def _synthetic_samples(role_matrix, samples_per_role: int, rng: np.random.Generator):
+    """
+    Build every synthetic learner in one sparse construction.
+    Each role's skill row is repeated `samples_per_role` times (cycling through
+    _VARIANTS); within each copy every skill gets a random key and the
+    `keep` lowest-keyed skills survive, i.e. a uniform random subset.
+    Returns (X, labels, role index of each sample row).
+    """
+    role_matrix = role_matrix.tocsr()
+    n_skills = np.diff(role_matrix.indptr)
+    roles = np.flatnonzero(n_skills)               # roles without skills are skipped
+    k = samples_per_role
+
+    # One sample row per (role, copy), role-major
+    sample_role = np.repeat(roles, k)
+    variant     = np.tile(np.arange(k) % len(_VARIANTS), len(roles))
+    n           = n_skills[sample_role]
+    keep        = np.empty_like(n)
+    labels      = np.empty(len(n), dtype=int)
+    for v, (label, keep_fn) in enumerate(_VARIANTS):
+        sel = variant == v
+        keep[sel]   = keep_fn(n[sel])
+        labels[sel] = label
+
+    # Expand to one entry per (sample row, role skill)
+    row_ids = np.repeat(np.arange(len(n)), n)
+    starts  = role_matrix.indptr[sample_role]
+    offsets = np.arange(len(row_ids)) - np.repeat(np.cumsum(n) - n, n)
+    cols    = role_matrix.indices[np.repeat(starts, n) + offsets]
+
+    # Rank skills within each sample row by a random key; keep the first `keep`
+    order = np.lexsort((rng.random(len(row_ids)), row_ids))
+    rank  = np.empty_like(order)
+    rank[order] = offsets
+    kept = rank < keep[row_ids]
+
+    X = sparse.csr_matrix(
+        (np.ones(int(kept.sum()), dtype=np.float32), (row_ids[kept], cols[kept])),
+        shape=(len(n), role_matrix.shape[1]),
+    )
+    return X, labels, sample_role
+
+
+def _train_model(job_df: pd.DataFrame, timings: Optional[dict] = None):
     """
     Train a Random Forest on job-role skill vectors.
-    X = binary skill vector (per role), y = 1 if "fully ready", 0 otherwise.
-    We generate synthetic training examples:
+    X = binary skill vector (per synthetic learner), y = 1 if "job ready", 0 otherwise.
+    Every role contributes SKILL_GAP_SAMPLES_PER_ROLE synthetic learners cycling through:
       - Fully-skilled learner   → label 1
       - 75 % skills present     → label 1
       - 50 % skills present     → label 0
       - 25 % or fewer skills    → label 0
+    Output is deterministic for a fixed SKILL_GAP_SEED, whatever SKILL_GAP_N_JOBS is.
     """
-    mlb = MultiLabelBinarizer()
-    all_skill_lists = job_df['skills_list'].tolist()
-    mlb.fit(all_skill_lists)
-
-    X_rows, y_rows = [], []
-    rng = np.random.default_rng(42)
-
-    for skills in all_skill_lists:
-        full_vec = mlb.transform([skills])[0]
-        indices  = np.where(full_vec == 1)[0]
-        n        = len(indices)
-
-        if n == 0:
-            continue
-
-        # 100 % ready
-        X_rows.append(full_vec.copy()); y_rows.append(1)
-
-        # 75 % ready
-        mask75 = full_vec.copy()
-        drop   = rng.choice(indices, max(1, n // 4), replace=False)
-        mask75[drop] = 0
-        X_rows.append(mask75); y_rows.append(1)
-
-        # 50 % ready
-        mask50 = full_vec.copy()
-        drop   = rng.choice(indices, max(1, n // 2), replace=False)
-        mask50[drop] = 0
-        X_rows.append(mask50); y_rows.append(0)
-
-        # 25 % ready
-        mask25 = np.zeros_like(full_vec)
-        keep   = rng.choice(indices, max(1, n // 4), replace=False)
-        mask25[keep] = 1
-        X_rows.append(mask25); y_rows.append(0)
-
-    X = np.array(X_rows)
-    y = np.array(y_rows)
-
-    rf = RandomForestClassifier(n_estimators=150, max_depth=8, random_state=42)
+    timings = timings if timings is not None else {}
+    t0 = time.perf_counter()
+    mlb = MultiLabelBinarizer(sparse_output=True)
+    role_matrix = mlb.fit_transform(job_df['skills_list'].tolist())
+
+    rng = np.random.default_rng(settings.SKILL_GAP_SEED)
+    X, y, _ = _synthetic_samples(role_matrix, max(1, settings.SKILL_GAP_SAMPLES_PER_ROLE), rng)
+    timings['samples_ms'] = round((time.perf_counter() - t0) * 1000, 2)
+
+    t0 = time.perf_counter()
+    rf = RandomForestClassifier(n_estimators=settings.SKILL_GAP_N_ESTIMATORS, max_depth=8,
+                                random_state=settings.SKILL_GAP_SEED, n_jobs=settings.SKILL_GAP_N_JOBS)
     rf.fit(X, y)
+    # Single-row inference is faster without the joblib pool
+    rf.n_jobs = 1
+    timings['fit_ms'] = round((time.perf_counter() - t0) * 1000, 2)
+    timings['samples'] = int(X.shape[0])
+    timings['features'] = int(X.shape[1])
     return rf, mlb
 
 
+def _artifact_stats() -> tuple:
+    stats = []
+    for p in (_RF_PATH, _MLB_PATH, _ROLES_PATH):
+        st = os.stat(p)
+        stats.append((st.st_mtime_ns, st.st_size))
+    return tuple(stats)
+
+
+def model_version() -> str:
+    """Short identifier of the Random Forest artifacts currently on disk."""
+    return hashlib.sha1(repr(_artifact_stats()).encode()).hexdigest()[:12]
+
+
+def _persist(*artifacts):
+    """Atomically write (path, obj) pickles; the caller holds the exclusive lock."""
+    for path, obj in artifacts:
+        with atomic_write(path) as f:
+            pickle.dump(obj, f)
+
+
+def _trained() -> bool:
+    return os.path.exists(_RF_PATH) and os.path.exists(_MLB_PATH) and os.path.exists(_ROLES_PATH)
+
+
+def _read_model():
+    with span('skill_gap.model_load'), file_lock(_LOCK_PATH, shared=True):
+        key = (os.path.abspath(_CACHE_DIR), _artifact_stats())
+        rf = load_compiled(_RF_PATH, _RF_BIN_PATH)
+        with open(_MLB_PATH, 'rb') as f: mlb = pickle.load(f)
+        with open(_ROLES_PATH,'rb') as f: job_df = pickle.load(f)
+    _model_cache['model'] = (key, (rf, mlb, job_df))
+    set_model_version('skill_gap', model_version())
+    return rf, mlb, job_df
+
+
+def _train_and_persist():
+    with file_lock(_LOCK_PATH):
+        if _trained():
+            try:
+                return _read_model()   # another process finished training while we waited
+            except Exception:
+                pass  # unreadable — retrain over it
+        with span('skill_gap.train'):
+            job_df = _load_job_roles()
+            rf, mlb = _train_model(job_df)
+        _persist((_RF_PATH, rf), (_MLB_PATH, mlb), (_ROLES_PATH, job_df))
+        rf = save_compiled(rf, _RF_PATH, _RF_BIN_PATH)
+    return rf, mlb, job_df
+
+
 def _get_model():
-    os.makedirs(_CACHE_DIR, exist_ok=True)
-    if os.path.exists(_RF_PATH) and os.path.exists(_MLB_PATH) and os.path.exists(_ROLES_PATH):
+    if _trained():
+        key = (os.path.abspath(_CACHE_DIR), _artifact_stats())
+        cached = _model_cache.get('model')
+        if cached is not None and cached[0] == key:
+            record_cache('skill_gap_model', True)
+            return cached[1]
+        record_cache('skill_gap_model', False)
         try:
-            with open(_RF_PATH,  'rb') as f: rf  = pickle.load(f)
-            with open(_MLB_PATH, 'rb') as f: mlb = pickle.load(f)
-            with open(_ROLES_PATH,'rb') as f: job_df = pickle.load(f)
-            return rf, mlb, job_df
+            return _flight.do(('load', key), _read_model)
         except Exception:
             pass  # fall through to retrain
 
-    job_df = _load_job_roles()
-    rf, mlb = _train_model(job_df)
+    return _flight.do('train', _train_and_persist)
 
-    with open(_RF_PATH,  'wb') as f: pickle.dump(rf,     f)
-    with open(_MLB_PATH, 'wb') as f: pickle.dump(mlb,    f)
-    with open(_ROLES_PATH,'wb') as f: pickle.dump(job_df, f)
-    return rf, mlb, job_df
+# ── Pairwise readiness engine ─────────────────────────────────────────────────
+# One forest over [role_vector, learner_vector] scores any learner against any
+# role, so a learner can be ranked against every role in one predict_proba call.
+def _role_matrix(mlb, job_df: pd.DataFrame):
+    """Role × skill incidence matrix (CSR, float32), built once per loaded model."""
+    cached = _model_cache.get('role_matrix')
+    if cached is not None and cached[0] is job_df:
+        return cached[1]
+    R = sparse.csr_matrix(mlb.transform(job_df['skills_list'].tolist()), dtype=np.float32)
+    _model_cache['role_matrix'] = (job_df, R)
+    return R
+
+
+def _learner_vector(mlb, learner_skills: List[str]):
+    """
+    1 × n_skills CSR vector of the learner's skills that exist in the vocabulary.
+    Multi-word skills also contribute their individual words, matching how
+    job_roles.csv skills are tokenised.
+    """
+    vocab = _model_cache.get('vocab')
+    if vocab is None or vocab[0] is not mlb:
+        vocab = (mlb, {c: i for i, c in enumerate(mlb.classes_)})
+        _model_cache['vocab'] = vocab
+    index = vocab[1]
+    tokens = set()
+    for skill in learner_skills:
+        skill = skill.strip().lower()
+        if skill:
+            tokens.add(skill)
+            tokens.update(skill.split())
+    cols = sorted(index[t] for t in tokens if t in index)
+    return sparse.csr_matrix((np.ones(len(cols), dtype=np.float32), (np.zeros(len(cols), dtype=int), cols)),
+                             shape=(1, len(index)))
+
+
+def _pair_features(R, learner_rows):
+    """hstack([role rows, learner rows]) — both CSR with the same number of rows."""
+    return sparse.hstack([R, learner_rows], format='csr')
+
+
+def _tile_row(row, n: int):
+    """Repeat a 1 × d CSR row n times without materialising a Python list of rows."""
+    nnz = row.nnz
+    return sparse.csr_matrix(
+        (np.tile(row.data, n), np.tile(row.indices, n), np.arange(n + 1) * nnz),
+        shape=(n, row.shape[1]),
+    )
+
+
+def _train_pair_model(role_matrix, timings: Optional[dict] = None):
+    """
+    Train the role-conditioned forest. Positive/negative pairs come from the
+    same synthetic learners as the role engine, plus one cross-role learner per
+    role (another role's full skill set) labelled ready only if it covers
+    ≥ 75 % of the role's skills.
+    """
+    timings = timings if timings is not None else {}
+    t0 = time.perf_counter()
+    R = sparse.csr_matrix(role_matrix, dtype=np.float32)
+    rng = np.random.default_rng(settings.SKILL_GAP_SEED + 1)
+    X_learner, y, sample_role = _synthetic_samples(R, max(1, settings.SKILL_GAP_SAMPLES_PER_ROLE), rng)
+
+    roles = np.flatnonzero(np.diff(R.indptr))
+    if len(roles) > 1:
+        # a different role for each role: shift by a random non-zero offset
+        others = roles[(np.arange(len(roles)) + rng.integers(1, len(roles), len(roles))) % len(roles)]
+        overlap = np.asarray(R[roles].multiply(R[others]).sum(axis=1)).ravel()
+        cross_y = (overlap / np.diff(R.indptr)[roles] >= 0.75).astype(int)
+        X_learner = sparse.vstack([X_learner, R[others]], format='csr')
+        y = np.concatenate([y, cross_y])
+        sample_role = np.concatenate([sample_role, roles])
+
+    X = _pair_features(R[sample_role], X_learner)
+    timings['pair_samples_ms'] = round((time.perf_counter() - t0) * 1000, 2)
+
+    t0 = time.perf_counter()
+    rf = RandomForestClassifier(n_estimators=settings.SKILL_GAP_N_ESTIMATORS, max_depth=12,
+                                random_state=settings.SKILL_GAP_SEED, n_jobs=settings.SKILL_GAP_N_JOBS)
+    rf.fit(X, y)
+    rf.n_jobs = 1
+    timings['pair_fit_ms'] = round((time.perf_counter() - t0) * 1000, 2)
+    timings['pair_samples'] = int(X.shape[0])
+    return rf
+
+
+def _read_pair_model(mlb):
+    with span('skill_gap.pair_model_load'), file_lock(_LOCK_PATH, shared=True):
+        mtime = os.stat(_PAIR_PATH).st_mtime_ns
+        pair_rf = load_compiled(_PAIR_PATH, _PAIR_BIN_PATH)
+    if pair_rf.n_features_in_ != 2 * len(mlb.classes_):
+        raise ValueError("pairwise forest was trained on a different skill vocabulary")
+    return mtime, pair_rf
+
+
+def _train_pair_and_persist(mlb, job_df):
+    with file_lock(_LOCK_PATH):
+        if os.path.exists(_PAIR_PATH):
+            try:
+                return _read_pair_model(mlb)   # rebuilt by another process meanwhile
+            except Exception:
+                pass
+        with span('skill_gap.pair_train'):
+            pair_rf = _train_pair_model(_role_matrix(mlb, job_df))
+        _persist((_PAIR_PATH, pair_rf))
+        pair_rf = save_compiled(pair_rf, _PAIR_PATH, _PAIR_BIN_PATH)
+        return os.stat(_PAIR_PATH).st_mtime_ns, pair_rf
+
+
+def _get_pair_model():
+    """(pair_rf, mlb, job_df) — the pairwise forest shares the role engine's vocabulary."""
+    _, mlb, job_df = _get_model()
+    if os.path.exists(_PAIR_PATH):
+        mtime = os.stat(_PAIR_PATH).st_mtime_ns
+        cached = _model_cache.get('pair')   # (job_df, mtime, pair_rf)
+        if cached is not None and cached[0] is job_df and cached[1] == mtime:
+            record_cache('skill_gap_pair_model', True)
+            return cached[2], mlb, job_df
+        record_cache('skill_gap_pair_model', False)
+        try:
+            mtime, pair_rf = _flight.do(('pair_load', mtime, id(mlb)), lambda: _read_pair_model(mlb))
+            _model_cache['pair'] = (job_df, mtime, pair_rf)
+            return pair_rf, mlb, job_df
+        except Exception:
+            pass  # fall through to retrain
+
+    mtime, pair_rf = _flight.do(('pair_train', id(mlb)), lambda: _train_pair_and_persist(mlb, job_df))
+    _model_cache['pair'] = (job_df, mtime, pair_rf)
+    return pair_rf, mlb, job_df
+
+
+def score_roles_pairwise(learner_skills: List[str]) -> np.ndarray:
+    """Job-ready probability of the learner for every role, in job_df order."""
+    pair_rf, mlb, job_df = _get_pair_model()
+    R = _role_matrix(mlb, job_df)
+    learner = _learner_vector(mlb, learner_skills)
+    with span('skill_gap.pair_inference'):
+        proba = pair_rf.predict_proba(_pair_features(R, _tile_row(learner, R.shape[0])))
+    return proba[:, list(pair_rf.classes_).index(1)] if 1 in pair_rf.classes_ else np.zeros(R.shape[0])
+
+
+# ── Reverse search: closest roles for a skill set ─────────────────────────────
+class _RoleIndex:
+    """
+    Column-oriented role × skill incidence plus per-role filter columns.
+    Matching, scoring and filtering touch only the roles holding at least one
+    of the learner's skills — O(h log h) for h such (role, skill) entries —
+    so no step is proportional to the total number of roles.
+    """
+
+    def __init__(self, mlb, job_df: pd.DataFrame):
+        R = _role_matrix(mlb, job_df)
+        self.csc = R.tocsc()
+        self.n_required = np.diff(R.indptr)
+        self.nsqf_level = job_df['nsqf_level'].astype(int).to_numpy()
+        sectors = job_df['sector'].astype(str).str.lower()
+        self.sector_codes = sectors.astype('category').cat.codes.to_numpy()
+        self.sector_lookup = {name: code for code, name in enumerate(sectors.astype('category').cat.categories)}
+
+    def matched_counts(self, cols) -> Tuple[np.ndarray, np.ndarray]:
+        """(role ids holding any of `cols`, ascending; matched skill count of each)."""
+        indptr, indices = self.csc.indptr, self.csc.indices
+        rows = [indices[indptr[c]:indptr[c + 1]] for c in cols]
+        if not rows:
+            return np.empty(0, dtype=indices.dtype), np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(rows), return_counts=True)
+
+
+def _role_index(mlb, job_df: pd.DataFrame) -> _RoleIndex:
+    cached = _model_cache.get('role_index')
+    if cached is not None and cached[0] is job_df:
+        return cached[1]
+    index = _RoleIndex(mlb, job_df)
+    _model_cache['role_index'] = (job_df, index)
+    return index
+
+
+def closest_roles(learner_skills: List[str], top_k: int = 5, nsqf_level: Optional[int] = None,
+                  sector: Optional[str] = None) -> dict:
+    """
+    Top-k roles for a skill set, ranked by matched fraction and then by the
+    Random Forest readiness probability (computed only for the candidates).
+    """
+    rf, mlb, job_df = _get_model()
+    index = _role_index(mlb, job_df)
+    learner = _learner_vector(mlb, learner_skills)
+
+    with span('skill_gap.closest_match'):
+        # Every array below is indexed like `ids`: the roles sharing a skill with the learner
+        ids, counts = index.matched_counts(learner.indices)
+        eligible = np.ones(len(ids), dtype=bool)
+        if nsqf_level is not None:
+            eligible &= index.nsqf_level[ids] == nsqf_level
+        if sector:
+            code = index.sector_lookup.get(sector.strip().lower())
+            eligible &= (index.sector_codes[ids] == code) if code is not None else False
+        ids, counts = ids[eligible], counts[eligible]
+        frac = counts / index.n_required[ids]      # a role holding a skill requires at least one
+
+        total_candidates = len(ids)
+        pool = min(total_candidates, top_k * 4)
+        if pool < total_candidates:
+            keep = np.argpartition(-frac, pool - 1)[:pool]
+            ids, counts, frac = ids[keep], counts[keep], frac[keep]
+        candidates = ids
+
+    if len(candidates) == 0:
+        return {'roles': [], 'total_candidates': 0}
+
+    # Same readiness formula as analyze_skill_gap: RF on the matched skills, scaled by coverage
+    with span('skill_gap.closest_inference'):
+        R = _role_matrix(mlb, job_df)
+        matched_rows = R[candidates].multiply(learner)   # broadcast 1 × n_skills mask
+        proba = rf.predict_proba(sparse.csr_matrix(matched_rows))
+        base = proba[:, list(rf.classes_).index(1)] if 1 in rf.classes_ else np.zeros(len(candidates))
+        readiness = base * frac * 100
+
+    order = np.lexsort((-readiness, -frac))[:top_k]
+    roles = []
+    for j in order:
+        i = candidates[j]
+        row = job_df.iloc[i]
+        roles.append({
+            'job_role':        row['job_role'],
+            'sector':          row['sector'],
+            'nsqf_level':      int(row['nsqf_level']),
+            'skill_match_pct': round(float(frac[j]) * 100, 1),
+            'job_ready_pct':   round(float(readiness[j]), 1),
+            'total_required':  int(index.n_required[i]),
+            'total_matched':   int(counts[j]),
+        })
+    return {'roles': roles, 'total_candidates': total_candidates}
 
 
 def _suggest_courses(gap_skills: List[str], courses_df: pd.DataFrame, top_n: int = 3) -> List[dict]:
@@ -144,21 +458,28 @@ def _suggest_courses(gap_skills: List[str], courses_df: pd.DataFrame, top_n: int
 
 
 # ── Core analysis function ─────────────────────────────────────────────────────
-def analyze_skill_gap(learner_skills: List[str], target_role: str):
-    rf, mlb, job_df = _get_model()
-    courses_df = _load_courses()
-
-    # Find best-matching job role
+def analyze_skill_gap(learner_skills: List[str], target_role: str, engine: Optional[str] = None):
+    engine = engine or settings.SKILL_GAP_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Choose one of: {', '.join(ENGINES)}")
+    with span('skill_gap.model_lookup'):
+        rf, mlb, job_df = _get_model()
+    with span('skill_gap.courses_load'):
+        courses_df = _load_courses()
+
+    # Find best-matching job role (scored on a copy: job_df is shared between requests)
     role_lower = target_role.lower().strip()
-    job_df['_score'] = job_df['job_role'].str.lower().apply(
-        lambda r: (
-            10 if r == role_lower else
-            8 if role_lower in r else
-            6 if r in role_lower else
-            sum(2 for word in role_lower.split() if len(word) > 2 and word in r)
+    with span('skill_gap.role_match'):
+        role_scores = job_df['job_role'].str.lower().apply(
+            lambda r: (
+                10 if r == role_lower else
+                8 if role_lower in r else
+                6 if r in role_lower else
+                sum(2 for word in role_lower.split() if len(word) > 2 and word in r)
+            )
         )
-    )
-    best_row = job_df.loc[job_df['_score'].idxmax()]
+        best_row = job_df.loc[role_scores.idxmax()].copy()
+        best_row['_score'] = role_scores.max()
 
     if best_row['_score'] == 0:
         # No match — use generic analysis
@@ -178,9 +499,17 @@ def analyze_skill_gap(learner_skills: List[str], target_role: str):
     try:
         if len(matched) == 0:
             job_ready_prob = 0.0
+        elif engine == 'pairwise' and best_row['_score'] > 0:
+            # Role-conditioned: the learner's full skill set, no pre-filtering
+            pair_rf, _, _ = _get_pair_model()
+            role_row = _role_matrix(mlb, job_df)[job_df.index.get_loc(best_row.name)]
+            with span('skill_gap.pair_inference'):
+                proba = pair_rf.predict_proba(_pair_features(role_row, _learner_vector(mlb, learner_skills)))[0]
+            job_ready_prob = round(float(proba[list(pair_rf.classes_).index(1)]) * 100, 1) if 1 in pair_rf.classes_ else 0.0
         else:
-            learner_vec = mlb.transform([matched])[0].reshape(1, -1)
-            rf_prob     = rf.predict_proba(learner_vec)[0]
+            with span('skill_gap.inference'):
+                learner_vec = mlb.transform([matched])   # (1, n_skills), dense or sparse
+                rf_prob     = rf.predict_proba(learner_vec)[0]
             base_prob   = float(rf_prob[1]) * 100
             # Scale AI probability by actual completion ratio to ensure dynamic job-specific values
             job_ready_prob = round(base_prob * (len(matched) / n_req), 1)
@@ -188,15 +517,17 @@ def analyze_skill_gap(learner_skills: List[str], target_role: str):
         job_ready_prob = readiness
 
     # Priority-rank gaps by frequency in related roles
-    gap_priority = {}
-    for _, row in job_df.iterrows():
-        for g in gaps:
-            if g in row['skills_list']:
-                gap_priority[g] = gap_priority.get(g, 0) + 1
-    ranked_gaps = sorted(gaps, key=lambda g: gap_priority.get(g, 0), reverse=True)
+    with span('skill_gap.gap_rank'):
+        gap_priority = {}
+        for _, row in job_df.iterrows():
+            for g in gaps:
+                if g in row['skills_list']:
+                    gap_priority[g] = gap_priority.get(g, 0) + 1
+        ranked_gaps = sorted(gaps, key=lambda g: gap_priority.get(g, 0), reverse=True)
 
     # Course suggestions
-    suggestions = _suggest_courses(ranked_gaps[:5], courses_df, top_n=5)
+    with span('skill_gap.course_suggest'):
+        suggestions = _suggest_courses(ranked_gaps[:5], courses_df, top_n=5)
 
     return {
         'target_role':         best_row['job_role'] if best_row['_score'] > 0 else target_role,
@@ -212,67 +543,202 @@ def analyze_skill_gap(learner_skills: List[str], target_role: str):
         'total_matched':       len(matched),
         'total_missing':       len(gaps),
         'training_suggestions': suggestions,
+        'engine':              engine,
     }
 
 
-def rebuild_skill_gap_model():
-    """Force retrain and overwrite cached model."""
-    for p in [_RF_PATH, _MLB_PATH, _ROLES_PATH]:
-        if os.path.exists(p): os.remove(p)
+def best_fit_roles(learner_skills: List[str], top_k: int = 10) -> dict:
+    """Rank every role for one learner with a single pairwise predict_proba call."""
+    proba = score_roles_pairwise(learner_skills)
+    _, mlb, job_df = _get_pair_model()
+    R = _role_matrix(mlb, job_df)
+    learner = _learner_vector(mlb, learner_skills)
+
+    with span('skill_gap.best_fit_rank'):
+        n_required = np.diff(R.indptr)
+        matched = np.asarray((R @ learner.T).todense()).ravel()
+        match_frac = np.divide(matched, n_required, out=np.zeros(len(n_required)), where=n_required > 0)
+        # Highest probability first; matched fraction breaks ties
+        order = np.lexsort((-match_frac, -proba))[:top_k]
+
+        learner_cols = set(learner.indices)
+        roles = []
+        for i in order:
+            row = job_df.iloc[i]
+            cols = R.indices[R.indptr[i]:R.indptr[i + 1]]
+            roles.append({
+                'job_role':        row['job_role'],
+                'sector':          row['sector'],
+                'nsqf_level':      int(row['nsqf_level']),
+                'job_ready_pct':   round(float(proba[i]) * 100, 1),
+                'skill_match_pct': round(float(match_frac[i]) * 100, 1),
+                'matched_skills':  [mlb.classes_[c] for c in cols if c in learner_cols],
+                'missing_skills':  [mlb.classes_[c] for c in cols if c not in learner_cols],
+            })
+    return {'roles': roles, 'total_roles_scored': int(R.shape[0]), 'engine': 'pairwise'}
+
+
+def rebuild_skill_gap_model(progress: Optional[Callable[[float, str], None]] = None) -> dict:
+    """Force retrain and overwrite cached model. Returns a timing report."""
+    # Concurrent rebuild requests share one retrain (and its report)
+    return _flight.do('rebuild', lambda: _rebuild(progress or (lambda fraction, stage: None)))
+
+
+def _rebuild(progress: Callable[[float, str], None]) -> dict:
+    report = {}
+    t_total = time.perf_counter()
+
+    progress(0.05, 'load')
+    t0 = time.perf_counter()
     job_df = _load_job_roles()
-    rf, mlb = _train_model(job_df)
-    os.makedirs(_CACHE_DIR, exist_ok=True)
-    with open(_RF_PATH,  'wb') as f: pickle.dump(rf,     f)
-    with open(_MLB_PATH, 'wb') as f: pickle.dump(mlb,    f)
-    with open(_ROLES_PATH,'wb') as f: pickle.dump(job_df, f)
-    return len(job_df)
+    report['load_ms'] = round((time.perf_counter() - t0) * 1000, 2)
+
+    progress(0.15, 'fit_role_forest')
+    rf, mlb = _train_model(job_df, report)
+    progress(0.55, 'fit_pair_forest')
+    pair_rf = _train_pair_model(mlb.transform(job_df['skills_list'].tolist()), report)
+
+    progress(0.9, 'persist')
+    # Files are replaced, not deleted first, so readers keep serving the old model until now
+    t0 = time.perf_counter()
+    with file_lock(_LOCK_PATH):
+        _persist((_RF_PATH, rf), (_MLB_PATH, mlb), (_ROLES_PATH, job_df), (_PAIR_PATH, pair_rf))
+        t1 = time.perf_counter()
+        save_compiled(rf, _RF_PATH, _RF_BIN_PATH)
+        save_compiled(pair_rf, _PAIR_PATH, _PAIR_BIN_PATH)
+        report['compile_ms'] = round((time.perf_counter() - t1) * 1000, 2)
+    report['persist_ms'] = round((time.perf_counter() - t0) * 1000, 2)
+    report['total_ms'] = round((time.perf_counter() - t_total) * 1000, 2)
+
+    report.update({
+        'roles_indexed':    len(job_df),
+        'n_estimators':     settings.SKILL_GAP_N_ESTIMATORS,
+        'n_jobs':           settings.SKILL_GAP_N_JOBS,
+        'samples_per_role': settings.SKILL_GAP_SAMPLES_PER_ROLE,
+        'seed':             settings.SKILL_GAP_SEED,
+    })
+    return report
 
 
 # ── FastAPI Router ─────────────────────────────────────────────────────────────
+_analyze_flight = AsyncSingleFlight('skill_gap.analyze')
+
 class SkillGapRequest(BaseModel):
     learner_skills: List[str]
     target_role: str
     top_n: Optional[int] = 5
+    engine: Optional[str] = Field(default=None, description="'role' or 'pairwise' (default: SKILL_GAP_ENGINE)")
+
+
+class ClosestRolesRequest(BaseModel):
+    learner_skills: List[str]
+    top_k: int = Field(default=5, ge=1, le=100)
+    nsqf_level: Optional[int] = Field(default=None, ge=1, le=10, description="Only roles at this NSQF level")
+    sector: Optional[str] = Field(default=None, description="Only roles in this sector (case-insensitive)")
+
+
+class BestFitRequest(BaseModel):
+    learner_skills: List[str]
+    top_k: int = Field(default=10, ge=1, le=100)
 
 
 @router.post("/analyze")
-async def analyze(req: SkillGapRequest):
+async def analyze(req: SkillGapRequest, request: Request):
     """
     Analyze skill gap for a learner against a target job role.
     Uses Random Forest classifier for job-readiness prediction.
+    Subject to admission control (ADMISSION_ENABLED), like /predict.
     """
     try:
         if not req.target_role.strip():
             raise ValueError("target_role is required")
-        result = analyze_skill_gap(req.learner_skills, req.target_role)
-        return result
+        # Identical concurrent requests share one computation
+        key = request_key(req.learner_skills, req.target_role, req.engine)
+        return fast_response(await admission.run(request, 'skill_gap', key, lambda: _analyze_flight.do(
+            key, lambda: run_in_threadpool(analyze_skill_gap, req.learner_skills, req.target_role,
+                                           engine=req.engine)), flight=_analyze_flight))
+    except admission.Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/closest-roles")
+async def get_closest_roles(req: ClosestRolesRequest):
+    """
+    "Which roles am I closest to?" — top-k roles from job_roles.csv by matched
+    skill fraction and readiness probability, with optional NSQF / sector filters.
+    """
+    try:
+        return fast_response(await run_in_threadpool(
+            closest_roles, req.learner_skills, req.top_k, req.nsqf_level, req.sector))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/rebuild")
-async def rebuild():
-    """Rebuild and retrain the Random Forest model from job_roles.csv."""
+@router.post("/best-fit")
+async def best_fit(req: BestFitRequest):
+    """
+    Rank every job role by how job-ready the learner is for it.
+    Uses the pairwise [role, learner] Random Forest in one batched prediction.
+    """
     try:
-        count = rebuild_skill_gap_model()
-        return {"message": f"Model retrained on {count} job roles.", "roles_indexed": count}
+        return fast_response(await run_in_threadpool(best_fit_roles, req.learner_skills, req.top_k))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/rebuild", status_code=202)
+async def rebuild(response: Response,
+                  wait: bool = Query(default=False, description="Block until training finishes")):
+    """
+    Rebuild and retrain the Random Forest models from job_roles.csv in the
+    background job pool. Returns a job id at once (poll /api/v1/jobs/{job_id});
+    `wait=true` keeps the old synchronous response.
+    """
+    try:
+        job, created = jobs.submit('skill_gap')
+        if not wait:
+            return jobs.accepted(job, created)
+        await jobs.wait(job)
+        if job.status == 'failed':
+            raise RuntimeError(job.error)
+        report = job.result
+        count = report['roles_indexed']
+        response.status_code = 200
+        return {"message": f"Model retrained on {count} job roles.", "roles_indexed": count, "report": report}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _list_roles():
+    """All job roles with their normalised required skills."""
+    job_df = _load_job_roles()
+    roles = [
+        {
+            'job_role': role,
+            'sector': sector,
+            'nsqf_level': int(level),
+            'required_skills': list(skills),  # already normalised
+        }
+        for role, sector, level, skills in zip(job_df['job_role'], job_df['sector'].astype(str),
+                                               job_df['nsqf_level'], job_df['skills_list'])
+    ]
+    return {"roles": roles, "total": len(roles)}
+
+
+def _roles_version():
+    table = catalogue.job_roles()
+    return (table.source, table.version)
+
+# Serialised once per job_roles version; polls revalidate with ETag / Last-Modified
+_roles_payload = PrecomputedJSON('skill_gap_roles', _list_roles, _roles_version,
+                                 lambda: catalogue.job_roles().modified)
+
 @router.get("/roles")
-async def get_roles():
+async def get_roles(request: Request):
     """Return list of all supported job roles with their required skills."""
     try:
-        job_df = _load_job_roles()
-        roles = []
-        for _, row in job_df.iterrows():
-            roles.append({
-                'job_role': row['job_role'],
-                'sector': row['sector'],
-                'nsqf_level': int(row['nsqf_level']),
-                'required_skills': row['skills_list'],  # already normalised list
-            })
-        return {"roles": roles, "total": len(roles)}
+        return respond(request, await run_in_threadpool(_roles_payload.current))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
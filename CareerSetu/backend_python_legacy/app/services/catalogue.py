@@ -0,0 +1,425 @@
+"""
+Catalogue Store
+Loads the courses, job_roles, nsqf_levels, job_market and qualification_levels
+tables once into typed columns (categorical sectors, integer levels, pre-tokenised skills) and
+shares them with every engine. A table is re-read only when its source changes;
+callers get shallow copy-on-write frames and read-only arrays, never copies.
+
+Tables come from a pluggable backend (CATALOGUE_BACKEND): CSV files under
+backend/data (default), Parquet files with the same columns, or MongoDB
+collections named `<CATALOGUE_MONGO_PREFIX><table>`.
+"""
+import os
+import re
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.core.metrics import span, record_cache
+
+logger = logging.getLogger("careersetu.catalogue")
+
+# ── Paths ─────────────────────────────────────────────────────────────────────
+_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _find_project_root(start: str) -> str:
+    """Walk up from `start` until we find a directory containing backend/data/courses.csv."""
+    current = start
+    for _ in range(10):   # max 10 levels up
+        candidate = os.path.join(current, 'backend', 'data', 'courses.csv')
+        if os.path.exists(candidate):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            break
+        current = parent
+    raise FileNotFoundError(
+        f"Could not find 'backend/data/courses.csv' by walking up from: {start}"
+    )
+
+_DATA_DIR = settings.CATALOGUE_DIR or os.path.join(_find_project_root(_DIR), 'backend', 'data')
+
+
+def data_path(filename: str) -> str:
+    """Absolute path of a file in the catalogue data directory."""
+    return os.path.abspath(os.path.join(_DATA_DIR, filename))
+
+
+# ── Column typing ─────────────────────────────────────────────────────────────
+def tokenise_skills(text) -> Tuple[str, ...]:
+    """Lowercase skill tokens: comma-separated if the text has commas, else space-separated (as in job_roles.csv)."""
+    text = str(text)
+    sep = ',' if ',' in text else None
+    return tuple(dict.fromkeys(t.strip().lower() for t in text.split(sep) if t.strip()))
+
+
+def parse_months(duration_str: str) -> int:
+    """Extract the numeric month count from a duration string like '6 Months' or '1 Month'."""
+    if not isinstance(duration_str, str):
+        return 999
+    m = re.search(r'(\d+)', duration_str)
+    return int(m.group(1)) if m else 999
+
+
+def _int_column(series: pd.Series, default: int = 0) -> pd.Series:
+    return pd.to_numeric(series, errors='coerce').fillna(default).astype('int64')
+
+
+def _prepare_courses(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.fillna('')
+    df['sector']          = df['sector'].astype('category')
+    df['nsqf_level']      = _int_column(df['nsqf_level'])
+    df['duration_months'] = df['duration'].map(parse_months).astype('int64')
+    df['skills_list']     = df['skills_covered'].map(tokenise_skills)
+    return df
+
+
+def _prepare_job_roles(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.fillna('')
+    df['sector']      = df['sector'].astype('category')
+    df['nsqf_level']  = _int_column(df['nsqf_level'])
+    df['skills_list'] = df['required_skills'].map(tokenise_skills)
+    return df
+
+
+def _prepare_nsqf_levels(df: pd.DataFrame) -> pd.DataFrame:
+    df['nsqf_level']      = _int_column(df['nsqf_level'])
+    # The top level has no successor, so next_level stays float with NaN
+    df['next_level']      = pd.to_numeric(df['next_level'], errors='coerce').astype('float64')
+    df['required_skills'] = df['required_skills'].fillna('').astype(str)
+    df['skills_list']     = df['required_skills'].map(tokenise_skills)
+    return df
+
+
+def _prepare_job_market(df: pd.DataFrame) -> pd.DataFrame:
+    df['year']      = _int_column(df['year'])
+    df['skill_key'] = df['skill'].astype(str).str.lower().str.strip().astype('category')
+    return df
+
+
+def _prepare_qualification_levels(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.fillna('')
+    df['keyword']       = df['keyword'].astype(str).str.lower().str.strip()
+    df['nsqf_level']    = _int_column(df['nsqf_level'])
+    df['justification'] = df['justification'].astype(str)
+    return df
+
+
+_TABLES: Dict[str, Callable[[pd.DataFrame], pd.DataFrame]] = {
+    'courses':              _prepare_courses,
+    'job_roles':            _prepare_job_roles,
+    'nsqf_levels':          _prepare_nsqf_levels,
+    'job_market':           _prepare_job_market,
+    'qualification_levels': _prepare_qualification_levels,
+}
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+class CatalogueBackend:
+    """
+    Source of raw (untyped) tables. `version(name)` must change whenever
+    `load(name)` would return different rows, and raise FileNotFoundError
+    when the table does not exist.
+    """
+
+    kind = 'abstract'
+
+    def source(self, name: str) -> str:
+        raise NotImplementedError
+
+    def version(self, name: str) -> tuple:
+        raise NotImplementedError
+
+    def load(self, name: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    async def start(self):
+        """Called once on application startup."""
+
+    async def stop(self):
+        """Called once on application shutdown."""
+
+
+class CSVBackend(CatalogueBackend):
+    """`<table>.csv` files; defaults to backend/data."""
+
+    kind = 'csv'
+    suffix = '.csv'
+
+    def __init__(self, data_dir: Optional[str] = None):
+        self.data_dir = data_dir
+
+    def source(self, name: str) -> str:
+        return os.path.abspath(os.path.join(self.data_dir or _DATA_DIR, name + self.suffix))
+
+    def version(self, name: str) -> tuple:
+        path = self.source(name)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"{name}{self.suffix} not found at {path}") from None
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self, name: str) -> pd.DataFrame:
+        return pd.read_csv(self.source(name))
+
+
+class ParquetBackend(CSVBackend):
+    """`<table>.parquet` files with the same columns as the CSVs (read with pyarrow)."""
+
+    kind = 'parquet'
+    suffix = '.parquet'
+
+    def load(self, name: str) -> pd.DataFrame:
+        return pd.read_parquet(self.source(name))
+
+
+class MongoBackend(CatalogueBackend):
+    """
+    One collection per table, read in bulk batches with the async driver.
+    Reads happen in `refresh()` — awaited at startup, then re-run by a change
+    stream (replica sets) or a polling loop — so request-time `load` only
+    hands out the last snapshot and never blocks on the network.
+    """
+
+    kind = 'mongo'
+
+    def __init__(self, database=None, prefix: str = 'catalogue_', batch_size: int = 1000,
+                 refresh: str = 'auto', poll_seconds: float = 60.0):
+        self._database = database          # injectable; defaults to app.core.database.db
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.refresh_mode = refresh
+        self.poll_seconds = poll_seconds
+        # table → (generation, content digest, raw frame)
+        self._snapshots: Dict[str, Tuple[int, str, pd.DataFrame]] = {}
+        self._watcher: Optional[asyncio.Task] = None
+
+    @property
+    def database(self):
+        if self._database is None:
+            from app.core.database import db
+            self._database = db
+        return self._database
+
+    def source(self, name: str) -> str:
+        return f"mongo:{self.database.name}.{self.prefix}{name}"
+
+    def version(self, name: str) -> tuple:
+        snap = self._snapshots.get(name)
+        if snap is None:
+            raise FileNotFoundError(f"catalogue table '{name}' not loaded from {self.source(name)}")
+        return snap[:2]
+
+    def load(self, name: str) -> pd.DataFrame:
+        return self._snapshots[name][2].copy(deep=False)
+
+    async def fetch(self, name: str) -> pd.DataFrame:
+        """All documents of one table, in insertion order, `batch_size` at a time."""
+        cursor = (self.database[self.prefix + name]
+                  .find({}, {'_id': 0}).sort('_id', 1).batch_size(self.batch_size))
+        chunks = []
+        try:
+            while True:
+                docs = await cursor.to_list(length=self.batch_size)
+                if not docs:
+                    break
+                chunks.append(pd.DataFrame.from_records(docs))
+        finally:
+            await cursor.close()
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+    async def refresh(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """Re-read tables from MongoDB; returns the ones whose content changed."""
+        changed = []
+        for name in names or _TABLES:
+            with span(f'catalogue.fetch.{name}'):
+                df = await self.fetch(name)
+            if df.empty:
+                if self._snapshots.pop(name, None) is not None:
+                    changed.append(name)
+                continue
+            digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()
+                                  + repr(list(df.columns)).encode()).hexdigest()
+            previous = self._snapshots.get(name)
+            if previous is not None and previous[1] == digest:
+                continue
+            self._snapshots[name] = ((previous[0] + 1) if previous else 1, digest, df)
+            changed.append(name)
+        if changed:
+            logger.info("catalogue tables refreshed from MongoDB: %s", ", ".join(changed))
+        return changed
+
+    async def _watch_change_streams(self):
+        collections = {self.prefix + name: name for name in _TABLES}
+        pipeline = [{'$match': {'ns.coll': {'$in': list(collections)}}}]
+        async with self.database.watch(pipeline) as stream:
+            while stream.alive:
+                change = await stream.next()
+                names = {collections.get(change.get('ns', {}).get('coll'))}
+                # Coalesce a burst of writes into one reload per table
+                while (change := await stream.try_next()) is not None:
+                    names.add(collections.get(change.get('ns', {}).get('coll')))
+                await self.refresh(sorted(n for n in names if n))
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("catalogue refresh from MongoDB failed")
+
+    async def watch(self):
+        """Keep snapshots fresh: change streams when the server supports them, else polling."""
+        if self.refresh_mode in ('auto', 'change_stream'):
+            try:
+                await self._watch_change_streams()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.refresh_mode == 'change_stream':
+                    raise
+                logger.info("change streams unavailable (%s); polling every %gs", e, self.poll_seconds)
+        await self._poll()
+
+    async def start(self):
+        await self.refresh()
+        self._watcher = asyncio.get_running_loop().create_task(self.watch())
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._watcher = None
+
+
+_BACKENDS = {'csv': CSVBackend, 'parquet': ParquetBackend, 'mongo': MongoBackend}
+_backend: Optional[CatalogueBackend] = None
+
+
+def _backend_from_settings() -> CatalogueBackend:
+    kind = settings.CATALOGUE_BACKEND.lower()
+    if kind not in _BACKENDS:
+        raise ValueError(f"Unknown CATALOGUE_BACKEND '{kind}'. Choose one of: {', '.join(_BACKENDS)}")
+    if kind == 'mongo':
+        return MongoBackend(prefix=settings.CATALOGUE_MONGO_PREFIX,
+                            batch_size=settings.CATALOGUE_MONGO_BATCH_SIZE,
+                            refresh=settings.CATALOGUE_REFRESH,
+                            poll_seconds=settings.CATALOGUE_POLL_SECONDS)
+    return _BACKENDS[kind]()
+
+
+def get_backend() -> CatalogueBackend:
+    global _backend
+    if _backend is None:
+        _backend = _backend_from_settings()
+    return _backend
+
+
+def set_backend(backend: Optional[CatalogueBackend]):
+    """Swap the table source (None → back to CATALOGUE_BACKEND); cached tables reload on next use."""
+    global _backend
+    _backend = backend
+
+
+async def start():
+    await get_backend().start()
+
+
+async def stop():
+    await get_backend().stop()
+
+
+# ── Tables ────────────────────────────────────────────────────────────────────
+class Table:
+    """One loaded table. Hand out views only — the underlying frame is shared by every request."""
+
+    def __init__(self, name: str, source: str, version: tuple, frame: pd.DataFrame):
+        self.name = name
+        self.source = source
+        self.version = version
+        # When the data last changed: the file's mtime, or when this process loaded it
+        self.modified = os.path.getmtime(source) if os.path.isfile(source) else time.time()
+        self._frame = frame
+
+    def __len__(self) -> int:
+        return len(self._frame)
+
+    def frame(self) -> pd.DataFrame:
+        """Zero-copy DataFrame; copy-on-write keeps edits by the caller private."""
+        return self._frame.copy(deep=False)
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only numpy view of a column (categoricals: see `codes`)."""
+        arr = self._frame[name].to_numpy()
+        if arr.flags.writeable:
+            arr = arr.view()
+            arr.flags.writeable = False
+        return arr
+
+    def codes(self, name: str) -> Tuple[np.ndarray, pd.Index]:
+        """(read-only integer codes, categories) of a categorical column."""
+        cat = self._frame[name].cat
+        codes = cat.codes.to_numpy()
+        if codes.flags.writeable:
+            codes = codes.view()
+            codes.flags.writeable = False
+        return codes, cat.categories
+
+
+_lock = threading.Lock()
+_tables: Dict[str, Table] = {}
+
+
+def table(name: str) -> Table:
+    """The named table, re-read from the backend if it changed since the last load."""
+    prepare = _TABLES[name]
+    backend = get_backend()
+    source = backend.source(name)
+    version = backend.version(name)
+
+    cached = _tables.get(name)
+    if cached is not None and cached.source == source and cached.version == version:
+        record_cache('catalogue', True)
+        return cached
+    with _lock:
+        cached = _tables.get(name)
+        if cached is not None and cached.source == source and cached.version == version:
+            record_cache('catalogue', True)
+            return cached
+        record_cache('catalogue', False)
+        with span(f'catalogue.load.{name}'):
+            frame = prepare(backend.load(name))
+        loaded = Table(name, source, version, frame)
+        _tables[name] = loaded
+        return loaded
+
+
+def courses() -> Table:
+    return table('courses')
+
+
+def job_roles() -> Table:
+    return table('job_roles')
+
+
+def nsqf_levels() -> Table:
+    return table('nsqf_levels')
+
+
+def job_market() -> Table:
+    return table('job_market')
+
+
+def qualification_levels() -> Table:
+    return table('qualification_levels')
@@ -0,0 +1,168 @@
+"""
+Compiled Random Forest
+Inference-only form of a fitted scikit-learn RandomForestClassifier: the
+node feature, threshold, child and leaf-probability arrays of every tree,
+packed contiguously into one set of flat NumPy arrays. Prediction descends
+all trees for a whole batch of rows at once — one vectorised step per tree
+level — instead of dispatching each tree through sklearn's validation and
+joblib machinery, which dominates single-row `predict_proba` latency.
+
+Children are interleaved (`children[2·node + goes_right]`) so a step is
+one gather, and leaves point to themselves, so every (row, tree) pair takes
+exactly `depth` steps with no per-tree branching. Thresholds are stored as the
+largest float32 not above sklearn's float64 threshold; inputs are float32
+(as sklearn casts them), so every split goes the same way as in sklearn and
+probabilities agree up to float32 rounding of the leaf values.
+
+The compiled arrays are written as an .npz next to the forest's pickle at
+train/rebuild time and loaded instead of unpickling the forest.
+"""
+import os
+import pickle
+from typing import Optional, Tuple
+import numpy as np
+from scipy import sparse
+
+from app.core.singleflight import atomic_write
+
+# Rows densified per descent chunk are capped at this many float32 cells (16 MB)
+_CHUNK_CELLS = 1 << 22
+
+
+def _float32_floor(threshold: np.ndarray) -> np.ndarray:
+    """Largest float32 ≤ each float64 threshold, so `x32 <= t32` ⇔ `x32 <= t64`."""
+    t32 = threshold.astype(np.float32)
+    over = t32.astype(np.float64) > threshold
+    t32[over] = np.nextafter(t32[over], np.float32(-np.inf))
+    return t32
+
+
+class CompiledForest:
+    """Flat-array forest with the `predict_proba` / `classes_` / `n_features_in_` of the original."""
+
+    def __init__(self, feature, threshold, children, value, roots, depth: int,
+                 classes, n_features: int):
+        self.feature   = feature      # int32  (nodes,)     split feature; 0 on leaves
+        self.threshold = threshold    # float32 (nodes,)    +inf on leaves
+        self.children  = children     # int32  (2·nodes,)   [left, right] per node; leaves point to themselves
+        self.value     = value        # float32 (nodes, n_classes) normalised class probabilities
+        self.roots     = roots        # int32  (trees,)     root node of each tree
+        self.depth     = int(depth)
+        self.classes_  = classes
+        self.n_features_in_ = int(n_features)
+        self.n_estimators = len(roots)
+
+    # ── Build ─────────────────────────────────────────────────────────────────
+    @classmethod
+    def from_sklearn(cls, forest) -> 'CompiledForest':
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError("only single-output forests can be compiled")
+        trees = [est.tree_ for est in forest.estimators_]
+        counts = np.array([t.node_count for t in trees], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        if counts.sum() >= np.iinfo(np.int32).max:
+            raise ValueError("forest too large for int32 node indices")
+
+        feature, threshold, children, value = [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            leaf = tree.children_left == -1
+            nodes = np.arange(tree.node_count) + offset
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(np.where(leaf, np.inf, tree.threshold))
+            children.append(np.column_stack([np.where(leaf, nodes, tree.children_left + offset),
+                                             np.where(leaf, nodes, tree.children_right + offset)]).ravel())
+            # Same per-leaf normalisation as DecisionTreeClassifier.predict_proba
+            v = tree.value[:, 0, :]
+            total = v.sum(axis=1, keepdims=True)
+            total[total == 0.0] = 1.0
+            value.append(v / total)
+
+        return cls(
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=_float32_floor(np.concatenate(threshold)),
+            children=np.concatenate(children).astype(np.int32),
+            value=np.concatenate(value).astype(np.float32),
+            roots=offsets.astype(np.int32),
+            depth=max(t.max_depth for t in trees),
+            classes=np.asarray(forest.classes_),
+            n_features=forest.n_features_in_,
+        )
+
+    # ── Inference ─────────────────────────────────────────────────────────────
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node reached in every tree, (rows, trees), for a dense float32 block."""
+        n, d = X.shape
+        flat = X.ravel()
+        row_base = (np.arange(n, dtype=np.int64) * d)[:, None]
+        node = np.broadcast_to(self.roots, (n, self.n_estimators))
+        for _ in range(self.depth):
+            goes_right = flat.take(row_base + self.feature.take(node)) > self.threshold.take(node)
+            node = self.children.take(2 * node + goes_right)
+        return node
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Mean of the trees' leaf probabilities, (rows, n_classes) float64 — like sklearn."""
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but the forest expects {self.n_features_in_}")
+        n = X.shape[0]
+        out = np.empty((n, len(self.classes_)), dtype=np.float64)
+        step = max(1, _CHUNK_CELLS // max(1, self.n_features_in_))
+        for start in range(0, n, step):
+            block = X[start:start + step]
+            block = block.toarray() if sparse.issparse(block) else np.asarray(block)
+            leaves = self._leaves(np.ascontiguousarray(block, dtype=np.float32))
+            out[start:start + step] = self.value.take(leaves, axis=0).mean(axis=1, dtype=np.float64)
+        return out
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children, self.value, self.roots))
+
+    # ── Artifact ──────────────────────────────────────────────────────────────
+    def save(self, path: str, source: Optional[Tuple[int, int]] = None):
+        """Write an .npz atomically; `source` is (size, mtime_ns) of the pickle it came from."""
+        with atomic_write(path) as f:
+            np.savez(f, feature=self.feature, threshold=self.threshold, children=self.children,
+                     value=self.value, roots=self.roots,
+                     depth=np.int64(self.depth), classes=self.classes_,
+                     n_features=np.int64(self.n_features_in_),
+                     source=np.asarray(source if source is not None else (-1, -1), dtype=np.int64))
+
+    @classmethod
+    def load(cls, path: str) -> Tuple['CompiledForest', Tuple[int, int]]:
+        with np.load(path, allow_pickle=False) as z:
+            forest = cls(z['feature'], z['threshold'], z['children'], z['value'],
+                         z['roots'], int(z['depth']), z['classes'], int(z['n_features']))
+            return forest, tuple(int(v) for v in z['source'])
+
+
+def _source_of(pickle_path: str) -> Tuple[int, int]:
+    st = os.stat(pickle_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def save_compiled(forest, pickle_path: str, npz_path: str) -> CompiledForest:
+    """Compile `forest` (already pickled at `pickle_path`) and write it to `npz_path`."""
+    compiled = CompiledForest.from_sklearn(forest)
+    compiled.save(npz_path, source=_source_of(pickle_path))
+    return compiled
+
+
+def load_compiled(pickle_path: str, npz_path: str) -> CompiledForest:
+    """
+    The compiled forest for `pickle_path`: its .npz when it was built from the
+    pickle now on disk, otherwise compiled in memory from the pickle (models
+    trained before compilation existed, or an .npz left over from another model).
+    """
+    if os.path.exists(npz_path):
+        try:
+            compiled, source = CompiledForest.load(npz_path)
+            if source == _source_of(pickle_path):
+                return compiled
+        except (OSError, ValueError, KeyError):
+            pass
+    with open(pickle_path, 'rb') as f:
+        return CompiledForest.from_sklearn(pickle.load(f))
@@ -0,0 +1,256 @@
+"""
+Background Training Jobs
+Model (re)training runs in a separate process pool, so /train and
+/skill-gap/rebuild return a job id at once instead of holding a request
+worker for the whole fit. A request for a model that is already queued or
+training joins that job. On success the new artifacts (swapped in atomically,
+see app.core.singleflight) are loaded here before the job reports success,
+so serving moves to the new model without a gap; other workers pick it up
+on their next request through the artifact-version checks.
+
+Job state lives in the process that accepted the job — with several uvicorn
+workers, poll /jobs/{id} through the same worker (or run one job worker).
+"""
+import time
+import uuid
+import asyncio
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import JOB_SECONDS
+from app.services import catalogue
+
+logger = logging.getLogger("careersetu.jobs")
+
+
+# ── Worker-process side ───────────────────────────────────────────────────────
+_progress_queue = None
+
+
+def _init_worker(queue):
+    global _progress_queue
+    _progress_queue = queue
+
+
+def _reporter(job_id: str):
+    def report(fraction: float, stage: str):
+        if _progress_queue is not None:
+            _progress_queue.put((job_id, fraction, stage))
+    return report
+
+
+def _sync_catalogue():
+    # A fresh process has no Mongo snapshot until it has fetched one
+    backend = catalogue.get_backend()
+    if backend.kind == 'mongo':
+        asyncio.run(backend.refresh())
+
+
+def _train_recommender(job_id: str) -> dict:
+    from app.services import recommender
+    _reporter(job_id)(0.0, 'started')
+    _sync_catalogue()
+    count = recommender.train_and_save(progress=_reporter(job_id))
+    return {"courses_indexed": count, "model_version": recommender.model_version()}
+
+
+def _train_skill_gap(job_id: str) -> dict:
+    from app.routers import skill_gap
+    _reporter(job_id)(0.0, 'started')
+    _sync_catalogue()
+    report = skill_gap.rebuild_skill_gap_model(progress=_reporter(job_id))
+    report['model_version'] = skill_gap.model_version()
+    return report
+
+
+# ── Serving side ──────────────────────────────────────────────────────────────
+def _load_recommender():
+    from app.services import recommender
+    recommender._load_model()
+
+
+def _load_skill_gap():
+    from app.routers import skill_gap
+    skill_gap._get_model()
+    skill_gap._get_pair_model()
+
+
+# kind → (runs in the pool, loads the result in this process)
+TASKS = {
+    'recommender': (_train_recommender, _load_recommender),
+    'skill_gap':   (_train_skill_gap,   _load_skill_gap),
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Job:
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'          # queued → running → succeeded | failed
+        self.progress = 0.0
+        self.stage = 'queued'
+        self.submitted_at = _now()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+        self._t0 = time.perf_counter()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running')
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id":       self.id,
+            "kind":         self.kind,
+            "status":       self.status,
+            "progress":     round(self.progress, 3),
+            "stage":        self.stage,
+            "submitted_at": self.submitted_at,
+            "started_at":   self.started_at,
+            "finished_at":  self.finished_at,
+            "duration_ms":  self.duration_ms,
+            "result":       self.result,
+            "error":        self.error,
+        }
+
+
+class JobQueue:
+    def __init__(self, max_workers: int, history: int):
+        self.max_workers = max_workers
+        self.history = history
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, str] = {}      # kind → id of its queued/running job
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the serving process runs threads that fork would copy mid-flight
+            ctx = multiprocessing.get_context('spawn')
+            self._queue = ctx.Queue()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx,
+                                             initializer=_init_worker, initargs=(self._queue,))
+            threading.Thread(target=self._drain, args=(self._queue,), name='job-progress', daemon=True).start()
+        return self._pool
+
+    def submit(self, kind: str) -> Tuple[Job, bool]:
+        """Queue a training job for `kind`; returns (job, created) — an active job is reused."""
+        if kind not in TASKS:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        with self._lock:
+            active = self._active.get(kind)
+            if active is not None:
+                return self._jobs[active], False
+            job = Job(kind)
+            self._jobs[job.id] = job
+            self._active[kind] = job.id
+            self._prune()
+            future = self._executor().submit(TASKS[kind][0], job.id)
+        future.add_done_callback(lambda f: threading.Thread(
+            target=self._finish, args=(job, f), name=f'job-{kind}', daemon=True).start())
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def recent(self) -> List[Job]:
+        return list(reversed(self._jobs.values()))
+
+    def _prune(self):
+        while len(self._jobs) > self.history:
+            oldest = next((k for k, j in self._jobs.items() if not j.active), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest]
+
+    def _drain(self, queue):
+        while True:
+            try:
+                msg = queue.get()
+            except (EOFError, OSError):
+                return
+            if msg is None:
+                return
+            job_id, fraction, stage = msg
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                continue
+            if job.status == 'queued':
+                job.status, job.started_at = 'running', _now()
+            job.progress, job.stage = max(job.progress, fraction), stage
+
+    def _finish(self, job: Job, future: Future):
+        try:
+            job.result = future.result()
+            job.stage = 'loading'
+            # Serve the new artifacts here before reporting success
+            TASKS[job.kind][1]()
+            job.status, job.progress, job.stage = 'succeeded', 1.0, 'done'
+        except Exception as e:
+            logger.exception("training job %s (%s) failed", job.id, job.kind)
+            job.status, job.error = 'failed', f"{type(e).__name__}: {e}"
+        job.finished_at = _now()
+        elapsed = time.perf_counter() - job._t0
+        job.duration_ms = round(elapsed * 1000, 2)
+        JOB_SECONDS.observe(elapsed, kind=job.kind, status=job.status)
+        with self._lock:
+            if self._active.get(job.kind) == job.id:
+                del self._active[job.kind]
+        job.done.set()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._queue.put(None)
+            self._pool = None
+
+
+_queue = JobQueue(settings.JOBS_MAX_WORKERS, settings.JOBS_HISTORY)
+
+
+def submit(kind: str) -> Tuple[Job, bool]:
+    return _queue.submit(kind)
+
+
+def get(job_id: str) -> Optional[Job]:
+    return _queue.get(job_id)
+
+
+def recent() -> List[Job]:
+    return _queue.recent()
+
+
+async def wait(job: Job, timeout: Optional[float] = None) -> Job:
+    """Await the job without blocking the event loop."""
+    await asyncio.get_running_loop().run_in_executor(None, job.done.wait, timeout)
+    return job
+
+
+def accepted(job: Job, created: bool) -> dict:
+    """202 response body for a queued (or joined) job."""
+    return {
+        "job_id":       job.id,
+        "kind":         job.kind,
+        "status":       job.status,
+        "status_url":   f"/api/v1/jobs/{job.id}",
+        "deduplicated": not created,
+    }
+
+
+def shutdown():
+    _queue.shutdown()
@@ -0,0 +1,326 @@
+"""
+Job-market Regression Statistics
+Running sufficient statistics per skill — n, Σx, Σx², and Σy, Σxy for both
+demand and salary, with x = year − MARKET_REFERENCE_YEAR — so the demand and
+salary lines update in O(1) per observation instead of being refitted on a
+skill's whole history each request.
+
+The catalogue's job_market table seeds the statistics (recomputed when its
+version changes). Observations ingested through /market/observations are
+written append-only as Parquet part files, folded into a JSON snapshot every
+MARKET_SNAPSHOT_EVERY parts, and on startup only the parts newer than the
+snapshot are replayed.
+
+Several processes may share one observation directory (uvicorn --workers, or
+instances on shared storage): writers serialise on `<dir>/observations.lock`,
+number parts from what is on disk and create them exclusively, and every
+process folds in parts written by the others before answering.
+"""
+import os
+import re
+import json
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.core.singleflight import atomic_write, default_file_mode, file_lock
+from app.services import catalogue
+
+_PART_RE = re.compile(r"^part-(\d{10})\.parquet$")
+_SNAPSHOT = "snapshot.json"
+
+
+class SkillStats:
+    """Least-squares sums for one skill, plus the latest observation for growth %."""
+
+    __slots__ = ('name', 'n', 'sx', 'sxx', 'sd', 'sxd', 'ss', 'sxs', 'last_year', 'last_demand')
+
+    def __init__(self, name: str = ''):
+        self.name = name
+        self.n = self.sx = self.sxx = 0.0
+        self.sd = self.sxd = self.ss = self.sxs = 0.0
+        self.last_year: Optional[int] = None
+        self.last_demand = 0.0
+
+    def add(self, n, sx, sxx, sd, sxd, ss, sxs, last_year: int, last_demand: float):
+        """Fold in the sums of one or more observations (later data wins year ties)."""
+        self.n += n;   self.sx += sx;   self.sxx += sxx
+        self.sd += sd; self.sxd += sxd; self.ss += ss; self.sxs += sxs
+        if self.last_year is None or last_year >= self.last_year:
+            self.last_year, self.last_demand = int(last_year), float(last_demand)
+
+    def merged(self, other: 'SkillStats') -> 'SkillStats':
+        out = SkillStats(self.name or other.name)
+        for stats in (self, other):
+            if stats.n:
+                out.add(*stats.to_list()[1:])
+        return out
+
+    def _line(self, sy: float, sxy: float) -> Tuple[float, float]:
+        # Ordinary least squares; a single distinct year gives a flat line at the mean
+        denom = self.n * self.sxx - self.sx * self.sx
+        slope = (self.n * sxy - self.sx * sy) / denom if denom else 0.0
+        return slope, (sy - slope * self.sx) / self.n
+
+    def predict(self, year: int) -> Tuple[float, float]:
+        """(demand, salary) on the fitted lines at `year`."""
+        x = year - settings.MARKET_REFERENCE_YEAR
+        d_slope, d_icpt = self._line(self.sd, self.sxd)
+        s_slope, s_icpt = self._line(self.ss, self.sxs)
+        return d_icpt + d_slope * x, s_icpt + s_slope * x
+
+    def to_list(self) -> list:
+        return [self.name, self.n, self.sx, self.sxx, self.sd, self.sxd, self.ss, self.sxs,
+                self.last_year, self.last_demand]
+
+    @classmethod
+    def from_list(cls, values: list) -> 'SkillStats':
+        stats = cls(values[0])
+        stats.add(*values[1:])
+        return stats
+
+
+def _fold(into: Dict[str, SkillStats], df: pd.DataFrame):
+    """Add the rows of `df` (year, skill, demand_count, avg_salary) to `into`, one group per skill."""
+    if df.empty:
+        return
+    key = df['skill'].astype(str).str.lower().str.strip()
+    x = (df['year'].to_numpy(dtype=np.int64) - settings.MARKET_REFERENCE_YEAR).astype(np.float64)
+    d = df['demand_count'].to_numpy(dtype=np.float64)
+    s = df['avg_salary'].to_numpy(dtype=np.float64)
+    terms = pd.DataFrame({'key': key.to_numpy(), 'name': df['skill'].astype(str).to_numpy(),
+                          'n': 1.0, 'sx': x, 'sxx': x * x, 'sd': d, 'sxd': x * d, 'ss': s, 'sxs': x * s,
+                          'year': df['year'].to_numpy(dtype=np.int64), 'demand': d})
+    sums = terms.groupby('key', sort=False)[['n', 'sx', 'sxx', 'sd', 'sxd', 'ss', 'sxs']].sum()
+    # Latest row per skill; stable sort keeps arrival order among equal years
+    last = terms.sort_values('year', kind='stable').groupby('key', sort=False).last()
+    for k, row in zip(sums.index, sums.itertuples(index=False)):
+        stats = into.get(k)
+        if stats is None:
+            stats = into[k] = SkillStats(last.at[k, 'name'])
+        stats.add(*row, last.at[k, 'year'], last.at[k, 'demand'])
+
+
+# ── Catalogue seed ────────────────────────────────────────────────────────────
+_base_lock = threading.Lock()
+_base: Dict[str, tuple] = {}
+
+
+def _base_stats() -> Dict[str, SkillStats]:
+    """Statistics of the catalogue table, rebuilt only when its version changes."""
+    table = catalogue.job_market()
+    key = (table.source, table.version, settings.MARKET_REFERENCE_YEAR)
+    cached = _base.get('stats')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with _base_lock:
+        cached = _base.get('stats')
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        stats: Dict[str, SkillStats] = {}
+        _fold(stats, table.frame())
+        _base['stats'] = (key, stats)
+        return stats
+
+
+# ── Ingested observations ─────────────────────────────────────────────────────
+class ObservationLog:
+    """
+    Append-only Parquet parts plus a snapshot of the statistics they add up
+    to. Safe to share between processes: see the module docstring.
+    """
+
+    def __init__(self, directory: str, snapshot_every: int):
+        self.directory = directory
+        self.snapshot_every = max(1, snapshot_every)
+        self.stats: Dict[str, SkillStats] = {}
+        self.seq = 0              # last part folded into `stats`
+        self.snapshot_seq = 0     # last part folded into snapshot.json
+        self.modified: Optional[float] = None   # when the last part was written
+        self._dir_mtime: Optional[int] = None   # directory mtime when parts were last listed
+        self._lock = threading.Lock()
+        self._recover()
+
+    @property
+    def _lock_path(self) -> str:
+        return os.path.join(self.directory, 'observations')
+
+    def _stat_dir(self) -> Optional[int]:
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _parts(self) -> List[Tuple[int, str]]:
+        if not os.path.isdir(self.directory):
+            return []
+        found = [(int(m.group(1)), name) for name in os.listdir(self.directory)
+                 if (m := _PART_RE.match(name))]
+        return sorted(found)
+
+    def _recover(self):
+        path = os.path.join(self.directory, _SNAPSHOT)
+        if os.path.exists(path):
+            with open(path) as f:
+                snap = json.load(f)
+            # Sums are taken around the reference year; a different one means replaying everything
+            if snap.get('reference_year') == settings.MARKET_REFERENCE_YEAR:
+                self.stats = {k: SkillStats.from_list(v) for k, v in snap['skills'].items()}
+                self.snapshot_seq = self.seq = int(snap['seq'])
+        self._dir_mtime = self._stat_dir()
+        for seq, name in self._parts():
+            if seq > self.snapshot_seq:
+                _fold(self.stats, pd.read_parquet(os.path.join(self.directory, name)))
+            self.seq = max(self.seq, seq)
+            self.modified = max(self.modified or 0.0, os.path.getmtime(os.path.join(self.directory, name)))
+
+    def _merge(self, df: pd.DataFrame):
+        # Readers run unlocked, so updated skills are swapped in as new objects
+        batch: Dict[str, SkillStats] = {}
+        _fold(batch, df)
+        for k, stats in batch.items():
+            old = self.stats.get(k)
+            self.stats[k] = stats if old is None else old.merged(stats)
+
+    def _catch_up(self):
+        """Fold in parts other processes wrote since we last looked (caller holds `_lock`)."""
+        self._dir_mtime = self._stat_dir()
+        for seq, name in self._parts():
+            if seq > self.seq:
+                path = os.path.join(self.directory, name)
+                self._merge(pd.read_parquet(path))
+                self.seq = seq
+                self.modified = max(self.modified or 0.0, os.path.getmtime(path))
+
+    def refresh(self):
+        """Pick up other writers' parts; costs one stat when the directory is unchanged."""
+        if self._stat_dir() == self._dir_mtime:
+            return
+        with self._lock:
+            if self._stat_dir() != self._dir_mtime:
+                self._catch_up()
+
+    def append(self, df: pd.DataFrame) -> int:
+        """Persist `df` as the next part, then fold it in. Returns the part number."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with file_lock(self._lock_path):
+                self._catch_up()
+                seq = self._publish(df, self.seq + 1)
+                # Folds our part (and any a lock-ignoring writer slipped in before it)
+                self._catch_up()
+                if self.seq - self.snapshot_seq >= self.snapshot_every:
+                    self._write_snapshot()
+            return seq
+
+    def _publish(self, df: pd.DataFrame, seq: int) -> int:
+        """
+        Write `df` complete under a temporary name, then link it in as part `seq`.
+        The link fails rather than overwrite if that part exists (a writer that
+        does not honour the lock), in which case the next free number is used.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.part-', suffix='.tmp')
+        try:
+            default_file_mode(fd)
+            with os.fdopen(fd, 'wb') as f:
+                df.to_parquet(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            while True:
+                try:
+                    os.link(tmp, os.path.join(self.directory, f"part-{seq:010d}.parquet"))
+                    return seq
+                except FileExistsError:
+                    seq += 1
+        finally:
+            os.remove(tmp)
+
+    def snapshot(self):
+        with self._lock:
+            if not os.path.isdir(self.directory):
+                return
+            with file_lock(self._lock_path):
+                self._catch_up()
+                if self.seq != self.snapshot_seq:
+                    self._write_snapshot()
+
+    def _write_snapshot(self):
+        snap = {
+            'reference_year': settings.MARKET_REFERENCE_YEAR,
+            'seq':            self.seq,
+            'skills':         {k: v.to_list() for k, v in self.stats.items()},
+        }
+        with atomic_write(os.path.join(self.directory, _SNAPSHOT), 'w') as f:
+            json.dump(snap, f)
+        self.snapshot_seq = self.seq
+
+
+_log_lock = threading.Lock()
+_logs: Dict[str, ObservationLog] = {}
+
+
+def observation_dir() -> str:
+    return settings.MARKET_OBSERVATIONS_DIR or catalogue.data_path('market_observations')
+
+
+def observation_log() -> ObservationLog:
+    directory = observation_dir()
+    log = _logs.get(directory)
+    if log is None:
+        with _log_lock:
+            log = _logs.get(directory)
+            if log is None:
+                log = _logs[directory] = ObservationLog(directory, settings.MARKET_SNAPSHOT_EVERY)
+    log.refresh()
+    return log
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+def skill_stats(skill: str) -> Optional[SkillStats]:
+    """Catalogue plus ingested statistics for `skill`, or None if it was never observed."""
+    key = skill.lower().strip()
+    base = _base_stats().get(key)
+    extra = observation_log().stats.get(key)
+    if base is None or extra is None:
+        return base or extra
+    return base.merged(extra)
+
+
+def tracked_skills() -> List[str]:
+    """Catalogue skill names, then skills seen only through ingestion."""
+    names = catalogue.job_market().frame()['skill'].unique().tolist()
+    base = _base_stats()
+    names.extend(s.name for k, s in list(observation_log().stats.items()) if k not in base)
+    return names
+
+
+def version() -> tuple:
+    """Changes whenever the catalogue table or the ingested observations do."""
+    table = catalogue.job_market()
+    log = observation_log()
+    return (table.source, table.version, log.directory, log.seq)
+
+
+def modified() -> float:
+    """When the tracked market data last changed (catalogue table or latest ingest)."""
+    return max(catalogue.job_market().modified, observation_log().modified or 0.0)
+
+
+def ingest(df: pd.DataFrame) -> dict:
+    """Append observations (year, skill, demand_count, avg_salary) and update the statistics."""
+    df = df[['year', 'skill', 'demand_count', 'avg_salary']].reset_index(drop=True)
+    part = observation_log().append(df)
+    skills = df['skill'].astype(str).str.lower().str.strip().nunique()
+    return {"ingested": len(df), "skills_updated": int(skills), "part": part}
+
+
+def recover():
+    """Load the snapshot and replay newer parts (called at startup)."""
+    observation_log()
+
+
+def snapshot():
+    for log in list(_logs.values()):
+        log.snapshot()
@@ -1,16 +1,147 @@
+"""
+Learner Profiling — table-driven rule engine
+Qualification → NSQF level rules come from the catalogue's qualification_levels
+table and role → required-skill rules from its job_roles table. Both are
+compiled once (per table version) into Aho–Corasick keyword automata, so a
+lookup costs O(len(text)) however many roles the catalogue holds.
+"""
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
 from app.schemas.learner import LearnerProfileRequest, LearnerPathwayResponse, PathwayStep, CareerOutcomes
-# In a real scenario, we would load trained models here
-# form sklearn.externals import joblib
-# model = joblib.load('career_model.pkl')
+from app.services import catalogue
+
+_DEFAULT_LEVEL  = (1, "Default entry level.")
+_DEFAULT_SKILLS = ("industry knowledge", "communication")
+
+
+class KeywordMatcher:
+    """
+    Aho–Corasick automaton over lowercase keywords. `search` reports every
+    keyword occurring as a substring of the text — the same test as
+    `keyword in text`, but for all keywords in a single pass.
+    """
+
+    def __init__(self, keywords: List[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out:  List[List[int]] = [[]]
+        for idx, kw in enumerate(keywords):
+            node = 0
+            for ch in kw:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({}); self._fail.append(0); self._out.append([])
+                node = nxt
+            self._out[node].append(idx)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> set:
+        """Indices of all keywords found in `text`."""
+        found, node = set(), 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class _RuleSet:
+    """Compiled qualification and role rules for one version of the two tables."""
+
+    def __init__(self, qualification_df: pd.DataFrame, job_df: pd.DataFrame):
+        # Earlier CSV rows take priority, like the original if/elif chain
+        self.qualification_rules: List[Tuple[int, str]] = [
+            (int(r.nsqf_level), str(r.justification)) for r in qualification_df.itertuples()
+        ]
+        self.qualification_matcher = KeywordMatcher(list(qualification_df['keyword']))
+
+        # First row wins for duplicate role names
+        roles: Dict[str, Tuple[str, ...]] = {}
+        for role, skills in zip(job_df['job_role'], job_df['skills_list']):
+            name = str(role).lower().strip()
+            if name and name not in roles:
+                roles[name] = skills
+        self.role_names = list(roles)
+        self.role_skills = list(roles.values())
+        self.role_matcher = KeywordMatcher(self.role_names)
+
+    def nsqf_level(self, qualification: str) -> Tuple[int, str]:
+        hits = self.qualification_matcher.search(qualification.lower())
+        return self.qualification_rules[min(hits)] if hits else _DEFAULT_LEVEL
+
+    def required_skills(self, target_role: str) -> Tuple[str, ...]:
+        """Skills of the longest role name contained in `target_role` (ties → CSV order)."""
+        hits = self.role_matcher.search(target_role.lower())
+        if not hits:
+            return _DEFAULT_SKILLS
+        best = min(hits, key=lambda i: (-len(self.role_names[i]), i))
+        return self.role_skills[best]
+
+
+_rules_lock = threading.Lock()
+_rules_cache: Dict[str, tuple] = {}
+
+
+def _load_rules() -> _RuleSet:
+    """Compile rules on first use and again only when either table changes."""
+    qualifications = catalogue.qualification_levels()
+    jobs = catalogue.job_roles()
+    key = (qualifications.source, qualifications.version, jobs.source, jobs.version)
+    cached = _rules_cache.get('rules')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with _rules_lock:
+        cached = _rules_cache.get('rules')
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        rules = _RuleSet(qualifications.frame(), jobs.frame())
+        _rules_cache['rules'] = (key, rules)
+        return rules
+
+
+# ── Pathway templates (validated once at import) ──────────────────────────────
+_FOUNDATION = PathwayStep(step_name="Foundation", description="Basic industry orientation", duration="1 Month")
+_PRACTICAL  = PathwayStep(step_name="Practical Training", description="On-job training or simulation", duration="2 Months")
+_CORE_TEMPLATE     = PathwayStep(step_name="Core Certification",
+                                 description="NSQF Level {level} Certification in {role}", duration="3 Months")
+_ADVANCED_TEMPLATE = PathwayStep(step_name="Advanced Certification",
+                                 description="NSQF Level {next_level} Specialization", duration="6 Months")
+
+
+def _from_template(template: PathwayStep, **values) -> PathwayStep:
+    # Fields were validated on the template; only the description text changes
+    return PathwayStep.model_construct(step_name=template.step_name,
+                                       description=template.description.format(**values),
+                                       duration=template.duration)
+
 
 class ProfilingService:
     def analyze_learner(self, profile: LearnerProfileRequest) -> LearnerPathwayResponse:
+        rules = _load_rules()
+
         # 1. Determine NSQF Level based on qualification
-        nsqf_level, justification = self._determine_nsqf_level(profile.academic_info.highest_qualification)
-        
+        nsqf_level, justification = self._determine_nsqf_level(profile.academic_info.highest_qualification, rules)
+
         # 2. Identify Skill Gaps
-        skill_gaps = self._analyze_skill_gaps(profile.skills.technical_skills, profile.career_aspirations.target_role)
-        
+        skill_gaps = self._analyze_skill_gaps(profile.skills.technical_skills, profile.career_aspirations.target_role, rules)
+
         # 3. Generate Pathway
         pathway = self._generate_pathway(nsqf_level, profile.career_aspirations.target_role)
 
@@ -29,56 +160,27 @@ class ProfilingService:
             career_outcomes=outcomes
         )
 
-    def _determine_nsqf_level(self, qualification: str):
-        qualification = qualification.lower()
-        if "8th" in qualification or "below" in qualification:
-            return 1, "Entry level due to basic schooling."
-        elif "10th" in qualification:
-            return 3, "Standard entry for trade roles."
-        elif "12th" in qualification:
-            return 4, "Higher secondary qualified."
-        elif "diploma" in qualification:
-            return 5, "Technical diploma holder."
-        elif "graduate" in qualification or "btech" in qualification or "degree" in qualification:
-            return 6, "Graduate level entry."
-        else:
-            return 1, "Default entry level."
-
-    def _analyze_skill_gaps(self, current_skills, target_role):
-        # Mock logic
-        required_skills = {
-            "developer": ["python", "sql", "git"],
-            "data scientist": ["python", "statistics", "ml"],
-            "electrician": ["wiring", "safety", "tools"]
-        }
-        
-        target = target_role.lower()
-        needed = []
-        for role, skills in required_skills.items():
-            if role in target:
-                needed = skills
-                break
-        
-        if not needed:
-            needed = ["industry knowledge", "communication"]
-
-        current_lower = [s.lower() for s in current_skills]
+    def _determine_nsqf_level(self, qualification: str, rules: Optional[_RuleSet] = None):
+        return (rules or _load_rules()).nsqf_level(qualification)
+
+    def _analyze_skill_gaps(self, current_skills, target_role, rules: Optional[_RuleSet] = None):
+        needed = (rules or _load_rules()).required_skills(target_role)
+        current_lower = {s.lower() for s in current_skills}
         gaps = [s for s in needed if s not in current_lower]
         return gaps if gaps else ["Advanced specialized skills"]
 
     def _generate_pathway(self, start_level, role):
-        steps = []
-        steps.append(PathwayStep(step_name="Foundation", description="Basic industry orientation", duration="1 Month"))
-        steps.append(PathwayStep(step_name="Core Certification", description=f"NSQF Level {start_level} Certification in {role}", duration="3 Months"))
-        steps.append(PathwayStep(step_name="Practical Training", description="On-job training or simulation", duration="2 Months"))
-        
+        steps = [
+            _FOUNDATION,
+            _from_template(_CORE_TEMPLATE, level=start_level, role=role),
+            _PRACTICAL,
+        ]
         if start_level >= 4:
-            steps.append(PathwayStep(step_name="Advanced Certification", description=f"NSQF Level {start_level+1} Specialization", duration="6 Months"))
-
+            steps.append(_from_template(_ADVANCED_TEMPLATE, next_level=start_level + 1))
         return steps
 
     def _predict_outcomes(self, role):
-        return CareerOutcomes(
+        return CareerOutcomes.model_construct(
             entry_level=f"Junior {role}",
             mid_level=f"Senior {role}",
             future_specialization=f"Lead {role} / Specialist"
@@ -4,57 +4,41 @@ Recommends vocational courses based on learner skills, interest,
 NSQF level, preferred duration, and target job role.
 """
 import os
-import re
 import pickle
+import hashlib
+from typing import Callable, Optional
+import numpy as np
 import pandas as pd
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from app.core import fastjson
+from app.core.cache import ByteLRU
+from app.core.config import settings
+from app.core.metrics import span, record_cache, set_model_version
+from app.core.singleflight import SingleFlight, atomic_write, file_lock
+from app.services import catalogue
 
 # ── Paths ────────────────────────────────────────────────────────────────────
 _DIR = os.path.dirname(os.path.abspath(__file__))
-
-def _find_project_root(start: str) -> str:
-    """Walk up from `start` until we find a directory containing backend/data/courses.csv."""
-    current = start
-    for _ in range(10):   # max 10 levels up
-        candidate = os.path.join(current, 'backend', 'data', 'courses.csv')
-        if os.path.exists(candidate):
-            return current
-        parent = os.path.dirname(current)
-        if parent == current:
-            break
-        current = parent
-    raise FileNotFoundError(
-        f"Could not find 'backend/data/courses.csv' by walking up from: {start}"
-    )
-
-_PROJECT_ROOT = _find_project_root(_DIR)
-_CSV_PATH = os.path.join(_PROJECT_ROOT, 'backend', 'data', 'courses.csv')
 _PKL_DIR  = os.path.join(_DIR, '..', 'models')
 _VEC_PATH = os.path.join(_PKL_DIR, 'vectorizer.pkl')
 _MAT_PATH = os.path.join(_PKL_DIR, 'recommender.pkl')
 _DF_PATH  = os.path.join(_PKL_DIR, 'courses_df.pkl')
+_LSA_PATH = os.path.join(_PKL_DIR, 'lsa_svd.pkl')
+_EMB_PATH = os.path.join(_PKL_DIR, 'lsa_embeddings.npy')
+# Guards the artifact set: exclusive while (re)training, shared while loading
+_LOCK_PATH = os.path.join(_PKL_DIR, 'recommender')
 
-
-
-def _parse_months(duration_str: str) -> int:
-    """Extract the numeric month count from a duration string like '6 Months' or '1 Month'."""
-    if not isinstance(duration_str, str):
-        return 999
-    m = re.search(r'(\d+)', duration_str)
-    return int(m.group(1)) if m else 999
+# Loaded artifacts, reused until the pickles on disk change
+_model_cache = {}
+# Concurrent first requests share one train / load instead of racing
+_flight = SingleFlight('recommender')
 
 
 def _load_csv() -> pd.DataFrame:
-    csv_abs = os.path.abspath(_CSV_PATH)
-    if not os.path.exists(csv_abs):
-        raise FileNotFoundError(
-            f"courses.csv not found at: {csv_abs}\n"
-            f"_DIR={os.path.abspath(_DIR)}\n"
-            "Check that backend/data/courses.csv exists relative to the repo root."
-        )
-    df = pd.read_csv(csv_abs)
-    df.fillna('', inplace=True)
+    df = catalogue.courses().frame().drop(columns=['skills_list'])
 
     # skills_covered is comma-separated in CSV — join with spaces for TF-IDF
     df['skills_covered_text'] = df['skills_covered'].apply(
@@ -70,39 +54,427 @@ def _load_csv() -> pd.DataFrame:
         df['job_role'].astype(str) + ' ' +               # double weight on job role
         df['course_name'].astype(str)
     )
-
-    # Pre-compute numeric duration for filtering
-    df['duration_months'] = df['duration'].apply(_parse_months)
     return df
 
 
-def train_and_save():
-    """Train TF-IDF model on courses.csv and persist to disk."""
-    os.makedirs(_PKL_DIR, exist_ok=True)
+def train_and_save(progress: Optional[Callable[[float, str], None]] = None):
+    """Train TF-IDF model on courses.csv and persist to disk. `progress(fraction, stage)` is told each stage."""
+    report = progress or (lambda fraction, stage: None)
+    report(0.05, 'load')
     df = _load_csv()
+    report(0.2, 'fit_tfidf')
     vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
     tfidf_matrix = vectorizer.fit_transform(df['features'])
-    with open(_VEC_PATH, 'wb') as f:
-        pickle.dump(vectorizer, f)
-    with open(_MAT_PATH, 'wb') as f:
-        pickle.dump(tfidf_matrix, f)
-    with open(_DF_PATH, 'wb') as f:
-        pickle.dump(df.to_dict('records'), f)
+    with file_lock(_LOCK_PATH):
+        report(0.5, 'persist')
+        with atomic_write(_VEC_PATH) as f:
+            pickle.dump(vectorizer, f)
+        with atomic_write(_MAT_PATH) as f:
+            pickle.dump(tfidf_matrix, f)
+        with atomic_write(_DF_PATH) as f:
+            pickle.dump(df.to_dict('records'), f)
+        report(0.6, 'lsa_build')
+        _build_dense(tfidf_matrix)
     return len(df)
 
 
+def _trained() -> bool:
+    return os.path.exists(_VEC_PATH) and os.path.exists(_MAT_PATH) and os.path.exists(_DF_PATH)
+
+
+def _train_if_missing():
+    # Another process may have trained while we waited for the lock
+    with file_lock(_LOCK_PATH):
+        if not _trained():
+            train_and_save()
+
+
+def _artifact_stats() -> tuple:
+    """(mtime_ns, size) of each persisted artifact — changes whenever the model is retrained."""
+    stats = []
+    for p in (_VEC_PATH, _MAT_PATH, _DF_PATH):
+        st = os.stat(p)
+        stats.append((st.st_mtime_ns, st.st_size))
+    return tuple(stats)
+
+
+def model_version() -> str:
+    """Short identifier of the model artifacts currently on disk."""
+    try:
+        return hashlib.sha1(repr(_artifact_stats()).encode()).hexdigest()[:12]
+    except FileNotFoundError:
+        return 'untrained'
+
+
 def _load_model():
     """Load persisted model or train if missing."""
-    if not (os.path.exists(_VEC_PATH) and os.path.exists(_MAT_PATH) and os.path.exists(_DF_PATH)):
-        train_and_save()
-    with open(_VEC_PATH, 'rb') as f:
-        vectorizer = pickle.load(f)
-    with open(_MAT_PATH, 'rb') as f:
-        tfidf_matrix = pickle.load(f)
-    with open(_DF_PATH, 'rb') as f:
-        records = pickle.load(f)
-        df = pd.DataFrame(records)
-    return vectorizer, tfidf_matrix, df
+    if not _trained():
+        _flight.do('train', _train_if_missing)
+    key = (os.path.abspath(_PKL_DIR), _artifact_stats())
+    cached = _model_cache.get('model')
+    if cached is not None and cached[0] == key:
+        record_cache('recommender_model', True)
+        return cached[1]
+    record_cache('recommender_model', False)
+    return _flight.do(('load', key), _read_model)
+
+
+def _read_model():
+    with span('recommender.model_load'), file_lock(_LOCK_PATH, shared=True):
+        key = (os.path.abspath(_PKL_DIR), _artifact_stats())
+        with open(_VEC_PATH, 'rb') as f:
+            vectorizer = pickle.load(f)
+        with open(_MAT_PATH, 'rb') as f:
+            tfidf_matrix = pickle.load(f)
+        with open(_DF_PATH, 'rb') as f:
+            records = pickle.load(f)
+            df = pd.DataFrame(records)
+    bundle = (vectorizer, tfidf_matrix, df)
+    _model_cache['model'] = (key, bundle)
+    set_model_version('recommender', model_version())
+    return bundle
+
+
+# ── Dense (LSA) channel ───────────────────────────────────────────────────────
+# Latent semantic embeddings of the TF-IDF matrix relate terms that co-occur
+# across courses ("ml" ↔ "machine learning"), which exact-token TF-IDF cannot.
+class _DenseIndex:
+    """Brute-force inner-product index over L2-normalised course embeddings (memory-mapped)."""
+
+    def __init__(self, svd: TruncatedSVD, embeddings: np.ndarray):
+        self.svd = svd
+        self.embeddings = embeddings   # (n_courses, k) float32, read-only
+
+    def embed(self, query_vecs) -> np.ndarray:
+        q = self.svd.transform(query_vecs).astype(np.float32)
+        norms = np.linalg.norm(q, axis=1, keepdims=True)
+        return np.divide(q, norms, out=np.zeros_like(q), where=norms > 0)
+
+    def scores(self, query_vecs) -> np.ndarray:
+        """(n_queries, n_courses) cosine similarity, clipped at 0 like TF-IDF cosine."""
+        return np.maximum(self.embed(query_vecs) @ self.embeddings.T, 0.0)
+
+
+def _build_dense(tfidf_matrix):
+    """Fit LSA on the TF-IDF matrix and persist the SVD and float32 course embeddings."""
+    n_docs, n_terms = tfidf_matrix.shape
+    # Near full rank LSA just reproduces TF-IDF; a quarter of the courses keeps it latent
+    k = max(1, min(settings.RECOMMENDER_LSA_DIM, n_docs // 4, n_terms - 1))
+    svd = TruncatedSVD(n_components=k, random_state=42)
+    emb = svd.fit_transform(tfidf_matrix).astype(np.float32)
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    emb = np.divide(emb, norms, out=np.zeros_like(emb), where=norms > 0)
+
+    with file_lock(_LOCK_PATH):
+        with atomic_write(_LSA_PATH) as f:
+            pickle.dump(svd, f)
+        # Replace, never truncate: live processes may still have the old file mapped
+        with atomic_write(_EMB_PATH) as f:
+            np.save(f, emb)
+
+
+def _read_dense():
+    with open(_LSA_PATH, 'rb') as f:
+        svd = pickle.load(f)
+    return svd, np.load(_EMB_PATH, mmap_mode='r')
+
+
+def _dense_fits(svd, emb, tfidf_matrix) -> bool:
+    return emb.shape[0] == tfidf_matrix.shape[0] and svd.components_.shape[1] == tfidf_matrix.shape[1]
+
+
+def _ensure_dense(tfidf_matrix):
+    """Build the LSA artifacts if missing or left over from another TF-IDF model — once per herd."""
+    def build():
+        with file_lock(_LOCK_PATH):
+            if os.path.exists(_LSA_PATH) and os.path.exists(_EMB_PATH) and _dense_fits(*_read_dense(), tfidf_matrix):
+                return
+            with span('recommender.lsa_build'):
+                _build_dense(tfidf_matrix)
+    _flight.do(('lsa_build', tfidf_matrix.shape), build)
+
+
+def _load_dense(tfidf_matrix) -> _DenseIndex:
+    """LSA index for the loaded TF-IDF matrix, built on first use if missing or stale."""
+    def _stats():
+        return tuple((os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in (_LSA_PATH, _EMB_PATH))
+
+    if not (os.path.exists(_LSA_PATH) and os.path.exists(_EMB_PATH)):
+        _ensure_dense(tfidf_matrix)
+    key = (os.path.abspath(_PKL_DIR), _stats(), tfidf_matrix.shape)
+    cached = _model_cache.get('dense')
+    if cached is not None and cached[0] == key:
+        record_cache('recommender_lsa', True)
+        return cached[1]
+    record_cache('recommender_lsa', False)
+
+    with span('recommender.lsa_load'):
+        svd, emb = _read_dense()
+    if not _dense_fits(svd, emb, tfidf_matrix):
+        _ensure_dense(tfidf_matrix)
+        svd, emb = _read_dense()
+        key = (os.path.abspath(_PKL_DIR), _stats(), tfidf_matrix.shape)
+
+    index = _DenseIndex(svd, emb)
+    _model_cache['dense'] = (key, index)
+    return index
+
+
+def _dense_weight(value) -> float:
+    return settings.RECOMMENDER_DENSE_WEIGHT if value is None else float(value)
+
+
+class _CourseArrays:
+    """Per-course columns used by the vectorised boosting step, built once per loaded model."""
+
+    _MAX_MEMO = 4096
+
+    def __init__(self, df: pd.DataFrame):
+        self.n = len(df)
+        self.nsqf_level      = df['nsqf_level'].astype(int).to_numpy()
+        self.duration_months = df['duration_months'].astype(int).to_numpy()
+        self.job_role        = df['job_role'].astype(str).str.lower().tolist()
+        self.skills          = df['skills_covered'].astype(str).str.lower().tolist()
+        self.records         = [_course_record(row) for row in df.to_dict('records')]
+        # Pre-encoded JSON of each record (the key/value pairs, no braces) for fast responses
+        self.fragments       = [fastjson.dumps(r)[1:-1] for r in self.records]
+        self._memo = {}
+
+    def contains(self, column: str, token: str) -> np.ndarray:
+        """Boolean mask of courses whose `column` contains `token` as a substring."""
+        key = (column, token)
+        mask = self._memo.get(key)
+        if mask is None:
+            values = getattr(self, column)
+            mask = np.fromiter((token in v for v in values), dtype=bool, count=self.n)
+            if len(self._memo) >= self._MAX_MEMO:
+                self._memo.clear()
+            self._memo[key] = mask
+        return mask
+
+
+def _course_record(row: dict) -> dict:
+    """Static (query-independent) part of a recommendation entry."""
+    # skills_covered can be a comma-separated string or list
+    skills_raw = row.get('skills_covered', row.get('skills', ''))
+    if isinstance(skills_raw, str):
+        skills_list = [s.strip() for s in skills_raw.split(',') if s.strip()]
+    else:
+        skills_list = list(skills_raw)
+    return {
+        'course_id':      row['course_id'],
+        'course_name':    row['course_name'],
+        'sector':         row['sector'],
+        'skills_covered': skills_list,
+        'nsqf_level':     int(row['nsqf_level']),
+        'duration':       row['duration'],
+        'job_role':       row['job_role'],
+    }
+
+
+class _Entry(dict):
+    """
+    A recommendation entry that app.core.fastjson can encode from its course's
+    cached fragment, encoding only the per-query fields.
+    """
+
+    __slots__ = ('fragment',)
+    _SIZE = 11      # rank + 7 record fields + 3 scores; anything attached later means a plain encode
+
+    def __json_fragment__(self) -> Optional[bytes]:
+        if len(self) != self._SIZE:
+            return None
+        tail = fastjson.dumps({'similarity_score': self['similarity_score'], 'raw_score': self['raw_score'],
+                               'match_quality': self['match_quality']})
+        return b'{"rank":%d,%s,%s' % (self['rank'], self.fragment, tail[1:])
+
+
+def _course_arrays(df: pd.DataFrame) -> _CourseArrays:
+    cached = _model_cache.get('arrays')
+    if cached is not None and cached[0] is df:
+        return cached[1]
+    arrays = _CourseArrays(df)
+    _model_cache['arrays'] = (df, arrays)
+    return arrays
+
+
+# ── Query vectors ─────────────────────────────────────────────────────────────
+# Skill bundles, interests and target roles recur constantly, so each distinct
+# part is tokenised once and its raw term counts cached. The query vector is
+# assembled from those counts with the skills weighted 3× as a scalar — the
+# same vector vectorizer.transform gives for "skills skills skills interest role".
+_SKILL_WEIGHT   = 3
+_FALLBACK_QUERY = 'general vocational training'
+
+_query_terms = ByteLRU(
+    'recommender_query_terms',
+    int(settings.RECOMMENDER_QUERY_CACHE_MB * 1024 * 1024),
+    sizeof=lambda counts: counts[0].nbytes + counts[1].nbytes,
+)
+
+
+class _QueryEncoder:
+    """TF-IDF query rows for one fitted vectorizer, built from cached per-part term counts."""
+
+    def __init__(self, vectorizer: TfidfVectorizer, version: str):
+        self.vectorizer = vectorizer
+        self.version    = version
+        self.analyzer   = vectorizer.build_analyzer()
+        self.vocab      = vectorizer.vocabulary_
+        self.idf        = vectorizer.idf_ if vectorizer.use_idf else None
+        self.n_features = len(self.vocab)
+        # Unigram word tokens never span whitespace, so word order is irrelevant
+        self.order_free = vectorizer.analyzer == 'word' and vectorizer.ngram_range == (1, 1)
+        self._terms     = None
+
+    @property
+    def terms(self) -> np.ndarray:
+        """Vocabulary term for each feature index (built on first explain request)."""
+        if self._terms is None:
+            self._terms = self.vectorizer.get_feature_names_out()
+        return self._terms
+
+    def _key(self, text: str) -> tuple:
+        words = text.lower().split() if self.vectorizer.lowercase else text.split()
+        return (self.version, ' '.join(sorted(words) if self.order_free else words))
+
+    def term_counts(self, text: str) -> tuple:
+        """(sorted vocabulary indices, counts) of one query part."""
+        key = self._key(text)
+        counts = _query_terms.get(key)
+        if counts is None:
+            ids = [self.vocab[t] for t in self.analyzer(key[1]) if t in self.vocab]
+            idx, cnt = np.unique(np.asarray(ids, dtype=np.int32), return_counts=True)
+            counts = (idx, cnt.astype(np.float64))
+            _query_terms.put(key, counts)
+        return counts
+
+    def row(self, skills: str, interest: str, job_role: str) -> tuple:
+        if skills.strip() or interest.strip() or job_role.strip():
+            parts = ((skills, _SKILL_WEIGHT), (interest, 1), (job_role, 1))
+        else:
+            parts = ((_FALLBACK_QUERY, 1),)
+        counts = [(self.term_counts(text), weight) for text, weight in parts if text]
+        idx  = np.concatenate([c[0] for c, _ in counts])
+        vals = np.concatenate([c[1] * w for c, w in counts])
+        idx, inverse = np.unique(idx, return_inverse=True)
+        vals = np.bincount(inverse, weights=vals, minlength=len(idx))
+
+        if self.vectorizer.sublinear_tf:
+            vals = np.log(vals) + 1
+        if self.idf is not None:
+            vals = vals * self.idf[idx]
+        if self.vectorizer.norm == 'l2':
+            norm = np.sqrt(np.dot(vals, vals))
+        elif self.vectorizer.norm == 'l1':
+            norm = np.abs(vals).sum()
+        else:
+            norm = 0.0
+        if norm > 0:
+            vals = vals / norm
+        return idx, vals
+
+    def transform(self, queries) -> sparse.csr_matrix:
+        """CSR matrix of query rows for (skills, interest, job_role) triples."""
+        rows = [self.row(*q) for q in queries]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int32)
+        np.cumsum([len(r[0]) for r in rows], out=indptr[1:])
+        indices = np.concatenate([r[0] for r in rows]) if rows else np.zeros(0, dtype=np.int32)
+        data    = np.concatenate([r[1] for r in rows]) if rows else np.zeros(0)
+        return sparse.csr_matrix((data.astype(self.vectorizer.dtype), indices, indptr),
+                                 shape=(len(rows), self.n_features))
+
+
+def _query_encoder(vectorizer: TfidfVectorizer) -> _QueryEncoder:
+    cached = _model_cache.get('encoder')
+    if cached is not None and cached.vectorizer is vectorizer:
+        return cached
+    encoder = _QueryEncoder(vectorizer, model_version())
+    _model_cache['encoder'] = encoder
+    return encoder
+
+
+def _boost_multipliers(
+    courses: _CourseArrays,
+    skills: str,
+    nsqf_level: int,
+    preferred_duration_months: int,
+    job_role: str,
+    parts: Optional[dict] = None,
+) -> np.ndarray:
+    """
+    Per-course score multiplier for one learner (1.0 = no boost).
+    If `parts` is given it receives each boost's per-course bonus array, for explain mode.
+    """
+    multiplier = np.ones(courses.n)
+    parts = {} if parts is None else parts
+
+    # NSQF Level boost: course within ±1 of user's NSQF level
+    if nsqf_level > 0:
+        parts['nsqf_level'] = np.where(np.abs(courses.nsqf_level - nsqf_level) <= 1, 0.20, 0.0)
+        multiplier += parts['nsqf_level']
+
+    # Duration boost: course duration ≤ user's preferred max
+    if preferred_duration_months > 0:
+        parts['duration'] = np.where(courses.duration_months <= preferred_duration_months, 0.15, 0.0)
+        multiplier += parts['duration']
+
+    # Job Role boost: any word (> 2 chars) of the user's job role appears in course job role
+    if job_role:
+        words = [w for w in job_role.lower().split() if len(w) > 2]
+        role_hit = np.zeros(courses.n, dtype=bool)
+        for word in words:
+            role_hit |= courses.contains('job_role', word)
+        parts['job_role'] = np.where(role_hit, 0.25, 0.0)
+        multiplier += parts['job_role']
+
+    # Skills boost: strong multiplier for every matching skill
+    if skills:
+        user_skills_list = [s.strip().lower() for s in skills.split() if len(s.strip()) > 1]
+        matched_skills = np.zeros(courses.n, dtype=int)
+        skill_masks = []
+        for s in user_skills_list:
+            mask = courses.contains('skills', s)
+            matched_skills += mask
+            skill_masks.append((s, mask))
+        parts['skills'] = np.where(matched_skills > 0, 0.35 * matched_skills, 0.0)  # VERY strong boost
+        parts['skill_masks'] = skill_masks
+        multiplier += parts['skills']
+
+    return multiplier
+
+
+def _explain(i: int, tfidf_scores, dense_scores, dense_weight: float, multipliers, parts: dict,
+             query_vec, tfidf_matrix, terms) -> dict:
+    """Score breakdown for course `i`, read from the arrays already computed for ranking."""
+    boosts = []
+    for factor in ('nsqf_level', 'duration', 'job_role', 'skills'):
+        bonus = parts.get(factor)
+        if bonus is not None and bonus[i] > 0:
+            boost = {'factor': factor, 'bonus': round(float(bonus[i]), 4)}
+            if factor == 'skills':
+                boost['matched_skills'] = list(dict.fromkeys(s for s, mask in parts['skill_masks'] if mask[i]))
+            boosts.append(boost)
+
+    # Per-term contribution to the cosine: both rows are l2-normalised, so q_t · d_t sums to it
+    start, end = tfidf_matrix.indptr[i], tfidf_matrix.indptr[i + 1]
+    common, qi, di = np.intersect1d(query_vec.indices, tfidf_matrix.indices[start:end],
+                                    assume_unique=True, return_indices=True)
+    contrib = query_vec.data[qi] * tfidf_matrix.data[start:end][di]
+    top = np.argsort(contrib)[::-1][:5]
+
+    explanation = {
+        'tfidf_cosine':     round(float(tfidf_scores[i]), 4),
+        'base_score':       round(float(tfidf_scores[i] if dense_scores is None
+                                        else (1 - dense_weight) * tfidf_scores[i] + dense_weight * dense_scores[i]), 4),
+        'multiplier':       round(float(multipliers[i]), 4),
+        'boosts':           boosts,
+        'top_terms':        [{'term': str(terms[common[j]]), 'contribution': round(float(contrib[j]), 4)} for j in top],
+    }
+    if dense_scores is not None:
+        explanation['dense_cosine'] = round(float(dense_scores[i]), 4)
+        explanation['dense_weight'] = dense_weight
+    return explanation
 
 
 def get_recommendations(
@@ -112,6 +484,8 @@ def get_recommendations(
     preferred_duration_months: int = 0,
     job_role: str = "",
     top_n: int = 5,
+    dense_weight: float = None,
+    explain: bool = False,
 ) -> list:
     """
     Return top_n course recommendations as list of dicts.
@@ -123,64 +497,129 @@ def get_recommendations(
         preferred_duration_months: maximum course duration the user prefers (months), 0 = ignore
         job_role                 : user's target job role (substring match used for boosting)
         top_n                    : number of results (default 5)
+        dense_weight             : share of the LSA score in the base score, 0–1
+                                   (None = RECOMMENDER_DENSE_WEIGHT, 0 = TF-IDF only)
+        explain                  : attach a per-result score breakdown ('explanation')
     """
-    vectorizer, tfidf_matrix, df = _load_model()
-
-    # ── Build query string ────────────────────────────────────────────────────
-    # Heavily weight skills in the base TF-IDF calculation by duplicating them
-    parts = [skills, skills, skills, interest, job_role]
-    query = ' '.join(p for p in parts if p).strip()
-    if not query:
-        query = 'general vocational training'
-
-    query_vec = vectorizer.transform([query])
-    base_scores = cosine_similarity(query_vec, tfidf_matrix).flatten()
+    with span('recommender.model_lookup'):
+        vectorizer, tfidf_matrix, df = _load_model()
+        courses = _course_arrays(df)
+
+    with span('recommender.vectorize'):
+        encoder = _query_encoder(vectorizer)
+        query_vec = encoder.transform([(skills, interest, job_role)])
+    with span('recommender.similarity'):
+        base_scores = tfidf_scores = cosine_similarity(query_vec, tfidf_matrix).flatten()
+
+    w = _dense_weight(dense_weight)
+    dense_scores = None
+    if w > 0:
+        with span('recommender.dense'):
+            dense_scores = _load_dense(tfidf_matrix).scores(query_vec)[0]
+        base_scores = (1 - w) * tfidf_scores + w * dense_scores
 
     # ── Apply boosting multipliers ────────────────────────────────────────────
-    boosted_scores = base_scores.copy()
-    for idx in range(len(df)):
-        row = df.iloc[idx]
-        multiplier = 1.0
-
-        # NSQF Level boost: course within ±1 of user's NSQF level
-        if nsqf_level > 0:
-            course_nsqf = int(row.get('nsqf_level', 0))
-            if abs(course_nsqf - nsqf_level) <= 1:
-                multiplier += 0.20
-
-        # Duration boost: course duration ≤ user's preferred max
-        if preferred_duration_months > 0:
-            course_months = int(row.get('duration_months', 999))
-            if course_months <= preferred_duration_months:
-                multiplier += 0.15
-
-        # Job Role boost: substring match (case-insensitive)
-        if job_role:
-            course_job = str(row.get('job_role', '')).lower()
-            user_job   = job_role.lower()
-            # Check if any word from user's job role appears in course job role
-            if any(word in course_job for word in user_job.split() if len(word) > 2):
-                multiplier += 0.25
-
-        # Skills boost: strong multiplier for every matching skill
-        if skills:
-            course_skills = str(row.get('skills_covered', row.get('skills', ''))).lower()
-            user_skills_list = [s.strip().lower() for s in skills.split() if len(s.strip()) > 1]
-            matched_skills = sum(1 for s in user_skills_list if s in course_skills)
-            if matched_skills > 0:
-                multiplier += (0.35 * matched_skills)  # VERY strong boost for matching technical skills
-
-        boosted_scores[idx] *= multiplier
+    parts = {} if explain else None
+    with span('recommender.boost'):
+        multipliers = _boost_multipliers(
+            courses, skills, nsqf_level, preferred_duration_months, job_role, parts)
+        boosted_scores = base_scores * multipliers
 
     # ── Rank and return top_n ─────────────────────────────────────────────────
-    top_indices = boosted_scores.argsort()[::-1][:top_n]
+    with span('recommender.rank'):
+        top_indices = boosted_scores.argsort()[::-1][:top_n]
 
     # Determine match quality thresholds relative to max score
     max_score = float(boosted_scores[top_indices[0]]) if len(top_indices) > 0 else 1.0
 
+    with span('recommender.serialise'):
+        results = _build_results(courses, boosted_scores, top_indices, max_score)
+
+    if explain:
+        with span('recommender.explain'):
+            for entry, idx in zip(results, top_indices):
+                entry['explanation'] = _explain(idx, tfidf_scores, dense_scores, w, multipliers, parts,
+                                                query_vec, tfidf_matrix, encoder.terms)
+    return results
+
+
+def query_from_profile(user: dict) -> dict:
+    """
+    Map a stored user document to get_recommendations keyword arguments.
+    Reads technical_skills, career_aspirations (target_role, preferred_industry),
+    nsqf_level and preferred_duration_months.
+    """
+    skills_list = user.get("technical_skills", [])
+    skills = " ".join(skills_list) if isinstance(skills_list, list) else str(skills_list)
+
+    career = user.get("career_aspirations", {}) or {}
+    interest = career.get("preferred_industry", "") or career.get("target_role", "")
+    job_role = career.get("target_role", "")
+
+    return {
+        'skills':                    skills,
+        'interest':                  interest,
+        'nsqf_level':                int(user.get("nsqf_level", 0)),
+        'preferred_duration_months': int(user.get("preferred_duration_months", 0)),
+        'job_role':                  job_role,
+    }
+
+
+def recommend_batch(queries: list, top_n: int = 5) -> list:
+    """
+    Score many learners at once. `queries` holds get_recommendations keyword
+    dicts (see query_from_profile); returns one recommendation list per query.
+    Vectorisation and cosine similarity run as a single matrix operation over
+    the whole batch, so memory grows with len(queries) × number of courses.
+    """
+    if not queries:
+        return []
+    with span('recommender.model_lookup'):
+        vectorizer, tfidf_matrix, df = _load_model()
+        courses = _course_arrays(df)
+
+    with span('recommender.batch_vectorize'):
+        query_mat = _query_encoder(vectorizer).transform([
+            (q.get('skills', ''), q.get('interest', ''), q.get('job_role', ''))
+            for q in queries
+        ])
+    with span('recommender.batch_similarity'):
+        base_scores = cosine_similarity(query_mat, tfidf_matrix)
+
+    weights = np.array([_dense_weight(q.get('dense_weight')) for q in queries])
+    if weights.any():
+        with span('recommender.batch_dense'):
+            dense_scores = _load_dense(tfidf_matrix).scores(query_mat)
+        base_scores = (1 - weights)[:, None] * base_scores + weights[:, None] * dense_scores
+
+    with span('recommender.batch_boost'):
+        multipliers = np.vstack([
+            _boost_multipliers(
+                courses,
+                q.get('skills', ''),
+                q.get('nsqf_level', 0),
+                q.get('preferred_duration_months', 0),
+                q.get('job_role', ''),
+            )
+            for q in queries
+        ])
+        boosted = base_scores * multipliers
+
+    with span('recommender.batch_rank'):
+        top = np.argsort(boosted, axis=1)[:, ::-1][:, :top_n]
+
+    out = []
+    with span('recommender.batch_serialise'):
+        for row_scores, top_indices in zip(boosted, top):
+            max_score = float(row_scores[top_indices[0]]) if len(top_indices) > 0 else 1.0
+            out.append(_build_results(courses, row_scores, top_indices, max_score))
+    return out
+
+
+def _build_results(courses: _CourseArrays, boosted_scores, top_indices, max_score: float) -> list:
+    """Turn ranked course indices into response dicts."""
     results = []
     for rank, idx in enumerate(top_indices, start=1):
-        row = df.iloc[idx]
         raw_score = float(boosted_scores[idx])
         normalised = raw_score / max_score if max_score > 0 else 0
 
@@ -191,24 +630,15 @@ def get_recommendations(
         else:
             match_quality = 'Low'
 
-        # skills_covered can be a comma-separated string or list
-        skills_raw = row.get('skills_covered', row.get('skills', ''))
-        if isinstance(skills_raw, str):
-            skills_list = [s.strip() for s in skills_raw.split(',') if s.strip()]
-        else:
-            skills_list = list(skills_raw)
-
-        results.append({
+        record = courses.records[idx]
+        entry = _Entry({
             'rank':           rank,
-            'course_id':      row['course_id'],
-            'course_name':    row['course_name'],
-            'sector':         row['sector'],
-            'skills_covered': skills_list,
-            'nsqf_level':     int(row['nsqf_level']),
-            'duration':       row['duration'],
-            'job_role':       row['job_role'],
+            **record,
+            'skills_covered': list(record['skills_covered']),
             'similarity_score': round(normalised, 4),
             'raw_score':      round(raw_score, 4),
             'match_quality':  match_quality,
         })
+        entry.fragment = courses.fragments[idx]
+        results.append(entry)
     return results
@@ -0,0 +1,111 @@
+"""
+Recommendation Snapshots
+Persists the last computed recommendation list on the user document, keyed by
+a hash of the profile fields the recommender reads and the model version, so
+an unchanged profile is served straight from the document get_current_user
+already fetched. Writes are fire-and-forget and never delay the response.
+
+With AUTH_PROFILE_CLAIMS on, issued tokens also carry the profile version and
+hash (`prf` claim), and answers are memoised in-process under them, so a
+repeat /recommend needs neither the database nor a signature check. Such
+answers can trail a profile edit until the token is reissued or the memo entry
+ages out (AUTH_PROFILE_MEMO_SECONDS).
+"""
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+from app.core.cache import ByteLRU
+from app.core.config import settings
+from app.core.database import users_collection
+from app.services.recommender import query_from_profile
+
+logger = logging.getLogger("careersetu.snapshots")
+
+SNAPSHOT_FIELD = "recommendation_snapshot"
+
+# Strong references to in-flight writes so they are not garbage-collected mid-flight
+_pending_writes = set()
+
+
+def profile_hash(query: dict) -> str:
+    """Stable digest of the recommender inputs (see recommender.query_from_profile)."""
+    canonical = json.dumps(query, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+def cached_recommendations(user: dict, p_hash: str, model_version: str, top_n: int) -> Optional[list]:
+    """Return the stored list if it was computed for this profile, model and top_n."""
+    snap = user.get(SNAPSHOT_FIELD)
+    if not isinstance(snap, dict):
+        return None
+    if (snap.get("profile_hash") != p_hash or snap.get("model_version") != model_version
+            or snap.get("top_n") != top_n):
+        return None
+    return snap.get("recommendations")
+
+
+async def _write(user_id, snapshot: dict):
+    try:
+        await users_collection.update_one({"_id": user_id}, {"$set": {SNAPSHOT_FIELD: snapshot}})
+    except Exception:
+        logger.exception("failed to store recommendation snapshot for %s", user_id)
+
+
+def save_snapshot(user: dict, p_hash: str, model_version: str, top_n: int, recommendations: list):
+    """Schedule the snapshot write on the running loop and return immediately."""
+    user_id = user.get("_id")
+    if user_id is None:
+        return
+    snapshot = {
+        "profile_hash":    p_hash,
+        "model_version":   model_version,
+        "top_n":           top_n,
+        "recommendations": recommendations,
+        "computed_at":     datetime.now(timezone.utc),
+    }
+    task = asyncio.get_running_loop().create_task(_write(user_id, snapshot))
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
+
+
+# ── Token profile claims & in-process memo ────────────────────────────────────
+def profile_version(user: dict) -> str:
+    """Explicit profile_version if set, else the updatedAt the Node backend maintains."""
+    version = user.get("profile_version", user.get("updatedAt"))
+    return "0" if version is None else str(version)
+
+
+def profile_claims(user: dict) -> dict:
+    """The `prf` token claim: profile version, recommender-input hash and headline fields."""
+    query = query_from_profile(user)
+    return {
+        "v":           profile_version(user),
+        "h":           profile_hash(query),
+        "skills":      hashlib.sha1(query["skills"].encode()).hexdigest()[:16],
+        "nsqf_level":  query["nsqf_level"],
+        "target_role": query["job_role"],
+    }
+
+
+def _memo_size(entry: tuple) -> int:
+    return len(json.dumps(entry[1], separators=(",", ":"), default=str))
+
+
+_memo = ByteLRU("recommendation_memo", int(settings.AUTH_PROFILE_MEMO_MB * 1024 * 1024), _memo_size)
+
+
+def memoised(username: str, p_version: str, q_hash: str, dense_weight: float, model_version: str) -> Optional[list]:
+    """Recommendations remembered for this profile version and hash, if still fresh."""
+    entry = _memo.get((username, p_version, q_hash, dense_weight, model_version))
+    if entry is None or time.monotonic() - entry[0] > settings.AUTH_PROFILE_MEMO_SECONDS:
+        return None
+    return entry[1]
+
+
+def remember(username: str, p_version: str, q_hash: str, dense_weight: float, model_version: str,
+             recommendations: list):
+    _memo.put((username, p_version, q_hash, dense_weight, model_version), (time.monotonic(), recommendations))
@@ -0,0 +1,10 @@
+"""
+Career Setu AI Engine — Performance Benchmarks
+Times the AI engine hot paths against synthetic catalogues scaled from the
+CSVs in backend/data, both in-process and through the ASGI app.
+
+Usage (from backend_python_legacy/):
+    python -m benchmarks --scales 1 10 100 --output bench.json
+    python -m benchmarks --compare bench_before.json bench_after.json
+    python -m benchmarks.loadtest --users 2000 --concurrency 64 --duration 30
+"""
@@ -0,0 +1,148 @@
+"""
+Response-encoding benchmark — FastAPI's default path vs app.core.fastjson.
+
+Builds real payloads from the engines (recommendations, a 256-learner batch,
+skill-gap analysis, best-fit ranking, a cohort NSQF evaluation and a learner
+pathway model), checks that both paths produce the same JSON, and times only
+the encoding:
+
+    default : jsonable_encoder(payload) → JSONResponse(...).body
+              (models: dumped, re-validated against the response_model, dumped again)
+    fast    : FastJSONResponse(payload).body
+
+Usage (from backend_python_legacy/):
+    python -m benchmarks.encoding --scales 1 10
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+
+# Same placeholders as the benchmark runner; nothing here touches MongoDB.
+for _key, _value in {
+    'MONGO_URL': 'mongodb://localhost:27017',
+    'DB_NAME': 'careersetu_bench',
+    'SECRET_KEY': 'benchmark-secret',
+    'ALGORITHM': 'HS256',
+    'ACCESS_TOKEN_EXPIRE_MINUTES': '30',
+}.items():
+    os.environ.setdefault(_key, _value)
+
+from benchmarks import synthetic
+from benchmarks.harness import measure, use_catalogue, git_revision
+from benchmarks.runner import PREDICT_BODY, BATCH_QUERY, SKILL_GAP_BODY, PROGRESS_BODY
+
+_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROFILE_BODY = {
+    'academic_info': {'highest_qualification': 'Diploma', 'background_stream': 'Science',
+                      'performance_level': 'Mid'},
+    'skills': {'technical_skills': ['python', 'excel'], 'soft_skills': ['communication'],
+               'digital_literacy': 'Advanced'},
+    'socio_economic': {'location': 'Urban', 'access_to_internet': True, 'financial_constraints': False,
+                       'time_availability': 'Full-time'},
+    'learning_preferences': {'pace': 'Self-paced', 'language': 'English', 'mode': 'Online'},
+    'career_aspirations': {'target_role': 'Data Analyst', 'preferred_industry': 'IT',
+                           'short_term_goal': 'Get certified', 'long_term_goal': 'Lead analytics'},
+}
+
+
+def _pathway():
+    """The learner pathway model (scale-independent: built from the committed data)."""
+    from app.services.profiling import profiling_service
+    from app.schemas.learner import LearnerProfileRequest
+    return profiling_service.analyze_learner(LearnerProfileRequest(**PROFILE_BODY))
+
+
+def _payloads() -> list:
+    from app.services import recommender
+    from app.routers import skill_gap, nsqf_progression
+
+    recommendations = recommender.get_recommendations(**{**PREDICT_BODY, 'top_n': 10})
+    cohort = nsqf_progression.ProgressBatchRequest(learners=[PROGRESS_BODY] * 5000)
+    return [
+        ('predict_top10',      {'recommendations': recommendations, 'total': len(recommendations),
+                                'query': BATCH_QUERY}),
+        ('recommend_batch_256', {'results': recommender.recommend_batch([BATCH_QUERY] * 256)}),
+        ('analyze_skill_gap',  skill_gap.analyze_skill_gap(**SKILL_GAP_BODY)),
+        ('best_fit_100',       skill_gap.best_fit_roles(SKILL_GAP_BODY['learner_skills'], top_k=100)),
+        ('nsqf_batch_5000',    nsqf_progression._evaluate_batch(cohort)),
+    ]
+
+
+def _default_encoder(payload):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from pydantic import BaseModel
+
+    if isinstance(payload, BaseModel):
+        # What a response_model route does with a returned model
+        model = type(payload)
+        return lambda: JSONResponse(model.model_validate(payload.model_dump(by_alias=True))
+                                    .model_dump(mode='json', by_alias=True)).body
+    return lambda: JSONResponse(jsonable_encoder(payload)).body
+
+
+def run(args) -> dict:
+    from app.core import fastjson
+
+    results = []
+    pathway = _pathway()
+    with tempfile.TemporaryDirectory(prefix='careersetu-encoding-') as tmp:
+        for scale in args.scales:
+            scale_dir = os.path.join(tmp, f"x{scale}")
+            data_dir = synthetic.generate(scale_dir, scale, seed=args.seed)
+            with use_catalogue(data_dir, os.path.join(scale_dir, 'models')):
+                print(f"── scale ×{scale}: building payloads …", file=sys.stderr)
+                for name, payload in _payloads() + [('learner_pathway', pathway)]:
+                    default = _default_encoder(payload)
+                    fast = lambda: fastjson.FastJSONResponse(payload).body
+                    entry = {'scale': scale, 'case': name, 'bytes': len(fast()),
+                             'same_json': json.loads(default()) == json.loads(fast())}
+                    for engine, fn in (('default', default), ('fast', fast)):
+                        stats = measure(fn, args.iterations, max_seconds=args.max_seconds)
+                        stats.pop('peak_memory_mb', None)
+                        entry[engine] = stats
+                    entry['speedup_x'] = round(entry['default']['latency_ms']['p50']
+                                               / entry['fast']['latency_ms']['p50'], 2)
+                    print(f"   {name:22s} ×{entry['speedup_x']}", file=sys.stderr)
+                    results.append(entry)
+
+    return {
+        'meta': {
+            'git_revision': git_revision(_DIR),
+            'timestamp':    time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python':       platform.python_version(),
+            'platform':     platform.platform(),
+            'encoder':      'orjson ' + fastjson.orjson.__version__ if fastjson.orjson else 'json (stdlib)',
+            'iterations':   args.iterations,
+            'seed':         args.seed,
+        },
+        'results': results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.encoding', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--max-seconds', type=float, default=10.0, help='time budget per case')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write JSON results here instead of stdout')
+    args = parser.parse_args(argv)
+
+    payload = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Compiled-forest benchmark — sklearn `predict_proba` vs app.services.compiled_forest.
+
+Trains the skill-gap role and pairwise forests on a generated catalogue,
+compiles them, checks that both give the same probabilities on synthetic
+learners, and reports per-row latency at several batch sizes plus the memory
+held by the tree arrays (and the size of the pickle vs the .npz).
+
+Usage (from backend_python_legacy/):
+    python -m benchmarks.forest --scales 1 10 --batch-sizes 1 32 1024
+"""
+import io
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import platform
+import tempfile
+from typing import List
+
+# Same placeholders as the benchmark runner; nothing here touches MongoDB.
+for _key, _value in {
+    'MONGO_URL': 'mongodb://localhost:27017',
+    'DB_NAME': 'careersetu_bench',
+    'SECRET_KEY': 'benchmark-secret',
+    'ALGORITHM': 'HS256',
+    'ACCESS_TOKEN_EXPIRE_MINUTES': '30',
+}.items():
+    os.environ.setdefault(_key, _value)
+
+import numpy as np
+from scipy import sparse
+
+from benchmarks import synthetic
+from benchmarks.harness import measure, use_catalogue, git_revision
+
+_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _sklearn_tree_bytes(forest) -> int:
+    """Bytes of the node and value arrays held by every fitted tree."""
+    total = 0
+    for est in forest.estimators_:
+        state = est.tree_.__getstate__()
+        total += state['nodes'].nbytes + state['values'].nbytes
+    return total
+
+
+def _npz_bytes(compiled) -> int:
+    buf = io.BytesIO()
+    np.savez(buf, feature=compiled.feature, threshold=compiled.threshold, children=compiled.children,
+             value=compiled.value, roots=compiled.roots)
+    return buf.getbuffer().nbytes
+
+
+def _learners(R, n: int, rng: np.random.Generator):
+    """n synthetic learners: a random role's skills, each kept with probability 0.6."""
+    rows = R[rng.integers(0, R.shape[0], n)].tocoo()
+    keep = rng.random(rows.nnz) < 0.6
+    return sparse.csr_matrix((rows.data[keep], (rows.row[keep], rows.col[keep])), shape=rows.shape)
+
+
+def _compare(name: str, forest, X, batch_sizes: List[int], args) -> dict:
+    from app.services.compiled_forest import CompiledForest
+
+    t0 = time.perf_counter()
+    compiled = CompiledForest.from_sklearn(forest)
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    expected = forest.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    entry = {
+        'forest':      name,
+        'trees':       compiled.n_estimators,
+        'nodes':       int(len(compiled.feature)),
+        'depth':       compiled.depth,
+        'features':    compiled.n_features_in_,
+        'compile_ms':  round(compile_ms, 2),
+        'max_abs_diff': float(np.abs(expected - actual).max()),
+        'same_class':  bool((expected.argmax(axis=1) == actual.argmax(axis=1)).all()),
+        'memory': {
+            'sklearn_tree_bytes':  _sklearn_tree_bytes(forest),
+            'compiled_bytes':      compiled.nbytes,
+            'pickle_bytes':        len(pickle.dumps(forest, protocol=pickle.HIGHEST_PROTOCOL)),
+            'npz_bytes':           _npz_bytes(compiled),
+        },
+        'batches': [],
+    }
+    entry['memory']['saving_x'] = round(entry['memory']['sklearn_tree_bytes'] / compiled.nbytes, 2)
+
+    for size in batch_sizes:
+        batch = X[:size]
+        row = {'batch_size': int(batch.shape[0])}
+        for engine, fn in (('sklearn', forest.predict_proba), ('compiled', compiled.predict_proba)):
+            stats = measure(lambda: fn(batch), args.iterations, max_seconds=args.max_seconds)
+            stats.pop('peak_memory_mb', None)
+            stats['per_row_us'] = round(stats['latency_ms']['p50'] * 1000 / batch.shape[0], 3)
+            row[engine] = stats
+        row['speedup_x'] = round(row['sklearn']['per_row_us'] / row['compiled']['per_row_us'], 2)
+        entry['batches'].append(row)
+    return entry
+
+
+def run(args) -> dict:
+    from app.routers import skill_gap
+
+    results = []
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory(prefix='careersetu-forest-') as tmp:
+        for scale in args.scales:
+            scale_dir = os.path.join(tmp, f"x{scale}")
+            data_dir = synthetic.generate(scale_dir, scale, seed=args.seed)
+            with use_catalogue(data_dir, os.path.join(scale_dir, 'models')):
+                print(f"── scale ×{scale}: training forests …", file=sys.stderr)
+                job_df = skill_gap._load_job_roles()
+                rf, mlb = skill_gap._train_model(job_df)
+                R = sparse.csr_matrix(mlb.transform(job_df['skills_list'].tolist()), dtype=np.float32)
+                pair_rf = skill_gap._train_pair_model(R)
+
+                n = max(args.batch_sizes)
+                learners = _learners(R, n, rng)
+                roles = R[rng.integers(0, R.shape[0], n)]
+                cases = [
+                    ('role',     rf,      learners),
+                    ('pairwise', pair_rf, skill_gap._pair_features(roles, learners)),
+                ]
+                for name, forest, X in cases:
+                    print(f"   {name} …", file=sys.stderr)
+                    entry = _compare(name, forest, X, args.batch_sizes, args)
+                    entry['scale'] = scale
+                    results.append(entry)
+
+    return {
+        'meta': {
+            'git_revision': git_revision(_DIR),
+            'timestamp':    time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python':       platform.python_version(),
+            'platform':     platform.platform(),
+            'iterations':   args.iterations,
+            'seed':         args.seed,
+        },
+        'results': results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.forest', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 32, 1024])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--max-seconds', type=float, default=10.0, help='time budget per case')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write JSON results here instead of stdout')
+    args = parser.parse_args(argv)
+
+    payload = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
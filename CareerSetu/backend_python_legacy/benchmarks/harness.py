@@ -0,0 +1,148 @@
+"""
+Timing harness — latency percentiles, throughput and peak memory.
+"""
+import gc
+import os
+import time
+import asyncio
+import tracemalloc
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Optional
+import numpy as np
+
+
+def _summarise(samples: list, wall: float) -> dict:
+    arr = np.asarray(samples) * 1000.0
+    return {
+        'iterations':       len(samples),
+        'latency_ms': {
+            'p50':  round(float(np.percentile(arr, 50)), 4),
+            'p95':  round(float(np.percentile(arr, 95)), 4),
+            'p99':  round(float(np.percentile(arr, 99)), 4),
+            'mean': round(float(arr.mean()), 4),
+            'min':  round(float(arr.min()), 4),
+            'max':  round(float(arr.max()), 4),
+        },
+        'throughput_per_s': round(len(samples) / wall, 2) if wall > 0 else None,
+    }
+
+
+def _peak_memory_mb(fn: Callable[[], object]) -> float:
+    """Run `fn` once under tracemalloc and return its peak allocation in MiB."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / (1024 * 1024), 3)
+
+
+def measure(fn: Callable[[], object], iterations: int = 50, warmup: int = 3,
+            max_seconds: float = 30.0) -> dict:
+    """
+    Time a synchronous callable.
+    Stops after `iterations` calls or `max_seconds`, whichever comes first, so
+    slow cases at large scales still finish. Peak memory is sampled on a
+    separate untimed call because tracemalloc slows allocation-heavy code.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+        if time.perf_counter() - start > max_seconds:
+            break
+    wall = time.perf_counter() - start
+    result = _summarise(samples, wall)
+    result['peak_memory_mb'] = _peak_memory_mb(fn)
+    return result
+
+
+def measure_async(loop: asyncio.AbstractEventLoop, make_coro: Callable[[], Awaitable],
+                  iterations: int = 50, warmup: int = 3, max_seconds: float = 30.0,
+                  concurrency: int = 1) -> dict:
+    """
+    Time an awaitable factory on `loop`.
+    With concurrency > 1, that many calls are kept in flight and throughput is
+    measured across the whole batch.
+    """
+    async def _timed():
+        t0 = time.perf_counter()
+        await make_coro()
+        return time.perf_counter() - t0
+
+    async def _run():
+        for _ in range(warmup):
+            await make_coro()
+        samples = []
+        start = time.perf_counter()
+        while len(samples) < iterations and time.perf_counter() - start <= max_seconds:
+            batch = min(concurrency, iterations - len(samples))
+            samples.extend(await asyncio.gather(*(_timed() for _ in range(batch))))
+        return samples, time.perf_counter() - start
+
+    samples, wall = loop.run_until_complete(_run())
+    result = _summarise(samples, wall)
+    result['concurrency'] = concurrency
+    result['peak_memory_mb'] = _peak_memory_mb(lambda: loop.run_until_complete(make_coro()))
+    return result
+
+
+@contextmanager
+def patched(module, **attrs):
+    """Temporarily override module-level attributes (paths, caches)."""
+    saved = {k: getattr(module, k) for k in attrs}
+    for k, v in attrs.items():
+        setattr(module, k, v)
+    try:
+        yield module
+    finally:
+        for k, v in saved.items():
+            setattr(module, k, v)
+
+
+@contextmanager
+def use_catalogue(data_dir: str, model_dir: str):
+    """
+    Point every AI engine module at a generated data directory and a scratch
+    model directory, so benchmarks never overwrite the committed pickles.
+    """
+    from app.services import recommender, catalogue
+    from app.routers import skill_gap
+
+    os.makedirs(model_dir, exist_ok=True)
+    with patched(catalogue, _DATA_DIR=data_dir), \
+         patched(recommender,
+                 _PKL_DIR=model_dir,
+                 _VEC_PATH=os.path.join(model_dir, 'vectorizer.pkl'),
+                 _MAT_PATH=os.path.join(model_dir, 'recommender.pkl'),
+                 _DF_PATH=os.path.join(model_dir, 'courses_df.pkl'),
+                 _LSA_PATH=os.path.join(model_dir, 'lsa_svd.pkl'),
+                 _EMB_PATH=os.path.join(model_dir, 'lsa_embeddings.npy'),
+                 _LOCK_PATH=os.path.join(model_dir, 'recommender')), \
+         patched(skill_gap,
+                 _CACHE_DIR=model_dir,
+                 _RF_PATH=os.path.join(model_dir, 'skill_gap_rf.pkl'),
+                 _MLB_PATH=os.path.join(model_dir, 'skill_gap_mlb.pkl'),
+                 _ROLES_PATH=os.path.join(model_dir, 'skill_gap_roles.pkl'),
+                 _PAIR_PATH=os.path.join(model_dir, 'skill_gap_pair_rf.pkl'),
+                 _RF_BIN_PATH=os.path.join(model_dir, 'skill_gap_rf.npz'),
+                 _PAIR_BIN_PATH=os.path.join(model_dir, 'skill_gap_pair_rf.npz'),
+                 _LOCK_PATH=os.path.join(model_dir, 'skill_gap')):
+        yield
+
+
+def git_revision(cwd: Optional[str] = None) -> Optional[str]:
+    """Current commit hash, or None outside a git checkout."""
+    import subprocess
+    try:
+        out = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=cwd, capture_output=True,
+                             text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
@@ -0,0 +1,327 @@
+"""
+Load test — the authenticated signup → login → recommend flow under concurrency.
+
+Runs the FastAPI app under uvicorn in a background thread with
+`users_collection` backed by mongomock-motor (default) or a scratch database
+on a local mongod, seeds synthetic learners with realistic profiles, then
+drives a weighted mix of signup / login / recommend requests over HTTP.
+Reports per-endpoint throughput and latency percentiles plus the app's
+event-loop lag, sampled by a ticker task on the server loop.
+
+Usage (from backend_python_legacy/):
+    python -m benchmarks.loadtest --users 2000 --concurrency 64 --duration 30
+    python -m benchmarks.loadtest --mongo-url mongodb://localhost:27017 --mix signup=1 login=5 recommend=4
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import threading
+from typing import Dict, List
+
+# Same placeholders as the benchmark runner; the users collection is swapped out below.
+for _key, _value in {
+    'MONGO_URL': 'mongodb://localhost:27017',
+    'DB_NAME': 'careersetu_bench',
+    'SECRET_KEY': 'benchmark-secret',
+    'ALGORITHM': 'HS256',
+    'ACCESS_TOKEN_EXPIRE_MINUTES': '30',
+}.items():
+    os.environ.setdefault(_key, _value)
+
+import numpy as np
+from benchmarks.harness import _summarise, patched, git_revision
+
+_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PASSWORD = 'load-test-password'
+ACTIONS  = ('signup', 'login', 'recommend')
+
+
+# ── Users collection ──────────────────────────────────────────────────────────
+async def _open_collection(mongo_url: str, db_name: str):
+    """Users collection on the server loop: mongomock-motor, or a real mongod when a URL is given."""
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo_url)
+        return client, client[db_name]['users']
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("mongomock-motor is not installed — pip install mongomock-motor, "
+                         "or pass --mongo-url for a local mongod")
+    client = AsyncMongoMockClient()
+    return client, client[db_name]['users']
+
+
+def synthetic_profiles(n: int, seed: int, hashed_password: str) -> List[dict]:
+    """Learners drawn from the catalogue: a target role, some of its skills, a nearby NSQF level."""
+    from app.services import catalogue
+    rng = random.Random(seed)
+    roles = catalogue.job_roles().frame()[['job_role', 'sector', 'nsqf_level', 'skills_list']]
+    roles = list(roles.itertuples(index=False))
+    course_skills = sorted({s for skills in catalogue.courses().frame()['skills_list'] for s in skills})
+
+    users = []
+    for i in range(n):
+        role = rng.choice(roles)
+        own = list(role.skills_list)
+        skills = rng.sample(own, k=min(len(own), rng.randint(2, 6)))
+        skills += rng.sample(course_skills, k=rng.randint(0, 2))
+        users.append({
+            'username':        f'lt-user-{i}',
+            'email':           f'lt-user-{i}@example.com',
+            'hashed_password': hashed_password,
+            'technical_skills': skills,
+            'career_aspirations': {
+                'target_role':        role.job_role,
+                'preferred_industry': str(role.sector),
+            },
+            'nsqf_level':                int(min(8, max(1, role.nsqf_level + rng.choice((-1, 0, 0, 1))))),
+            'preferred_duration_months': rng.choice((0, 3, 6, 12)),
+        })
+    return users
+
+
+async def _seed(collection, users: List[dict], chunk: int = 1000):
+    await collection.delete_many({})
+    for start in range(0, len(users), chunk):
+        await collection.insert_many([dict(u) for u in users[start:start + chunk]])
+
+
+# ── App server ────────────────────────────────────────────────────────────────
+async def _lag_ticker(samples: list, interval: float):
+    """Append how late each `interval` sleep wakes up — time the loop spent blocked."""
+    loop = asyncio.get_running_loop()
+    expected = loop.time() + interval
+    while True:
+        await asyncio.sleep(interval)
+        now = loop.time()
+        samples.append(max(0.0, now - expected))
+        expected = now + interval
+
+
+class _AppServer:
+    """uvicorn serving app.main:app on its own loop in a daemon thread."""
+
+    def __init__(self, port: int):
+        import uvicorn
+        from app.main import app
+        self.server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port,
+                                                   log_level='warning', lifespan='on'))
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name='loadtest-server', daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.server.serve())
+
+    def start(self, timeout: float = 30.0):
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.05)
+
+    def call(self, coro, timeout: float = None):
+        """Run a coroutine on the server loop from this thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# ── Traffic ───────────────────────────────────────────────────────────────────
+async def _drive(base_url: str, n_users: int, args) -> Dict[str, dict]:
+    import httpx
+
+    rng = random.Random(args.seed + 1)
+    names, weights = zip(*args.mix.items())
+    stats = {a: {'samples': [], 'status': {}} for a in ACTIONS}
+    tokens: List[str] = []
+    counter = iter(range(10 ** 9))
+
+    async def _timed(action: str, send):
+        t0 = time.perf_counter()
+        try:
+            resp = await send()
+            code = resp.status_code
+        except httpx.HTTPError as e:
+            resp, code = None, type(e).__name__
+        stats[action]['samples'].append(time.perf_counter() - t0)
+        stats[action]['status'][str(code)] = stats[action]['status'].get(str(code), 0) + 1
+        return resp if resp is not None and resp.status_code == 200 else None
+
+    async def _login(client):
+        user = f'lt-user-{rng.randrange(n_users)}'
+        resp = await _timed('login', lambda: client.post(
+            '/api/v1/auth/token', data={'username': user, 'password': PASSWORD}))
+        if resp is not None:
+            tokens.append(resp.json()['access_token'])
+
+    async def _signup(client):
+        user = f'lt-new-{os.getpid()}-{next(counter)}'
+        resp = await _timed('signup', lambda: client.post(
+            '/api/v1/auth/signup', json={'username': user, 'email': f'{user}@example.com',
+                                          'password': PASSWORD}))
+        if resp is not None:
+            tokens.append(resp.json()['access_token'])
+
+    async def _recommend(client):
+        if not tokens:
+            return await _login(client)
+        token = rng.choice(tokens)
+        await _timed('recommend', lambda: client.post(
+            '/api/v1/recommend', headers={'Authorization': f'Bearer {token}'}))
+
+    handlers = {'signup': _signup, 'login': _login, 'recommend': _recommend}
+    deadline = time.perf_counter() + args.duration
+    issued = iter(range(args.max_requests or 10 ** 12))
+
+    async def _virtual_user(client):
+        while time.perf_counter() < deadline and next(issued, None) is not None:
+            await handlers[rng.choices(names, weights)[0]](client)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(_virtual_user(client) for _ in range(args.concurrency)))
+        wall = time.perf_counter() - start
+
+    report = {}
+    for action, s in stats.items():
+        if not s['samples']:
+            continue
+        entry = _summarise(s['samples'], wall)
+        entry['status'] = s['status']
+        entry['errors'] = sum(n for code, n in s['status'].items() if code != '200')
+        report[action] = entry
+    everything = [x for s in stats.values() for x in s['samples']]
+    if everything:
+        report['total'] = _summarise(everything, wall)
+    return report
+
+
+def _lag_summary(samples: list, elapsed: float) -> dict:
+    if not samples:
+        return {}
+    arr = np.asarray(samples) * 1000.0
+    return {
+        'samples':     len(arr),
+        'p50':         round(float(np.percentile(arr, 50)), 3),
+        'p95':         round(float(np.percentile(arr, 95)), 3),
+        'p99':         round(float(np.percentile(arr, 99)), 3),
+        'max':         round(float(arr.max()), 3),
+        # Share of wall time the loop could not run the ticker on schedule
+        'blocked_pct': round(float(arr.sum()) / 10.0 / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+def run(args) -> dict:
+    from app.core import database
+    from app.core.security import get_password_hash
+    from app.routers import auth, admin
+    from app.services import snapshots
+
+    db_name = args.db_name or f'careersetu_loadtest_{os.getpid()}'
+    server = _AppServer(_free_port())
+    lag: list = []
+    server.start()
+    try:
+        client, users = server.call(_open_collection(args.mongo_url, db_name))
+        with patched(database, users_collection=users), patched(auth, users_collection=users), \
+             patched(admin, users_collection=users), patched(snapshots, users_collection=users):
+            print(f"── seeding {args.users} users ({'mongod' if args.mongo_url else 'mongomock'})",
+                  file=sys.stderr)
+            profiles = synthetic_profiles(args.users, args.seed, get_password_hash(PASSWORD))
+            server.call(_seed(users, profiles))
+
+            ticker = asyncio.run_coroutine_threadsafe(_lag_ticker(lag, args.lag_interval), server.loop)
+            print(f"── driving {args.concurrency} virtual users for {args.duration:g}s, mix {args.mix}",
+                  file=sys.stderr)
+            started = time.perf_counter()
+            endpoints = asyncio.run(_drive(f'http://127.0.0.1:{server.server.config.port}', args.users, args))
+            elapsed = time.perf_counter() - started
+            ticker.cancel()
+
+            if args.mongo_url and not args.keep:
+                server.call(client.drop_database(db_name))
+    finally:
+        server.stop()
+
+    return {
+        'meta': {
+            'git_revision': git_revision(_DIR),
+            'timestamp':    time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python':       platform.python_version(),
+            'platform':     platform.platform(),
+            'mongo':        'mongod' if args.mongo_url else 'mongomock',
+            'users':        args.users,
+            'concurrency':  args.concurrency,
+            'duration_s':   args.duration,
+            'mix':          args.mix,
+            'seed':         args.seed,
+        },
+        'endpoints':   endpoints,
+        'loop_lag_ms': _lag_summary(lag, elapsed),
+    }
+
+
+def _parse_mix(items: List[str]) -> Dict[str, float]:
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition('=')
+        if name not in ACTIONS:
+            raise argparse.ArgumentTypeError(f"unknown action '{name}' (choose from {', '.join(ACTIONS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.loadtest', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000, help='synthetic learners to seed')
+    parser.add_argument('--concurrency', type=int, default=32, help='virtual users in flight')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds of traffic')
+    parser.add_argument('--max-requests', type=int, default=0, help='stop after this many requests (0 = no cap)')
+    parser.add_argument('--mix', nargs='+', default=['signup=1', 'login=3', 'recommend=6'],
+                        help='action weights, e.g. signup=1 login=3 recommend=6')
+    parser.add_argument('--mongo-url', default='', help='use this mongod instead of mongomock-motor')
+    parser.add_argument('--db-name', default='', help='scratch database name (dropped afterwards)')
+    parser.add_argument('--keep', action='store_true', help='keep the scratch database on mongod')
+    parser.add_argument('--lag-interval', type=float, default=0.01, help='loop-lag ticker period, seconds')
+    parser.add_argument('--timeout', type=float, default=60.0, help='per-request client timeout, seconds')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write JSON results here instead of stdout')
+    args = parser.parse_args(argv)
+    args.mix = _parse_mix(args.mix)
+
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        raise SystemExit("httpx is required for the load test — pip install httpx")
+
+    payload = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
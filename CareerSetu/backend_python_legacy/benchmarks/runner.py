@@ -0,0 +1,202 @@
+"""
+Benchmark runner — builds scaled catalogues and times every AI engine path.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+from typing import List
+
+# The app reads its settings from the environment at import time; benchmarks
+# never touch MongoDB, so placeholders are enough when no .env is present.
+for _key, _value in {
+    'MONGO_URL': 'mongodb://localhost:27017',
+    'DB_NAME': 'careersetu_bench',
+    'SECRET_KEY': 'benchmark-secret',
+    'ALGORITHM': 'HS256',
+    'ACCESS_TOKEN_EXPIRE_MINUTES': '30',
+}.items():
+    os.environ.setdefault(_key, _value)
+
+from benchmarks import synthetic
+from benchmarks.harness import measure, measure_async, use_catalogue, git_revision
+
+_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ── Representative request payloads ───────────────────────────────────────────
+PREDICT_BODY = {
+    'skills': 'python sql machine learning', 'interest': 'IT', 'nsqf_level': 5,
+    'preferred_duration_months': 6, 'job_role': 'Data Analyst', 'top_n': 5,
+}
+BATCH_QUERY    = {k: v for k, v in PREDICT_BODY.items() if k != 'top_n'}
+SKILL_GAP_BODY = {'learner_skills': ['python', 'sql', 'excel'], 'target_role': 'Data Analyst'}
+PROGRESS_BODY  = {'current_level': 3, 'learner_skills': ['wiring', 'tools', 'computer']}
+MARKET_BODY    = {'skill': 'python', 'target_year': 2027}
+
+
+def _in_process_cases(args) -> List[tuple]:
+    from app.services import recommender
+    from app.routers import skill_gap, nsqf_progression, job_market
+
+    loop = asyncio.new_event_loop()
+    it, budget = args.iterations, args.max_seconds
+    train_it = max(1, args.train_iterations)
+    cases = [
+        ('get_recommendations', lambda: measure(
+            lambda: recommender.get_recommendations(**PREDICT_BODY), it, max_seconds=budget)),
+        ('recommend_batch_256', lambda: measure(
+            lambda: recommender.recommend_batch([BATCH_QUERY] * 256), it, max_seconds=budget)),
+        ('analyze_skill_gap', lambda: measure(
+            lambda: skill_gap.analyze_skill_gap(**SKILL_GAP_BODY), it, max_seconds=budget)),
+        ('check_progression', lambda: measure_async(
+            loop, lambda: nsqf_progression.check_progression(nsqf_progression.ProgressRequest(**PROGRESS_BODY)),
+            it, max_seconds=budget)),
+        ('predict_demand', lambda: measure_async(
+            loop, lambda: job_market.predict_demand(job_market.MarketRequest(**MARKET_BODY)),
+            it, max_seconds=budget)),
+        ('load_recommender_model', lambda: measure(
+            recommender._load_model, it, max_seconds=budget)),
+        ('load_skill_gap_model', lambda: measure(
+            skill_gap._get_model, it, max_seconds=budget)),
+        ('train_recommender', lambda: measure(
+            recommender.train_and_save, train_it, warmup=0, max_seconds=budget)),
+        ('train_skill_gap', lambda: measure(
+            skill_gap.rebuild_skill_gap_model, train_it, warmup=0, max_seconds=budget)),
+    ]
+    return cases, loop
+
+
+def _asgi_cases(args) -> List[tuple]:
+    try:
+        import httpx
+    except ImportError:
+        print("httpx not installed — skipping ASGI benchmarks", file=sys.stderr)
+        return [], None
+    from app.main import app
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench')
+    it, budget, conc = args.iterations, args.max_seconds, args.concurrency
+
+    def _post(path, body):
+        async def _call():
+            resp = await client.post(path, json=body)
+            resp.raise_for_status()
+        return lambda: measure_async(loop, _call, it, max_seconds=budget, concurrency=conc)
+
+    cases = [
+        ('POST /api/v1/predict',            _post('/api/v1/predict', PREDICT_BODY)),
+        ('POST /api/v1/skill-gap/analyze',  _post('/api/v1/skill-gap/analyze', SKILL_GAP_BODY)),
+        ('POST /api/v1/nsqf/progress',      _post('/api/v1/nsqf/progress', PROGRESS_BODY)),
+        ('POST /api/v1/market/predict',     _post('/api/v1/market/predict', MARKET_BODY)),
+    ]
+    return cases, (loop, client)
+
+
+def run(args) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory(prefix='careersetu-bench-') as tmp:
+        for scale in args.scales:
+            scale_dir = os.path.join(tmp, f"x{scale}")
+            data_dir  = synthetic.generate(scale_dir, scale, seed=args.seed)
+            rows      = synthetic.describe(data_dir)
+            print(f"── scale ×{scale}: {rows}", file=sys.stderr)
+
+            with use_catalogue(data_dir, os.path.join(scale_dir, 'models')):
+                groups = []
+                if args.mode in ('all', 'inprocess'):
+                    groups.append(('inprocess',) + _in_process_cases(args))
+                if args.mode in ('all', 'asgi'):
+                    groups.append(('asgi',) + _asgi_cases(args))
+
+                for mode, cases, handle in groups:
+                    for name, bench in cases:
+                        if args.only and not any(o in name for o in args.only):
+                            continue
+                        print(f"   {mode:9s} {name} …", file=sys.stderr)
+                        entry = {'scale': scale, 'rows': rows, 'mode': mode, 'case': name}
+                        try:
+                            entry.update(bench())
+                        except Exception as e:   # keep going; record the failure
+                            entry['error'] = f"{type(e).__name__}: {e}"
+                        results.append(entry)
+                    if mode == 'asgi' and handle is not None:
+                        loop, client = handle
+                        loop.run_until_complete(client.aclose())
+                        loop.close()
+                    elif handle is not None:
+                        handle.close()
+
+    return {
+        'meta': {
+            'git_revision': git_revision(_DIR),
+            'timestamp':    time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python':       platform.python_version(),
+            'platform':     platform.platform(),
+            'iterations':   args.iterations,
+            'concurrency':  args.concurrency,
+            'seed':         args.seed,
+        },
+        'results': results,
+    }
+
+
+def compare(before_path: str, after_path: str, threshold_pct: float) -> int:
+    """Print p50/p95 deltas between two result files; non-zero exit on regression."""
+    with open(before_path) as f: before = json.load(f)
+    with open(after_path)  as f: after  = json.load(f)
+    key = lambda r: (r['scale'], r['mode'], r['case'])
+    base = {key(r): r for r in before['results'] if 'latency_ms' in r}
+
+    regressions = 0
+    print(f"{'scale':>6} {'mode':9} {'case':34} {'p50 Δ%':>9} {'p95 Δ%':>9}")
+    for r in after['results']:
+        old = base.get(key(r))
+        if old is None or 'latency_ms' not in r:
+            continue
+        deltas = []
+        for p in ('p50', 'p95'):
+            o, n = old['latency_ms'][p], r['latency_ms'][p]
+            deltas.append(((n - o) / o) * 100 if o else 0.0)
+        flag = ''
+        if deltas[0] > threshold_pct:
+            regressions += 1
+            flag = '  ← regression'
+        print(f"{r['scale']:>6} {r['mode']:9} {r['case'][:34]:34} {deltas[0]:9.1f} {deltas[1]:9.1f}{flag}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help='catalogue scale factors (e.g. 1 10 100 1000)')
+    parser.add_argument('--mode', choices=('all', 'inprocess', 'asgi'), default='all')
+    parser.add_argument('--only', nargs='*', help='run only cases whose name contains one of these')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--train-iterations', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float, default=30.0,
+                        help='time budget per case; slow cases stop early')
+    parser.add_argument('--concurrency', type=int, default=1, help='in-flight ASGI requests')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write JSON results here instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='compare two result files instead of running')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='p50 regression %% that makes --compare exit non-zero')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(args.compare[0], args.compare[1], args.threshold)
+
+    report = run(args)
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0
@@ -0,0 +1,115 @@
+"""
+Synthetic catalogue generator.
+Scales courses.csv, job_roles.csv and job_market.csv by an integer factor while
+keeping the vocabulary, sector mix and value ranges of the real data, so the
+TF-IDF, Random Forest and regression code paths see realistic inputs.
+"""
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+# ── Paths ─────────────────────────────────────────────────────────────────────
+_DIR      = os.path.dirname(os.path.abspath(__file__))
+_DATA_DIR = os.path.join(_DIR, '..', '..', 'backend', 'data')
+
+_CSV_NAMES = ('courses.csv', 'job_roles.csv', 'job_market.csv', 'nsqf_levels.csv', 'qualification_levels.csv')
+
+
+def _read(name: str) -> pd.DataFrame:
+    return pd.read_csv(os.path.join(_DATA_DIR, name)).fillna('')
+
+
+def _mutate_skills(skills: list, vocab: np.ndarray, rng: np.random.Generator) -> list:
+    """Swap roughly a third of a skill list for random skills from the vocabulary."""
+    out = list(skills)
+    for i in range(len(out)):
+        if rng.random() < 0.33:
+            out[i] = str(vocab[rng.integers(len(vocab))])
+    return list(dict.fromkeys(out))   # de-duplicate, keep order
+
+
+def scale_courses(df: pd.DataFrame, factor: int, rng: np.random.Generator) -> pd.DataFrame:
+    if factor <= 1:
+        return df.copy()
+    split = df['skills_covered'].str.split(',')
+    vocab = np.array(sorted({s.strip() for skills in split for s in skills if s.strip()}))
+    rows = []
+    for copy in range(factor):
+        for (_, row), skills in zip(df.iterrows(), split):
+            skills = [s.strip() for s in skills if s.strip()]
+            if copy:
+                skills = _mutate_skills(skills, vocab, rng)
+            level = int(row['nsqf_level']) if copy == 0 else int(np.clip(int(row['nsqf_level']) + rng.integers(-1, 2), 1, 8))
+            months = max(1, int(rng.integers(1, 13))) if copy else None
+            rows.append({
+                'course_id':      f"C{len(rows) + 1:07d}",
+                'course_name':    row['course_name'] if copy == 0 else f"{row['course_name']} {copy}",
+                'sector':         row['sector'],
+                'skills_covered': ','.join(skills),
+                'nsqf_level':     level,
+                'duration':       row['duration'] if copy == 0 else f"{months} Month{'s' if months > 1 else ''}",
+                'job_role':       row['job_role'],
+            })
+    return pd.DataFrame(rows)
+
+
+def scale_job_roles(df: pd.DataFrame, factor: int, rng: np.random.Generator) -> pd.DataFrame:
+    if factor <= 1:
+        return df.copy()
+    split = df['required_skills'].str.split()
+    vocab = np.array(sorted({s for skills in split for s in skills}))
+    rows = []
+    for copy in range(factor):
+        for (_, row), skills in zip(df.iterrows(), split):
+            rows.append({
+                'job_role':        row['job_role'] if copy == 0 else f"{row['job_role']} {copy}",
+                'required_skills': ' '.join(skills if copy == 0 else _mutate_skills(skills, vocab, rng)),
+                'sector':          row['sector'],
+                'nsqf_level':      int(row['nsqf_level']),
+            })
+    return pd.DataFrame(rows)
+
+
+def scale_job_market(df: pd.DataFrame, factor: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Add synthetic skills with noisy copies of each real skill's yearly trend."""
+    if factor <= 1:
+        return df.copy()
+    frames = [df]
+    for copy in range(1, factor):
+        noise = rng.normal(1.0, 0.1, size=len(df))
+        frames.append(pd.DataFrame({
+            'year':         df['year'].values,
+            'skill':        df['skill'] + f"_{copy}",
+            'demand_count': (df['demand_count'].values * noise).astype(int),
+            'avg_salary':   (df['avg_salary'].values * noise).astype(int),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def generate(out_dir: str, factor: int, seed: int = 42) -> str:
+    """
+    Write a scaled copy of backend/data into `<out_dir>/backend/data`.
+    Returns the data directory path.
+    """
+    rng = np.random.default_rng(seed)
+    data_dir = os.path.join(out_dir, 'backend', 'data')
+    os.makedirs(data_dir, exist_ok=True)
+
+    scale_courses(_read('courses.csv'), factor, rng).to_csv(
+        os.path.join(data_dir, 'courses.csv'), index=False)
+    scale_job_roles(_read('job_roles.csv'), factor, rng).to_csv(
+        os.path.join(data_dir, 'job_roles.csv'), index=False)
+    scale_job_market(_read('job_market.csv'), factor, rng).to_csv(
+        os.path.join(data_dir, 'job_market.csv'), index=False)
+    for name in ('nsqf_levels.csv', 'qualification_levels.csv'):
+        shutil.copy(os.path.join(_DATA_DIR, name), os.path.join(data_dir, name))
+    return data_dir
+
+
+def describe(data_dir: str) -> dict:
+    """Row counts of every CSV in a generated data directory."""
+    return {
+        name.replace('.csv', ''): int(len(pd.read_csv(os.path.join(data_dir, name))))
+        for name in _CSV_NAMES
+    }
@@ -0,0 +1,20 @@
+"""
+Shared test setup. Run from backend_python_legacy/:
+
+    pip install -r requirements-dev.txt
+    python -m pytest tests
+"""
+import os
+import sys
+
+# Settings placeholders (as in benchmarks/); nothing here connects to MongoDB.
+for _key, _value in {
+    'MONGO_URL': 'mongodb://localhost:27017',
+    'DB_NAME': 'careersetu_test',
+    'SECRET_KEY': 'test-secret',
+    'ALGORITHM': 'HS256',
+    'ACCESS_TOKEN_EXPIRE_MINUTES': '30',
+}.items():
+    os.environ.setdefault(_key, _value)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,41 @@
+"""
+Cache sizing — estimate_json_bytes stays close to the encoded size of
+typical route payloads without encoding them.
+"""
+import json
+
+import numpy as np
+
+from app.core.cache import ByteLRU, estimate_json_bytes
+from app.schemas.learner import CareerOutcomes
+
+
+def _encoded(obj) -> int:
+    return len(json.dumps(obj, separators=(',', ':')))
+
+
+def test_estimate_is_close_for_flat_payloads():
+    payload = {'target_role': 'Data Analyst', 'nsqf_level': 5, 'job_ready': False,
+               'matched_skills': ['python', 'sql', 'excel'], 'skill_match_pct': 33.3}
+    assert abs(estimate_json_bytes(payload) - _encoded(payload)) < 0.25 * _encoded(payload)
+
+
+def test_lists_are_sized_from_their_first_element():
+    row = {'course_id': 'C019', 'course_name': 'Data Engineering', 'sector': 'IT'}
+    short, long = [row] * 10, [row] * 10_000
+    assert estimate_json_bytes(long) - 2 == 1000 * (estimate_json_bytes(short) - 2)
+
+
+def test_models_and_arrays():
+    model = CareerOutcomes(entry_level='Junior Analyst', mid_level='Senior Analyst',
+                           future_specialization='Lead Analyst')
+    assert abs(estimate_json_bytes(model) - len(model.model_dump_json())) < 20
+    assert estimate_json_bytes(np.zeros(100)) > 100
+
+
+def test_byte_lru_with_estimate_evicts_by_budget():
+    cache = ByteLRU('test_estimate', 4096, estimate_json_bytes)
+    for i in range(100):
+        cache.put(i, {'results': ['x' * 50] * 5})
+    assert 0 < len(cache) < 100 and cache.nbytes <= 4096
+    assert cache.get(99) is not None and cache.get(0) is None
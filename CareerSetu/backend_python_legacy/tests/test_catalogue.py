@@ -0,0 +1,298 @@
+"""
+Catalogue backends — CSV, Parquet and MongoDB (mongomock-motor) serve the
+same typed tables, and the Mongo backend reads in batches and stays fresh.
+"""
+import asyncio
+import logging
+
+import pandas as pd
+import pytest
+from pandas.api.types import is_integer_dtype, is_float_dtype, CategoricalDtype
+
+from app.services import catalogue
+
+mongomock_motor = pytest.importorskip('mongomock_motor')
+
+TABLES = ('courses', 'job_roles', 'nsqf_levels', 'job_market', 'qualification_levels')
+
+
+def _raw(name: str) -> pd.DataFrame:
+    return pd.read_csv(catalogue.data_path(name + '.csv'))
+
+
+@pytest.fixture(autouse=True)
+def _reset_catalogue():
+    yield
+    catalogue.set_backend(None)
+    catalogue._tables.clear()
+
+
+@pytest.fixture
+def parquet_dir(tmp_path):
+    for name in TABLES:
+        _raw(name).to_parquet(tmp_path / f'{name}.parquet', index=False)
+    return str(tmp_path)
+
+
+async def _seeded_database(prefix: str = 'catalogue_'):
+    db = mongomock_motor.AsyncMongoMockClient()['careersetu_test']
+    for name in TABLES:
+        await db[prefix + name].insert_many(_raw(name).to_dict('records'))
+    return db
+
+
+async def _eventually(predicate, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+class _BatchedCursor:
+    """Cursor honouring motor's `to_list(length)` contract (mongomock returns everything at once)."""
+
+    def __init__(self, cursor, calls: list):
+        self._cursor = cursor
+        self._docs = None
+        self._calls = calls
+
+    def sort(self, *args):
+        self._cursor = self._cursor.sort(*args)
+        return self
+
+    def batch_size(self, n: int):
+        self._cursor = self._cursor.batch_size(n)
+        return self
+
+    async def to_list(self, length: int):
+        if self._docs is None:
+            self._docs = await self._cursor.to_list(length=None)
+        batch, self._docs = self._docs[:length], self._docs[length:]
+        self._calls.append(len(batch))
+        return batch
+
+    async def close(self):
+        await self._cursor.close()
+
+
+class _BatchedDatabase:
+    def __init__(self, db, calls: list):
+        self._db = db
+        self._calls = calls
+        self.name = db.name
+
+    def __getitem__(self, collection: str):
+        outer = self
+        inner = self._db[collection]
+
+        class _Collection:
+            def find(self, *args, **kwargs):
+                return _BatchedCursor(inner.find(*args, **kwargs), outer._calls)
+        return _Collection()
+
+
+# ── Typed tables ──────────────────────────────────────────────────────────────
+def _check_typed(expected_version_type):
+    courses = catalogue.courses()
+    df = courses.frame()
+    assert len(df) == len(_raw('courses'))
+    assert isinstance(df['sector'].dtype, CategoricalDtype)
+    assert is_integer_dtype(df['nsqf_level']) and is_integer_dtype(df['duration_months'])
+    assert all(isinstance(s, tuple) for s in df['skills_list'])
+    assert isinstance(courses.version, expected_version_type)
+
+    roles = catalogue.job_roles().frame()
+    assert isinstance(roles['sector'].dtype, CategoricalDtype)
+    assert is_integer_dtype(roles['nsqf_level'])
+    assert roles['skills_list'].tolist() == _raw('job_roles')['required_skills'].map(
+        catalogue.tokenise_skills).tolist()
+
+    levels = catalogue.nsqf_levels().frame()
+    assert is_integer_dtype(levels['nsqf_level']) and is_float_dtype(levels['next_level'])
+    assert levels['next_level'].isna().sum() == _raw('nsqf_levels')['next_level'].isna().sum()
+
+    market = catalogue.job_market().frame()
+    assert is_integer_dtype(market['year'])
+    assert isinstance(market['skill_key'].dtype, CategoricalDtype)
+
+    qualifications = catalogue.qualification_levels().frame()
+    assert is_integer_dtype(qualifications['nsqf_level'])
+    assert (qualifications['keyword'] == qualifications['keyword'].str.lower().str.strip()).all()
+
+    for name in TABLES:
+        table = catalogue.table(name)
+        assert table.source == catalogue.get_backend().source(name)
+        assert table.version == catalogue.get_backend().version(name)
+        assert table.column('nsqf_level' if name != 'job_market' else 'year').flags.writeable is False
+
+
+def test_csv_backend_tables():
+    catalogue.set_backend(catalogue.CSVBackend())
+    _check_typed(tuple)
+    assert catalogue.get_backend().source('courses').endswith('courses.csv')
+
+
+def test_parquet_backend_tables(parquet_dir):
+    catalogue.set_backend(catalogue.ParquetBackend(parquet_dir))
+    _check_typed(tuple)
+    assert catalogue.courses().source.endswith('courses.parquet')
+
+
+def test_parquet_matches_csv(parquet_dir):
+    catalogue.set_backend(catalogue.CSVBackend())
+    from_csv = {name: catalogue.table(name).frame() for name in TABLES}
+    catalogue.set_backend(catalogue.ParquetBackend(parquet_dir))
+    for name in TABLES:
+        pd.testing.assert_frame_equal(catalogue.table(name).frame(), from_csv[name])
+
+
+def test_missing_table_raises(tmp_path):
+    catalogue.set_backend(catalogue.ParquetBackend(str(tmp_path)))
+    with pytest.raises(FileNotFoundError):
+        catalogue.courses()
+
+
+def test_mongo_backend_tables():
+    async def scenario():
+        backend = catalogue.MongoBackend(database=await _seeded_database(), refresh='poll')
+        await backend.refresh()
+        return backend
+
+    backend = asyncio.run(scenario())
+    catalogue.set_backend(backend)
+    _check_typed(tuple)
+    generation, digest = catalogue.courses().version
+    assert generation == 1 and len(digest) == 40
+    assert catalogue.courses().source == 'mongo:careersetu_test.catalogue_courses'
+
+
+def test_mongo_matches_csv():
+    async def scenario():
+        backend = catalogue.MongoBackend(database=await _seeded_database(), refresh='poll')
+        await backend.refresh()
+        return backend
+
+    catalogue.set_backend(catalogue.CSVBackend())
+    from_csv = {name: catalogue.table(name).frame() for name in TABLES}
+    catalogue.set_backend(asyncio.run(scenario()))
+    for name in TABLES:
+        pd.testing.assert_frame_equal(catalogue.table(name).frame(), from_csv[name], check_dtype=False)
+
+
+def test_mongo_unloaded_table_raises():
+    backend = catalogue.MongoBackend(database=mongomock_motor.AsyncMongoMockClient()['empty'])
+    with pytest.raises(FileNotFoundError):
+        backend.version('courses')
+
+
+# ── Mongo reads ───────────────────────────────────────────────────────────────
+def test_mongo_reads_in_batches():
+    calls = []
+
+    async def scenario():
+        db = await _seeded_database()
+        backend = catalogue.MongoBackend(database=_BatchedDatabase(db, calls), batch_size=7)
+        return await backend.fetch('courses')
+
+    df = asyncio.run(scenario())
+    total = len(_raw('courses'))
+    assert total > 7
+    assert len(df) == total
+    assert df['course_name'].tolist() == _raw('courses')['course_name'].tolist()
+    # Full batches, one partial batch, then the empty read that ends the loop
+    assert calls == [7] * (total // 7) + ([total % 7] if total % 7 else []) + [0]
+
+
+def test_mongo_refresh_reports_only_changed_tables():
+    async def scenario():
+        db = await _seeded_database()
+        backend = catalogue.MongoBackend(database=db)
+        assert sorted(await backend.refresh()) == sorted(TABLES)
+        assert await backend.refresh() == []
+        before = backend.version('job_roles')
+        await db['catalogue_job_roles'].update_one({}, {'$set': {'required_skills': 'rust, go'}})
+        assert await backend.refresh() == ['job_roles']
+        return before, backend.version('job_roles')
+
+    before, after = asyncio.run(scenario())
+    assert after[0] == before[0] + 1 and after[1] != before[1]
+
+
+# ── Refresh loops ─────────────────────────────────────────────────────────────
+def test_poll_picks_up_edits():
+    async def scenario():
+        db = await _seeded_database()
+        backend = catalogue.MongoBackend(database=db, refresh='poll', poll_seconds=0.01)
+        catalogue.set_backend(backend)
+        await catalogue.start()
+        try:
+            before = catalogue.job_roles()
+            await db['catalogue_job_roles'].update_one(
+                {'job_role': before.frame()['job_role'].iloc[0]}, {'$set': {'required_skills': 'rust, go'}})
+            await _eventually(lambda: backend.version('job_roles') != before.version)
+            after = catalogue.job_roles()
+        finally:
+            await catalogue.stop()
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    assert after is not before and after.version != before.version
+    assert after.frame()['skills_list'].iloc[0] == ('rust', 'go')
+    assert before.frame()['skills_list'].iloc[0] != ('rust', 'go')
+
+
+def test_auto_falls_back_to_polling(caplog):
+    async def scenario():
+        db = await _seeded_database()
+        backend = catalogue.MongoBackend(database=db, refresh='auto', poll_seconds=0.01)
+        await backend.start()
+        try:
+            before = backend.version('courses')
+            await db['catalogue_courses'].delete_one({})
+            await _eventually(lambda: backend.version('courses') != before)
+            return backend.load('courses')
+        finally:
+            await backend.stop()
+
+    # mongomock has no change streams, like a standalone mongod
+    with caplog.at_level(logging.INFO, logger='careersetu.catalogue'):
+        df = asyncio.run(scenario())
+    assert len(df) == len(_raw('courses')) - 1
+    assert any('polling every' in r.getMessage() for r in caplog.records)
+
+
+def test_change_stream_mode_does_not_fall_back():
+    async def scenario():
+        backend = catalogue.MongoBackend(database=await _seeded_database(), refresh='change_stream',
+                                         poll_seconds=0.01)
+        with pytest.raises(Exception):
+            await backend.watch()
+
+    asyncio.run(scenario())
+
+
+def test_start_and_stop():
+    async def scenario():
+        backend = catalogue.MongoBackend(database=await _seeded_database(), refresh='poll', poll_seconds=60)
+        await backend.start()
+        watcher = backend._watcher
+        loaded = sorted(backend._snapshots)
+        running = not watcher.done()
+        await backend.stop()
+        await backend.stop()    # idempotent
+        return watcher, loaded, running, backend._watcher
+
+    watcher, loaded, running, after = asyncio.run(scenario())
+    assert loaded == sorted(TABLES)
+    assert running and watcher.cancelled() and after is None
+
+
+def test_file_backends_start_and_stop_are_noops(parquet_dir):
+    async def scenario():
+        for backend in (catalogue.CSVBackend(), catalogue.ParquetBackend(parquet_dir)):
+            catalogue.set_backend(backend)
+            await catalogue.start()
+            await catalogue.stop()
+
+    asyncio.run(scenario())
+    assert len(catalogue.courses()) == len(_raw('courses'))
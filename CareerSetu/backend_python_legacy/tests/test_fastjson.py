@@ -0,0 +1,72 @@
+"""
+Fast JSON encoding — orjson and the stdlib fallback produce the same JSON,
+including for NaN / Infinity, NumPy values, models and fragments.
+"""
+import json
+import math
+
+import numpy as np
+import pytest
+
+from app.core import fastjson
+from app.schemas.learner import CareerOutcomes
+
+
+class _Fragmented(dict):
+    def __json_fragment__(self):
+        return b'{"pre":"encoded"}'
+
+
+PAYLOAD = {
+    'score':    float('nan'),
+    'bounds':   [float('inf'), -math.inf, 1.5],
+    'array':    np.array([1.0, np.nan, 3.0]),
+    'scalars':  [np.float32(0.25), np.int64(7), np.bool_(True), np.float64('nan')],
+    'keys':     {1: 'int', 2.5: 'float'},
+    'model':    CareerOutcomes(entry_level='a', mid_level='b', future_specialization='c'),
+    'tuple':    (1, 'two'),
+}
+
+EXPECTED = {
+    'score':    None,
+    'bounds':   [None, None, 1.5],
+    'array':    [1.0, None, 3.0],
+    'scalars':  [0.25, 7, True, None],
+    'keys':     {'1': 'int', '2.5': 'float'},
+    'model':    {'entry_level': 'a', 'mid_level': 'b', 'future_specialization': 'c'},
+    'tuple':    [1, 'two'],
+}
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def encoder(request, monkeypatch):
+    if request.param == 'orjson':
+        if fastjson.orjson is None:
+            pytest.skip('orjson not installed')
+    else:
+        monkeypatch.setattr(fastjson, 'orjson', None)
+    return request.param
+
+
+def test_payload(encoder):
+    assert json.loads(fastjson.dumps(PAYLOAD)) == EXPECTED
+
+
+def test_non_finite_floats_are_null(encoder):
+    assert fastjson.dumps([float('nan'), float('inf')]) == b'[null,null]'
+
+
+def test_fragments(encoder):
+    value = _Fragmented(pre='dict contents')
+    out = json.loads(fastjson.dumps({'entry': value}))
+    expected = 'encoded' if encoder == 'orjson' else 'dict contents'
+    assert out == {'entry': {'pre': expected}}
+
+
+def test_matches_json_response_for_finite_payloads(encoder):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    payload = {'roles': [{'job_role': 'Data Analyst', 'skill_match_pct': 62.5, 'matched': ['sql']}],
+               'total': 1, 'model': PAYLOAD['model']}
+    assert json.loads(fastjson.dumps(payload)) == json.loads(JSONResponse(jsonable_encoder(payload)).body)
@@ -0,0 +1,75 @@
+"""
+Observation log — several writers (one ObservationLog per process) sharing a
+directory never overwrite each other's parts and see each other's ingests.
+"""
+import os
+import multiprocessing
+
+import pandas as pd
+
+from app.services.market_stats import ObservationLog
+
+
+def _rows(skill: str, demand: float) -> pd.DataFrame:
+    return pd.DataFrame({'year': [2024], 'skill': [skill], 'demand_count': [demand], 'avg_salary': [1000.0]})
+
+
+def _parts(directory: str) -> list:
+    return sorted(name for name in os.listdir(directory) if name.startswith('part-'))
+
+
+def _ingest(directory: str, skill: str, n: int):
+    log = ObservationLog(directory, snapshot_every=3)
+    for i in range(n):
+        log.append(_rows(skill, i + 1))
+
+
+def test_two_logs_share_a_directory(tmp_path):
+    a = ObservationLog(str(tmp_path), snapshot_every=100)
+    b = ObservationLog(str(tmp_path), snapshot_every=100)
+    assert a.append(_rows('python', 10)) == 1
+    assert b.append(_rows('sql', 20)) == 2      # numbered from disk, not from b's own state
+    assert a.append(_rows('python', 30)) == 3
+    assert _parts(str(tmp_path)) == [f'part-{i:010d}.parquet' for i in (1, 2, 3)]
+
+    b.refresh()
+    assert b.seq == 3
+    assert b.stats['python'].n == 2 and b.stats['sql'].n == 1
+    assert a.stats['sql'].n == 1
+
+
+def test_concurrent_processes_lose_nothing(tmp_path):
+    directory = str(tmp_path)
+    ctx = multiprocessing.get_context('spawn')
+    workers = [ctx.Process(target=_ingest, args=(directory, f'skill{i}', 10)) for i in range(3)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+        assert p.exitcode == 0
+
+    assert len(_parts(directory)) == 30
+    log = ObservationLog(directory, snapshot_every=3)
+    assert log.seq == 30
+    assert {k: s.n for k, s in log.stats.items()} == {'skill0': 10, 'skill1': 10, 'skill2': 10}
+
+
+def test_snapshot_after_foreign_parts(tmp_path):
+    a = ObservationLog(str(tmp_path), snapshot_every=100)
+    b = ObservationLog(str(tmp_path), snapshot_every=100)
+    a.append(_rows('python', 10))
+    b.append(_rows('python', 20))
+    a.snapshot()
+    assert a.snapshot_seq == 2
+
+    restored = ObservationLog(str(tmp_path), snapshot_every=100)
+    assert restored.seq == 2 and restored.stats['python'].n == 2
+
+
+def test_parts_get_default_permissions(tmp_path):
+    plain = tmp_path / 'plain.bin'
+    plain.write_bytes(b'x')
+    log = ObservationLog(str(tmp_path / 'obs'), snapshot_every=1)
+    log.append(_rows('python', 10))
+    for name in _parts(log.directory) + ['snapshot.json']:
+        assert os.stat(os.path.join(log.directory, name)).st_mode == os.stat(plain).st_mode
@@ -0,0 +1,41 @@
+"""
+Artifact writes — atomic_write replaces files in one step and leaves them
+with the permissions a plain open() would have given.
+"""
+import os
+import stat
+
+import pytest
+
+from app.core.singleflight import atomic_write
+
+
+def _mode(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fchmod'), reason='POSIX permissions only')
+def test_atomic_write_keeps_open_mode(tmp_path):
+    plain = tmp_path / 'plain.bin'
+    with open(plain, 'wb') as f:
+        f.write(b'x')
+
+    target = tmp_path / 'model.pkl'
+    with atomic_write(str(target)) as f:
+        f.write(b'payload')
+    assert _mode(target) == _mode(plain)
+
+
+def test_atomic_write_replaces_and_cleans_up(tmp_path):
+    target = tmp_path / 'snapshot.json'
+    target.write_text('old')
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(target), 'w') as f:
+            f.write('partial')
+            raise RuntimeError('boom')
+    assert target.read_text() == 'old'
+
+    with atomic_write(str(target), 'w') as f:
+        f.write('new')
+    assert target.read_text() == 'new'
+    assert os.listdir(tmp_path) == ['snapshot.json']